@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`decoding`
+==================
+
+Microbenchmark of sample decoding: the deep copying handlers in
+:py:data:`pymetawear.modules.base.DATA_HANDLERS` versus the ``struct``
+based decoders in :py:mod:`pymetawear.decoding`, for every ``DataTypeId``
+in ``DATA_HANDLERS``.
+
+Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/decoding.py [n_samples]
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import sys
+import timeit
+from copy import deepcopy
+from ctypes import c_uint, c_int, c_float, c_ubyte, cast, pointer, \
+    sizeof, c_void_p, POINTER
+
+from mbientlab.metawear.cbindings import Data, DataTypeId, CartesianFloat, \
+    BatteryState, Tcs34725ColorAdc, EulerAngles, CalibrationState, \
+    Quaternion, CorrectedCartesianFloat
+
+from pymetawear.decoding import decode
+from pymetawear.modules.base import DATA_HANDLERS, _error_handler
+
+SAMPLE_VALUES = {
+    DataTypeId.UINT32: c_uint(4294967295),
+    DataTypeId.INT32: c_int(-42),
+    DataTypeId.FLOAT: c_float(1013.25),
+    DataTypeId.CARTESIAN_FLOAT: CartesianFloat(x=0.1, y=-0.2, z=0.98),
+    DataTypeId.BATTERY_STATE: BatteryState(voltage=4123, charge=98),
+    DataTypeId.BYTE_ARRAY: (c_ubyte * 6)(0xd1, 0x75, 0x74, 0x0b, 0x59, 0x1f),
+    DataTypeId.TCS34725_ADC: Tcs34725ColorAdc(
+        clear=418, red=123, green=150, blue=110),
+    DataTypeId.EULER_ANGLE: EulerAngles(
+        heading=271.5, pitch=-4.2, roll=1.3, yaw=271.5),
+    DataTypeId.QUATERNION: Quaternion(w=0.92, x=0.01, y=-0.02, z=0.38),
+    DataTypeId.CORRECTED_CARTESIAN_FLOAT: CorrectedCartesianFloat(
+        x=12.5, y=-3.0, z=40.25, accuracy=3),
+    DataTypeId.CALIBRATION_STATE: CalibrationState(
+        accelrometer=3, gyroscope=3, magnetometer=1),
+}
+
+_TYPE_NAMES = dict((v, k) for k, v in vars(DataTypeId).items()
+                   if not k.startswith('_'))
+
+
+def make_data_point(type_id, epoch=1573000000000):
+    """Create a ``Data`` pointer like the ones ``libmetawear`` hands out."""
+    value = SAMPLE_VALUES[type_id]
+    data = Data(epoch=epoch, extra=None,
+                value=cast(pointer(value), c_void_p).value,
+                type_id=type_id, length=sizeof(value))
+    # Keep the value alive as long as the data point.
+    data._value_ref = value
+    return pointer(data)
+
+
+def deepcopy_handler(data):
+    """The deep copying sample conversion previously done in ``data_handler``."""
+    return {
+        'epoch': int(data.contents.epoch),
+        'value': deepcopy(DATA_HANDLERS.get(
+            data.contents.type_id, _error_handler)(data)),
+    }
+
+
+def run(n=100000):
+    print("{0:<28} {1:>14} {2:>14} {3:>8}".format(
+        "DataTypeId", "deepcopy [us]", "decode [us]", "speedup"))
+    for type_id in sorted(DATA_HANDLERS):
+        data = make_data_point(type_id)
+        t_old = min(timeit.repeat(lambda: deepcopy_handler(data),
+                                  number=n, repeat=3)) / n * 1e6
+        t_new = min(timeit.repeat(lambda: decode(data),
+                                  number=n, repeat=3)) / n * 1e6
+        print("{0:<28} {1:>14.3f} {2:>14.3f} {3:>7.1f}x".format(
+            _TYPE_NAMES.get(type_id, type_id), t_old, t_new, t_old / t_new))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`import_time`
+==================
+
+Benchmark of the time it takes to import parts of PyMetaWear in a fresh
+interpreter, and of which heavy dependencies (the ``mbientlab`` package,
+which loads the native MetaWear library, and ``tqdm``) get loaded by it.
+
+Run with:
+
+.. code-block:: bash
+
+    $ python benchmarks/import_time.py [n_runs]
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import subprocess
+
+STATEMENTS = [
+    'import pymetawear',
+    'import pymetawear.modules',
+    'from pymetawear.modules import AccelerometerModule',
+    'import pymetawear.client',
+]
+
+_SCRIPT = """
+import sys, time, json
+t = time.time()
+{0}
+t = time.time() - t
+print(json.dumps([t, [m for m in ('mbientlab.metawear', 'tqdm')
+                      if m in sys.modules]]))
+"""
+
+
+def measure(statement):
+    """Import time in seconds and heavy modules loaded by a statement."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.check_output(
+        [sys.executable, '-c', _SCRIPT.format(statement)], env=env)
+    return json.loads(output.decode('ascii').strip().splitlines()[-1])
+
+
+def run(n=10):
+    print("{0:<52} {1:>10}  {2}".format("Statement", "time [ms]", "loads"))
+    for statement in STATEMENTS:
+        results = [measure(statement) for _ in range(n)]
+        print("{0:<52} {1:>10.1f}  {2}".format(
+            statement, min(r[0] for r in results) * 1000,
+            ', '.join(results[0][1]) or '-'))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -49,7 +49,10 @@ n = 0
 data = None
 while (not download_done) and n < 3:
     try:
-        data = client.accelerometer.download_log()
+        # Keep downloaded data on disk, so that a retry continues
+        # where the interrupted download stopped.
+        data = client.accelerometer.download_log(
+            checkpoint='accelerometer_download')
         download_done = True
     except PyMetaWearDownloadTimeout:
         print("Download of log interrupted. Trying to reconnect...")
@@ -5,8 +5,6 @@ PyMetaWear
 
 import sys
 
-from mbientlab.metawear import libmetawear
-
 from pymetawear.version import __version__, version  # flake8: noqa
 
 import logging
@@ -20,6 +18,29 @@ except ImportError:
 logging.getLogger(__name__).addHandler(NullHandler())
 
 
+class _LibMetaWear(object):
+    """Stand-in for ``mbientlab.metawear.libmetawear``.
+
+    Importing ``mbientlab.metawear`` loads the native MetaWear library,
+    so it is deferred until a function of it is first used. Looked up
+    functions are stored on the instance, so later calls do not pass
+    through this class.
+
+    """
+
+    def __getattr__(self, name):
+        from mbientlab.metawear import libmetawear as _libmetawear
+        attr = getattr(_libmetawear, name)
+        setattr(self, name, attr)
+        return attr
+
+    def __repr__(self):
+        return "<Deferred libmetawear>"
+
+
+libmetawear = _LibMetaWear()
+
+
 def add_stream_logger(stream=sys.stdout, level=logging.DEBUG):
     """
     Helper for quickly adding a StreamHandler to the logger. Useful for
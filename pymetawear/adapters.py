@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Adapter pool
+------------
+
+Spreading boards over several Bluetooth adapters, e.g. USB dongles on a
+gateway, since one adapter only handles a handful of high-rate connections.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import logging
+from collections import OrderedDict, namedtuple
+from threading import RLock
+
+from pymetawear.client import MetaWearClient
+from pymetawear.exceptions import PyMetaWearException
+
+log = logging.getLogger(__name__)
+
+
+class AdapterStats(namedtuple('AdapterStats', [
+        'device', 'n_boards', 'n_connected', 'n_notifications', 'rate',
+        'load'])):
+    """Load and throughput of one adapter of an :py:class:`AdapterPool`.
+
+    :param str device: The Bluetooth device, e.g. ``'hci1'``.
+    :param int n_boards: Number of boards assigned to the adapter.
+    :param int n_connected: Number of those boards that are connected.
+    :param int n_notifications: Notifications received through the
+        adapter, including from boards that have been moved away.
+    :param float rate: Notifications per second, measured over the latest
+        measurement interval of the pool.
+    :param float load: The load the pool balances on, see
+        :py:class:`AdapterPool`.
+
+    """
+
+    __slots__ = ()
+
+
+class AdapterPool(object):
+    """Assigns boards to the least loaded of several Bluetooth adapters.
+
+    .. code-block:: python
+
+        from pymetawear.adapters import AdapterPool
+
+        pool = AdapterPool(['hci0', 'hci1', 'hci2'], max_boards=7)
+        clients = [pool.client(address) for address in addresses]
+        for c in clients:
+            pool.connect(c, timeout=10.0)
+        print(pool.stats())
+
+    The load of an adapter is its number of connected boards plus its
+    notification rate divided by ``board_rate``, i.e. a board streaming at
+    ``board_rate`` notifications per second weighs as much as one more
+    connected board. Rates are measured from the notifications received by
+    the modules of the clients, at most once every ``interval`` seconds.
+
+    Boards are assigned when their clients are created, and reassigned by
+    :meth:`connect` if another adapter has become less loaded. Only clients
+    that are disconnected and have no subscriptions or loggers are moved,
+    since moving them drops their modules; others reconnect through the
+    adapter they have. This holds for reconnects made by a
+    :py:class:`~pymetawear.reconnect.ReconnectSupervisor` given the pool as
+    well, so a streaming board whose link was lost is not moved.
+
+    :param devices: The Bluetooth devices to use, e.g.
+        ``['hci0', 'hci1']``.
+    :param int max_boards: Maximal number of boards per adapter. Default
+        is ``None``, i.e. no limit.
+    :param float board_rate: Notification rate in Hz counted as one board.
+    :param float interval: Minimal time in seconds between rate
+        measurements.
+
+    """
+
+    def __init__(self, devices, max_boards=None, board_rate=100.0,
+                 interval=1.0):
+        devices = list(devices)
+        if not devices:
+            raise ValueError("An adapter pool needs at least one device.")
+        self.devices = devices
+        self.max_boards = max_boards
+        self.board_rate = board_rate
+        self.interval = interval
+        #: The clients of the pool, keyed on address.
+        self.clients = OrderedDict()
+
+        self._lock = RLock()
+        # Notification counts of each client at the latest measurement,
+        # their rates since the one before, and notifications counted on
+        # each device from clients moved away from it.
+        self._measured_at = time.time()
+        self._counts = {}
+        self._rates = {}
+        self._moved_notifications = dict((d, 0) for d in devices)
+        # Addresses being connected, counted as connected.
+        self._connecting = set()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __repr__(self):
+        return "<AdapterPool {0}, {1} boards>".format(
+            ', '.join(self.devices), len(self))
+
+    def client(self, address, **client_kwargs):
+        """Create a client on the least loaded adapter.
+
+        :param str address: A Bluetooth MAC address to a MetaWear board.
+        :param client_kwargs: Further keyword arguments to
+            :py:class:`~pymetawear.client.MetaWearClient`. It is not
+            connected, unless ``connect=True`` is given.
+        :return: The client.
+        :rtype: :py:class:`~pymetawear.client.MetaWearClient`
+
+        """
+        connect = client_kwargs.pop('connect', False)
+        with self._lock:
+            if address in self.clients:
+                raise ValueError(
+                    "{0} is already in the pool.".format(address))
+            client = MetaWearClient(address, device=self._select(),
+                                    connect=False, **client_kwargs)
+            self.add(client)
+        if connect:
+            self.connect(client)
+        return client
+
+    def add(self, client):
+        """Add a client created elsewhere, keeping its adapter.
+
+        :param client: A :py:class:`~pymetawear.client.MetaWearClient`
+            using one of the devices of the pool.
+
+        """
+        if client.device not in self.devices:
+            raise ValueError("{0} is not in the pool.".format(client.device))
+        with self._lock:
+            self.clients[client._address] = client
+            self._counts[client._address] = client.n_notifications
+            self._rates[client._address] = 0.0
+
+    def remove(self, client):
+        """Remove a client from the pool.
+
+        :param client: The client to remove.
+
+        """
+        with self._lock:
+            address = client._address
+            self._moved_notifications[client.device] += \
+                client.n_notifications
+            del self.clients[address]
+            del self._counts[address]
+            del self._rates[address]
+
+    def connect(self, client, **kwargs):
+        """Connect, or reconnect, a client of the pool.
+
+        The client is first moved to the least loaded adapter, if it is
+        not on it already and can be moved.
+
+        :param client: The client to connect.
+        :param kwargs: Keyword arguments to
+            :py:meth:`~pymetawear.client.MetaWearClient.connect`, e.g.
+            ``timeout``.
+
+        """
+        with self._lock:
+            if client.is_connected:
+                return
+            if _is_movable(client):
+                device = self._select(client)
+                if device != client.device:
+                    self._moved_notifications[client.device] += \
+                        client.n_notifications
+                    client.move_to(device)
+            self._connecting.add(client._address)
+        try:
+            client.connect(**kwargs)
+        finally:
+            with self._lock:
+                self._connecting.discard(client._address)
+
+    def _measure(self):
+        # Update the notification rates of the clients. Called with the
+        # lock held.
+        now = time.time()
+        elapsed = now - self._measured_at
+        if elapsed < self.interval:
+            return
+        for address, client in self.clients.items():
+            count = client.n_notifications
+            # The count restarts when a client is moved.
+            new = count - self._counts[address] \
+                if count >= self._counts[address] else count
+            self._rates[address] = new / elapsed
+            self._counts[address] = count
+        self._measured_at = now
+
+    def _load(self, device, exclude=None):
+        # Connected boards plus notification rate in boards. Called with
+        # the lock held, after _measure.
+        n_connected = rate = 0
+        for address, client in self.clients.items():
+            if client is exclude or client.device != device:
+                continue
+            n_connected += client.is_connected or \
+                address in self._connecting
+            rate += self._rates[address]
+        return n_connected + rate / self.board_rate
+
+    def _select(self, client=None):
+        # The least loaded device with room for the client. Ties go to the
+        # device with the fewest boards, the current device of the client
+        # and then the first device.
+        self._measure()
+        candidates = []
+        for i, device in enumerate(self.devices):
+            n_boards = sum(1 for c in self.clients.values()
+                           if c.device == device and c is not client)
+            if self.max_boards is not None and n_boards >= self.max_boards:
+                continue
+            current = client is not None and client.device == device
+            candidates.append(
+                (self._load(device, client), n_boards, not current, i,
+                 device))
+        if not candidates:
+            raise PyMetaWearException(
+                "All adapters have {0} boards.".format(self.max_boards))
+        return min(candidates)[-1]
+
+    def stats(self):
+        """The load and throughput of each adapter.
+
+        :return: The :py:class:`AdapterStats` of each device, in the order
+            of the devices.
+        :rtype: :py:class:`collections.OrderedDict`
+
+        """
+        with self._lock:
+            self._measure()
+            stats = OrderedDict()
+            for device in self.devices:
+                clients = [(a, c) for a, c in self.clients.items()
+                           if c.device == device]
+                stats[device] = AdapterStats(
+                    device, len(clients),
+                    sum(1 for _, c in clients if c.is_connected),
+                    self._moved_notifications[device] +
+                    sum(c.n_notifications for _, c in clients),
+                    sum(self._rates[a] for a, _ in clients),
+                    self._load(device))
+            return stats
+
+
+def _is_movable(client):
+    # A disconnected client can be moved if it has nothing to lose by
+    # getting new modules.
+    for module in client._modules.values():
+        if module.callback is not None or getattr(module, '_callbacks', None):
+            return False
+        if getattr(module, 'has_logger', False):
+            return False
+    return True
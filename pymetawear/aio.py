@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Asyncio client
+--------------
+
+An :py:mod:`asyncio` front end to
+:py:class:`~pymetawear.client.MetaWearClient`. Requires Python 3.5.2 or later.
+
+Connecting uses the asynchronous connect of the ``metawear`` package and
+does not occupy a thread. Other operations that block, e.g. configuration
+and log downloads, are run in an executor. Notification samples are
+passed from the Bluetooth thread to the event loop in batches: the loop
+is only woken up for the first sample received since it last emptied
+the stream, so a burst of samples costs one ``call_soon_threadsafe``.
+
+"""
+
+import asyncio
+import logging
+import functools
+from collections import deque
+from threading import Lock
+
+from pymetawear.client import MetaWearClient
+from pymetawear.decoding import decode
+from pymetawear.sinks import DataSink
+
+log = logging.getLogger(__name__)
+
+
+class AsyncMetaWearClient(object):
+    """A MetaWear client for use with :py:mod:`asyncio`.
+
+    .. code-block:: python
+
+        from pymetawear.aio import AsyncMetaWearClient
+
+        async def main():
+            async with AsyncMetaWearClient('DD:3A:7D:4D:56:F0') as c:
+                await c.configure('accelerometer', data_rate=50.0)
+                async with c.stream('accelerometer') as samples:
+                    async for data in samples:
+                        print(data)
+
+    One event loop can drive many clients, e.g. by connecting them with
+    :py:func:`asyncio.gather`.
+
+    :param str address: A Bluetooth MAC address to a MetaWear board.
+    :param str device: Specifying which Bluetooth device to use.
+    :param loop: The event loop to use. Defaults to the current event loop.
+    :param executor: The :py:class:`concurrent.futures.Executor` to run
+        blocking operations in. Defaults to the default executor of the
+        loop.
+    :param client_kwargs: Further keyword arguments to
+        :py:class:`~pymetawear.client.MetaWearClient`, e.g.
+        ``state_cache``.
+
+    """
+
+    def __init__(self, address, device='hci0', loop=None, executor=None,
+                 **client_kwargs):
+        client_kwargs['connect'] = False
+        self.client = MetaWearClient(address, device=device, **client_kwargs)
+        self._loop = loop
+        self._executor = executor
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    def __repr__(self):
+        return "<AsyncMetaWearClient, {0}>".format(self.client._address)
+
+    @property
+    def loop(self):
+        """The event loop of the client."""
+        return self._loop or asyncio.get_event_loop()
+
+    async def connect(self, timeout=None, retries=None):
+        """Connect to the MetaWear device.
+
+        :param float timeout: Maximal time in seconds per connection
+            attempt. Defaults to ``connect_timeout`` of the client.
+        :param int retries: Number of retries of failed attempts. Defaults
+            to ``connect_retries`` of the client.
+
+        """
+        await asyncio.wrap_future(
+            self.client.connect_future(timeout, retries), loop=self.loop)
+
+    async def disconnect(self):
+        """Disconnect from the MetaWear device."""
+        await self.run(self.client.disconnect)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking function in the executor of the client.
+
+        .. code-block:: python
+
+            state = await c.run(c.client.settings.battery_state)
+
+        """
+        return await self.loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs))
+
+    async def configure(self, module, **settings):
+        """Call ``set_settings`` of a module.
+
+        :param str module: Name of the module, e.g. ``'accelerometer'``.
+        :param settings: Keyword arguments to ``set_settings``.
+
+        """
+        return await self.run(getattr(self.client, module).set_settings,
+                              **settings)
+
+    async def set_sample_delay(self, data_source, delay=None,
+                               differential=False):
+        """Change the delay between samples of a sensor fusion data source,
+        see
+        :py:meth:`~pymetawear.modules.sensorfusion.SensorFusionModule.set_sample_delay`.
+        """
+        return await self.run(self.client.sensorfusion.set_sample_delay,
+                              data_source, delay, differential)
+
+    async def start_logging(self, module):
+        """Start logging of a module."""
+        return await self.run(getattr(self.client, module).start_logging)
+
+    async def stop_logging(self, module):
+        """Stop logging of a module."""
+        return await self.run(getattr(self.client, module).stop_logging)
+
+    async def download_log(self, module, **kwargs):
+        """Download the logged data of a module, see
+        :py:meth:`~pymetawear.modules.base.PyMetaWearLoggingModule.download_log`.
+        """
+        return await self.run(getattr(self.client, module).download_log,
+                              **kwargs)
+
+    async def download_logs(self, **kwargs):
+        """Download the logged data of all modules, see
+        :py:meth:`~pymetawear.client.MetaWearClient.download_logs`."""
+        return await self.run(self.client.download_logs, **kwargs)
+
+    def stream(self, module, data_source=None, maxsize=None, batches=False,
+               **kwargs):
+        """Create a stream of the notifications of a module.
+
+        The stream subscribes to notifications when entered as an
+        asynchronous context manager, and unsubscribes when left.
+
+        :param str module: Name of the module, e.g. ``'accelerometer'``.
+        :param str data_source: For the sensor fusion module, the data
+            source to stream, e.g. ``'quaternion'`` or ``'corrected_acc'``.
+        :param int maxsize: Maximal number of samples held by the stream.
+            If the consumer falls behind, the oldest samples are dropped.
+            Default is ``None``, i.e. no limit.
+        :param bool batches: If ``True``, the stream yields lists of all
+            samples received since the previous iteration instead of one
+            sample at a time.
+        :param kwargs: Further keyword arguments to ``notifications``.
+        :rtype: :py:class:`NotificationStream`
+
+        """
+        return NotificationStream(self, module, data_source=data_source,
+                                  maxsize=maxsize, batches=batches, **kwargs)
+
+
+class NotificationStream(DataSink):
+    """Asynchronous iterator over the notifications of a module.
+
+    Created by :py:meth:`AsyncMetaWearClient.stream`. Iteration ends when
+    the subscription is removed.
+
+    """
+
+    def __init__(self, client, module, data_source=None, maxsize=None,
+                 batches=False, **kwargs):
+        self._client = client
+        self._module = module
+        self._data_source = data_source
+        self._kwargs = kwargs
+        self.maxsize = maxsize
+        self.batches = batches
+        self.n_dropped = 0
+
+        self._loop = client.loop
+        self._lock = Lock()
+        self._pending = []
+        self._scheduled = False
+        self._ready = deque()
+        self._waiter = None
+        self._closed = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def __repr__(self):
+        return "<NotificationStream {0}, {1} samples>".format(
+            self._module, len(self._ready))
+
+    async def start(self):
+        """Subscribe to the notifications."""
+        await self._notifications(self, **self._kwargs)
+
+    async def stop(self):
+        """Unsubscribe from the notifications, leaving other subscriptions
+        of the module, e.g. other sensor fusion data sources, as they are."""
+        await self._notifications(None)
+
+    async def _notifications(self, callback, **kwargs):
+        module = getattr(self._client.client, self._module)
+        if self._data_source is None:
+            await self._client.run(module.notifications, callback=callback,
+                                   **kwargs)
+        else:
+            await self._client.run(module.source_notifications,
+                                   self._data_source, callback, **kwargs)
+
+    def handle_data(self, data):
+        sample = decode(data)
+        with self._lock:
+            self._pending.append(sample)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._loop.call_soon_threadsafe(self._receive)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._receive)
+        except RuntimeError:
+            # The loop has been closed; there is no one to wake up.
+            pass
+
+    def _receive(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+        self._ready.extend(pending)
+        if self.maxsize is not None:
+            while len(self._ready) > self.maxsize:
+                self._ready.popleft()
+                self.n_dropped += 1
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._ready:
+            if self._closed:
+                raise StopAsyncIteration
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        if self.batches:
+            batch = list(self._ready)
+            self._ready.clear()
+            return batch
+        return self._ready.popleft()
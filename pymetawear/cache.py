@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Board state cache
+-----------------
+
+On-disk cache of the ``libmetawear`` board state, i.e. the module
+information that ``mbl_mw_metawearboard_initialize`` otherwise has to
+query from the board on every connection.
+
+The state of each board is stored in a JSON file named after its MAC
+address, together with the firmware revision and model it was read from.
+If the board reports another firmware revision or model when connected,
+the cached state is replaced. The module settings last written to the
+board can optionally be stored in the same file.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import json
+import base64
+import logging
+from ctypes import c_ubyte, c_uint, byref, string_at
+from collections import deque
+from threading import Event
+
+from pymetawear import libmetawear
+from pymetawear.checkpoint import _replace
+
+log = logging.getLogger(__name__)
+
+# Device Information characteristics of the entries in KEYS.
+_DEVICE_INFO_UUIDS = {
+    'firmware': '00002a26-0000-1000-8000-00805f9b34fb',
+    'model': '00002a24-0000-1000-8000-00805f9b34fb',
+}
+# Seconds to wait for a device information read in is_valid.
+_READ_TIMEOUT = 5.0
+
+
+class BoardStateCache(object):
+    """Directory of serialized board states.
+
+    .. code-block:: python
+
+        from pymetawear.client import MetaWearClient
+
+        c = MetaWearClient('DD:3A:7D:4D:56:F0', state_cache='~/.pymetawear')
+
+    :param str directory: The cache directory. Created if it does not exist.
+
+    """
+
+    #: The device information entries a cached state is valid for.
+    KEYS = ('firmware', 'model')
+
+    def __init__(self, directory):
+        self.directory = os.path.expanduser(directory)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def __repr__(self):
+        return "<BoardStateCache {0}>".format(self.directory)
+
+    def path(self, address):
+        """Path of the cache file of a board."""
+        return os.path.join(self.directory, '{0}.json'.format(
+            address.upper().replace(':', '')))
+
+    def load(self, address):
+        """Get the cache entry of a board.
+
+        :param str address: MAC address of the board.
+        :return: Dictionary with the device ``info`` and the serialized
+            ``state``, or ``None`` if the board is not cached.
+        :rtype: dict
+
+        """
+        path = self.path(address)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            entry['state'] = base64.b64decode(entry['state'])
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("Ignoring corrupt board state cache {0}: {1}".format(
+                path, e))
+            return None
+        return entry
+
+    def restore(self, mw):
+        """Deserialize the cached state of a board, if any, before connecting.
+
+        :param mw: The ``mbientlab.metawear.MetaWear`` instance.
+        :return: ``True`` if a cached state was restored.
+        :rtype: bool
+
+        """
+        entry = self.load(mw.address)
+        if entry is None:
+            return False
+        state = entry['state']
+        raw = (c_ubyte * len(state)).from_buffer_copy(state)
+        status = libmetawear.mbl_mw_metawearboard_deserialize(
+            mw.board, raw, len(state))
+        if status:
+            log.warning("Could not restore board state of {0} ({1}).".format(
+                mw.address, status))
+            self.remove(mw.address)
+            return False
+        # The device information is not read again if the state is valid,
+        # except for the entries it is checked on.
+        mw.info.update(entry['info'])
+        for key in self.KEYS:
+            mw.info.pop(key, None)
+        log.debug("Restored board state of {0} (firmware {1}).".format(
+            mw.address, entry['info'].get('firmware')))
+        return True
+
+    def is_valid(self, mw):
+        """Check if the cached state matches the connected board.
+
+        Entries of :attr:`KEYS` that were not read when connecting are
+        read from the board first. Blocks until they are read, so it must
+        not be called on the Bluetooth thread; use :meth:`is_valid_async`
+        there.
+
+        :param mw: The connected ``mbientlab.metawear.MetaWear`` instance.
+        :rtype: bool
+
+        """
+        done = Event()
+        result = []
+
+        def checked(valid):
+            result.append(valid)
+            done.set()
+
+        self.is_valid_async(mw, checked)
+        if not done.wait(_READ_TIMEOUT * len(self.KEYS)):
+            log.warning("Could not read the device information of "
+                        "{0}.".format(mw.address))
+            return False
+        return result[0]
+
+    def is_valid_async(self, mw, handler):
+        """Check if the cached state matches the connected board, without
+        blocking.
+
+        Entries of :attr:`KEYS` that were not read when connecting are read
+        one after the other, each read started from the callback of the
+        previous one, as ``MetaWear.connect_async`` reads the device
+        information. It can therefore be called on the Bluetooth thread.
+
+        :param mw: The connected ``mbientlab.metawear.MetaWear`` instance.
+        :param callable handler: Function called with ``True`` or
+            ``False`` once the check is done.
+
+        """
+        missing = deque(key for key in self.KEYS if key not in mw.info)
+
+        def check_next():
+            if missing:
+                _read_device_info(mw, missing.popleft(), check_next)
+                return
+            entry = self.load(mw.address)
+            handler(entry is not None and all(
+                entry['info'].get(key) == mw.info.get(key)
+                for key in self.KEYS))
+
+        check_next()
+
+    def store(self, mw):
+        """Serialize and cache the state of a connected board.
+
+        :param mw: The connected ``mbientlab.metawear.MetaWear`` instance.
+
+        """
+        size = c_uint(0)
+        ptr = libmetawear.mbl_mw_metawearboard_serialize(
+            mw.board, byref(size))
+        try:
+            state = string_at(ptr, size.value)
+        finally:
+            libmetawear.mbl_mw_memory_free(ptr)
+        entry = {
+            'address': mw.address,
+            'info': dict(mw.info),
+            'state': base64.b64encode(state).decode('ascii'),
+        }
+        self._write(mw.address, entry)
+        log.debug("Cached board state of {0} (firmware {1}).".format(
+            mw.address, mw.info.get('firmware')))
+
+    def load_settings(self, address):
+        """Get the module settings cached with the state of a board.
+
+        :param str address: MAC address of the board.
+        :return: The ``written_settings`` of each module, keyed on module
+            name. Empty if there are none.
+        :rtype: dict
+
+        """
+        entry = self.load(address)
+        if entry is None:
+            return {}
+        return entry.get('settings', {})
+
+    def store_settings(self, address, settings):
+        """Cache the module settings of a board with its state.
+
+        The settings are dropped when the state is replaced, e.g. after a
+        firmware update. Boards without a cached state are ignored.
+
+        :param str address: MAC address of the board.
+        :param dict settings: The ``written_settings`` of each module,
+            keyed on module name.
+
+        """
+        entry = self.load(address)
+        if entry is None:
+            return
+        entry['state'] = base64.b64encode(entry['state']).decode('ascii')
+        entry['settings'] = settings
+        self._write(address, entry)
+        log.debug("Cached module settings of {0}.".format(address))
+
+    def _write(self, address, entry):
+        # Write to a temporary file first, so that an interrupted write
+        # does not leave a corrupt cache file.
+        tmp_path = self.path(address) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=2, sort_keys=True)
+        _replace(tmp_path, self.path(address))
+
+    def remove(self, address):
+        """Remove the cached state of a board."""
+        if os.path.isfile(self.path(address)):
+            os.remove(self.path(address))
+
+
+def _read_device_info(mw, key, handler):
+    # Read a device information entry from the board into mw.info, the way
+    # MetaWear does when libmetawear asks for it, and call handler when
+    # done. The entry is left out if it could not be read.
+    gatt_char = mw.warble.find_characteristic(_DEVICE_INFO_UUIDS[key])
+    if gatt_char is None:
+        handler()
+        return
+
+    def completed(value, error):
+        if error is None:
+            mw.info[key] = bytearray(value).decode('utf8')
+        else:
+            log.warning("Could not read {0} of {1}: {2}".format(
+                key, mw.address, error))
+        handler()
+
+    gatt_char.read_value_async(completed)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Log download checkpoints
+------------------------
+
+On-disk checkpoints making log downloads resumable. The samples received
+for each logger are written to a :py:class:`~pymetawear.sinks.BinaryFile`
+in the checkpoint directory, and the progress of each logger is recorded
+in a ``checkpoint.json`` file next to it. When a download is retried,
+the samples already on disk are kept and samples that are received
+again are skipped.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import json
+import logging
+from threading import Lock
+
+from pymetawear.decoding import record_size, iter_records
+from pymetawear.sinks import DataSink, BinaryFile, read_binary, load_binary
+
+log = logging.getLogger(__name__)
+
+
+def _replace(src, dst):
+    # Replace dst with src atomically, so that a crash leaves either the
+    # old or the new file. Python 2 lacks os.replace, and its os.rename
+    # only replaces existing files on POSIX.
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    elif os.name != 'nt' or not os.path.exists(dst):
+        os.rename(src, dst)
+    else:
+        os.remove(dst)
+        os.rename(src, dst)
+
+
+class LogCheckpoint(object):
+    """A directory holding the partially downloaded data of loggers.
+
+    .. code-block:: python
+
+        from pymetawear.exceptions import PyMetaWearDownloadTimeout
+
+        while True:
+            try:
+                data = c.accelerometer.download_log(checkpoint='acc_download')
+                break
+            except PyMetaWearDownloadTimeout:
+                c.disconnect()
+                c.connect()
+
+    Samples are deduplicated on their epoch, which increases
+    monotonically within a log. The directory should therefore only be
+    used for one logging session; the data of a logger is removed from
+    it when its download has completed.
+
+    :param str directory: The checkpoint directory. Created if it does
+        not exist.
+    :param int chunk_size: Number of samples received between writes of
+        data and progress to disk.
+
+    """
+
+    STATE_FILE = 'checkpoint.json'
+
+    def __init__(self, directory, chunk_size=1024):
+        self.directory = directory
+        self.chunk_size = int(chunk_size)
+        self._lock = Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __repr__(self):
+        return "<LogCheckpoint {0}>".format(self.directory)
+
+    @property
+    def _state_path(self):
+        return os.path.join(self.directory, self.STATE_FILE)
+
+    def data_path(self, logger_id):
+        """Path of the file holding the samples of a logger."""
+        return os.path.join(self.directory, 'logger_{0}.bin'.format(logger_id))
+
+    def _load_states(self):
+        if not os.path.exists(self._state_path):
+            return {}
+        with open(self._state_path, 'r') as f:
+            return json.load(f)
+
+    def state(self, logger_id):
+        """Get the recorded progress of a logger.
+
+        :param int logger_id: The id of the logger.
+        :return: Dictionary with the number of stored samples
+            (``n_entries``), the last stored epoch (``last_epoch``) and
+            the number of stored samples with that epoch
+            (``n_last_epoch``), or ``None`` if nothing has been stored.
+        :rtype: dict
+
+        """
+        with self._lock:
+            return self._load_states().get(str(logger_id))
+
+    def _save_state(self, logger_id, state):
+        with self._lock:
+            states = self._load_states()
+            if state is None:
+                states.pop(str(logger_id), None)
+            else:
+                states[str(logger_id)] = state
+            tmp_path = self._state_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(states, f, indent=2, sort_keys=True)
+            _replace(tmp_path, self._state_path)
+
+    def sink(self, logger_id):
+        """Create a sink storing new samples of a logger.
+
+        :param int logger_id: The id of the logger.
+        :rtype: :py:class:`~pymetawear.sinks.DataSink`
+
+        """
+        return _CheckpointSink(self, logger_id)
+
+    def read(self, logger_id, output='list'):
+        """Read the stored samples of a logger.
+
+        :param int logger_id: The id of the logger.
+        :param str output: ``'list'`` for a list of ``{'epoch', 'value'}``
+            dictionaries or ``'numpy'`` for a NumPy structured array.
+        :return: The samples. If nothing has been stored, an empty list
+            or ``None`` for ``'numpy'`` output.
+
+        """
+        path = self.data_path(logger_id)
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return [] if output == 'list' else None
+        if output == 'numpy':
+            return load_binary(path)
+        return read_binary(path)
+
+    def remove(self, logger_id):
+        """Remove the stored samples and progress of a logger."""
+        self._save_state(logger_id, None)
+        if os.path.exists(self.data_path(logger_id)):
+            os.remove(self.data_path(logger_id))
+
+
+class _CheckpointSink(DataSink):
+    """Writes the samples of a logger to its checkpoint file, skipping
+    samples at or before the recorded progress."""
+
+    def __init__(self, checkpoint, logger_id):
+        self._checkpoint = checkpoint
+        self._logger_id = logger_id
+        self._file = BinaryFile(checkpoint.data_path(logger_id),
+                                chunk_size=checkpoint.chunk_size)
+        self._lock = Lock()
+        self._n_since_save = 0
+        self.n_duplicates = 0
+
+        state = checkpoint.state(logger_id)
+        if state is None or state['n_entries'] != len(self._file):
+            state = self._state_from_file()
+        self._last_epoch = state['last_epoch']
+        self._n_last_epoch = state['n_last_epoch']
+        self._n_skip = state['n_last_epoch']
+        if len(self._file):
+            log.info("Resuming download of logger {0} after {1} samples "
+                     "(last epoch: {2}).".format(
+                         logger_id, len(self._file), self._last_epoch))
+
+    def _state_from_file(self):
+        last_epoch, n_last_epoch = None, 0
+        if len(self._file):
+            # Only read the tail of the file, where the last epoch is.
+            itemsize = record_size(self._file.type_id)
+            n_tail = min(len(self._file), self._checkpoint.chunk_size)
+            with open(self._file.path, 'rb') as f:
+                f.seek(BinaryFile.HEADER.size +
+                       (len(self._file) - n_tail) * itemsize)
+                epochs = [r['epoch'] for r in iter_records(
+                    self._file.type_id, f.read(n_tail * itemsize))]
+            last_epoch = epochs[-1]
+            n_last_epoch = epochs.count(last_epoch)
+        return {'n_entries': len(self._file), 'last_epoch': last_epoch,
+                'n_last_epoch': n_last_epoch}
+
+    def _state(self):
+        return {'n_entries': len(self._file), 'last_epoch': self._last_epoch,
+                'n_last_epoch': self._n_last_epoch}
+
+    def handle_data(self, data):
+        epoch = data.contents.epoch
+        with self._lock:
+            if self._last_epoch is not None:
+                if epoch < self._last_epoch:
+                    self.n_duplicates += 1
+                    return
+                if epoch == self._last_epoch and self._n_skip > 0:
+                    self._n_skip -= 1
+                    self.n_duplicates += 1
+                    return
+            self._file.handle_data(data)
+            if epoch == self._last_epoch:
+                self._n_last_epoch += 1
+            else:
+                self._last_epoch = epoch
+                self._n_last_epoch = 1
+                self._n_skip = 0
+            self._n_since_save += 1
+            if self._n_since_save >= self._checkpoint.chunk_size:
+                self._save()
+
+    def _save(self):
+        self._file.flush()
+        self._checkpoint._save_state(self._logger_id, self._state())
+        self._n_since_save = 0
+
+    def flush(self):
+        """Write the received samples and the progress to disk."""
+        with self._lock:
+            self._save()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        if self.n_duplicates:
+            log.info("Skipped {0} already downloaded samples of "
+                     "logger {1}.".format(self.n_duplicates, self._logger_id))
@@ -13,15 +13,27 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import random
 import logging
+from threading import Event, Lock, Timer
+from concurrent.futures import Future
 
 from mbientlab.metawear import MetaWear, libmetawear
 
 from pymetawear import add_stream_logger, modules
+from pymetawear.cache import BoardStateCache
+from pymetawear.checkpoint import LogCheckpoint
+from pymetawear.exceptions import PyMetaWearException, \
+    PyMetaWearConnectionTimeout
+from pymetawear.modules.base import LogDownloadTarget, run_log_download
+from pymetawear.sinks import DataSink
 
 
 log = logging.getLogger(__name__)
 
+#: Maximal seconds between two connection attempts.
+MAX_RETRY_DELAY = 30.0
+
 _model_names = [
     "Unknown",
     "MetaWear R",
@@ -38,6 +50,54 @@ _model_names = [
 ]
 
 
+def _retry_delay(base, attempt):
+    # Exponential backoff with jitter: between half and all of the delay.
+    delay = min(base * 2 ** attempt, MAX_RETRY_DELAY)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class _LazyModule(object):
+    """Client attribute creating a module on first access.
+
+    :param str name: Name of the client attribute.
+    :param str class_name: Name of the module class in
+        :py:mod:`pymetawear.modules`.
+    :param str module_type: Name of the
+        :py:class:`~pymetawear.modules.Modules` constant to look up the
+        module id with, for module classes that take one.
+
+    """
+
+    def __init__(self, name, class_name, module_type=None):
+        self.name = name
+        self.class_name = class_name
+        self.module_type = module_type
+
+    def __get__(self, client, owner=None):
+        if client is None:
+            return self
+        module = client._modules.get(self.name)
+        if module is None and client._modules_available:
+            module = self.create(client.board)
+            module.written_settings.update(
+                client._restored_settings.get(self.name, {}))
+            client._modules[self.name] = module
+        return module
+
+    def __set__(self, client, module):
+        client._modules[self.name] = module
+
+    def create(self, board):
+        module_class = getattr(modules, self.class_name)
+        log.debug("Creating {0} for board {1}.".format(
+            self.class_name, board))
+        if self.module_type is None:
+            return module_class(board)
+        return module_class(
+            board, libmetawear.mbl_mw_metawearboard_lookup_module(
+                board, getattr(modules.Modules, self.module_type)))
+
+
 class MetaWearClient(object):
     """A MetaWear communication client.
 
@@ -54,39 +114,96 @@ class MetaWearClient(object):
         explicit :py:meth:`~MetaWearClient.connect` call. Default is ``True``.
     :param bool debug: If printout of all sent and received
         data should be done.
+    :param state_cache: Directory path or
+        :py:class:`~pymetawear.cache.BoardStateCache` to cache the board
+        state in. With a cached state, the module discovery done when
+        connecting is skipped. The cache is updated if the firmware
+        or model of the board changes. Default is ``None``, i.e. only
+        the ``metawear`` package's own caching is used.
+    :param bool persist_settings: If the module settings written to the
+        board should be stored in the ``state_cache`` on disconnect, and
+        restored on the next connection, so that unchanged settings are
+        not written again. Only use this if the board keeps its
+        configuration between sessions, i.e. is not reset or powered off.
+        Default is ``False``.
+    :param float connect_timeout: Maximal time in seconds a connection
+        attempt may take before it is abandoned with a
+        :py:class:`~pymetawear.exceptions.PyMetaWearConnectionTimeout`.
+        Default is ``None``, i.e. no timeout.
+    :param int connect_retries: Number of times a failed or timed out
+        connection attempt is retried. Default is ``0``.
+    :param float retry_delay: Base delay in seconds before retrying. The
+        delay doubles with each retry, up to :data:`MAX_RETRY_DELAY`, and
+        is randomized by up to half, so that many boards retrying at once
+        are spread out.
 
     """
 
-    def __init__(self, address, device='hci0', connect=True, debug=False):
+    def __init__(self, address, device='hci0', connect=True, debug=False,
+                 state_cache=None, persist_settings=False,
+                 connect_timeout=None, connect_retries=0, retry_delay=1.0):
         """Constructor."""
         self._address = address
         self._debug = debug
         self._connect = connect
+        if state_cache is not None and \
+                not isinstance(state_cache, BoardStateCache):
+            state_cache = BoardStateCache(state_cache)
+        if persist_settings and state_cache is None:
+            raise ValueError("Persisting settings requires a state cache.")
+        self._state_cache = state_cache
+        self._state_restored = False
+        self._persist_settings = persist_settings
+        self._restored_settings = {}
+        # Set by disconnect, to tell intended disconnects from lost links.
+        self._disconnect_requested = False
+        self.connect_timeout = connect_timeout
+        self.connect_retries = connect_retries
+        self.retry_delay = retry_delay
+        # Number of connection attempts started by connect_future.
+        self._connect_attempt = 0
 
         if self._debug:
             add_stream_logger()
             log.info("Creating MetaWearClient for {0}...".format(address))
 
-        self.mw = MetaWear(self._address, hci_mac=device)
+        self._device = device
+        self.mw = self._create_mw(device)
 
         log.debug("Client started for BLE device {0}...".format(self._address))
 
-        self.accelerometer = None
-        #self.gpio = None
-        self.gyroscope = None
-        self.magnetometer = None
-        self.barometer = None
-        self.ambient_light = None
-        self.switch = None
-        self.settings = None
-        self.temperature = None
-        self.haptic = None
-        self.led = None
-        self.sensorfusion = None
+        # Modules are created on first access after connecting.
+        self._modules = {}
+        self._modules_available = False
 
         if connect:
             self.connect()
 
+    def _create_mw(self, device):
+        if self._state_cache is None:
+            return MetaWear(self._address, hci_mac=device)
+        # The cache replaces the deserialization done by MetaWear.
+        return MetaWear(self._address, hci_mac=device, deserialize=False)
+
+    accelerometer = _LazyModule(
+        'accelerometer', 'AccelerometerModule', 'MBL_MW_MODULE_ACCELEROMETER')
+    #gpio = _LazyModule('gpio', 'GpioModule', 'MBL_MW_MODULE_GPIO')
+    gyroscope = _LazyModule(
+        'gyroscope', 'GyroscopeModule', 'MBL_MW_MODULE_GYRO')
+    magnetometer = _LazyModule(
+        'magnetometer', 'MagnetometerModule', 'MBL_MW_MODULE_MAGNETOMETER')
+    barometer = _LazyModule(
+        'barometer', 'BarometerModule', 'MBL_MW_MODULE_BAROMETER')
+    ambient_light = _LazyModule(
+        'ambient_light', 'AmbientLightModule', 'MBL_MW_MODULE_AMBIENT_LIGHT')
+    switch = _LazyModule('switch', 'SwitchModule')
+    settings = _LazyModule('settings', 'SettingsModule')
+    temperature = _LazyModule('temperature', 'TemperatureModule')
+    haptic = _LazyModule('haptic', 'HapticModule')
+    led = _LazyModule('led', 'LEDModule')
+    sensorfusion = _LazyModule(
+        'sensorfusion', 'SensorFusionModule', 'MBL_MW_MODULE_SENSOR_FUSION')
+
     def __enter__(self):
         if not self._connect:
             self.connect()
@@ -122,6 +239,63 @@ class MetaWearClient(object):
     def model(self):
         return self.mw.info['model']
 
+    @property
+    def device(self):
+        """The Bluetooth device used for the connection, e.g. ``'hci0'``."""
+        return self._device
+
+    @property
+    def is_connected(self):
+        """``True`` while connected to the board."""
+        return bool(getattr(self.mw, 'is_connected', False))
+
+    @property
+    def n_notifications(self):
+        """Number of notifications received by the subscriptions of the
+        modules of this client."""
+        return sum(module.n_notifications
+                   for module in self._modules.values())
+
+    def move_to(self, device):
+        """Use another Bluetooth device for the next connection.
+
+        The board state is restored into a new board object, so modules
+        created before are dropped, together with their subscriptions and
+        logger handles. The settings written to them are kept. The old
+        board object is disconnected and freed.
+
+        :param str device: The Bluetooth device, e.g. ``'hci1'``.
+        :raises PyMetaWearException: If the client is connected.
+
+        """
+        if device == self._device:
+            return
+        if self.is_connected:
+            raise PyMetaWearException(
+                "Cannot move {0} to {1} while connected.".format(
+                    self._address, device))
+        log.info("Moving {0} from {1} to {2}.".format(
+            self._address, self._device, device))
+        old = self.mw
+        on_disconnect, old.on_disconnect = old.on_disconnect, None
+        self._restored_settings.update(self.written_settings)
+        old.disconnect()
+        libmetawear.mbl_mw_metawearboard_free(old.board)
+        self.mw = self._create_mw(device)
+        self.mw.on_disconnect = on_disconnect
+        self._device = device
+        self._modules = {}
+        self._modules_available = False
+        self._state_restored = False
+
+    @property
+    def written_settings(self):
+        """The settings last written to each module, keyed on module name.
+        Modules without written settings are left out."""
+        return dict((name, dict(module.written_settings))
+                    for name, module in self._modules.items()
+                    if module.written_settings)
+
     def __str__(self):
         return "MetaWearClient, {0}: {1}".format(
             self._address, self.mw.info)
@@ -129,46 +303,265 @@ class MetaWearClient(object):
     def __repr__(self):
         return "<MetaWearClient, {0}>".format(self._address)
 
-    def connect(self):
-        """Connect this client to the MetaWear device."""
-        self.mw.connect()
-        self._initialize_modules()
+    def connect(self, timeout=None, retries=None):
+        """Connect this client to the MetaWear device.
+
+        With a timeout, an unreachable board costs at most about
+        ``(retries + 1) * timeout`` seconds, plus the delays between the
+        attempts.
+
+        :param float timeout: Maximal time in seconds per connection
+            attempt. Defaults to ``connect_timeout`` of the client.
+        :param int retries: Number of retries of failed attempts. Defaults
+            to ``connect_retries`` of the client.
+        :raises PyMetaWearConnectionTimeout: If the last attempt timed out.
+
+        """
+        if timeout is None:
+            timeout = self.connect_timeout
+        if retries is None:
+            retries = self.connect_retries
+        if timeout is not None or retries:
+            self.connect_future(timeout, retries).result()
+            return
+
+        # As MetaWear.connect, which does not pass serialize on to
+        # connect_async.
+        done = Event()
+        result = []
+
+        def completed(error):
+            result.append(error)
+            done.set()
+
+        self.connect_async(completed)
+        done.wait()
+        if result[0] is not None:
+            raise result[0]
+
+    def connect_async(self, handler):
+        """Connect this client to the MetaWear device without blocking.
+
+        :param callable handler: Function called with ``None`` when the
+            client is connected, or with the exception if connecting
+            failed. It is called on the Bluetooth thread.
+
+        """
+        self._prepare_connect()
+
+        def completed(error):
+            if error is not None:
+                handler(error)
+                return
+            self._connected(handler)
+
+        self.mw.connect_async(completed,
+                              serialize=self._state_cache is None)
+
+    def connect_future(self, timeout=None, retries=None):
+        """Connect this client to the MetaWear device without blocking.
+
+        .. code-block:: python
+
+            futures = [c.connect_future(timeout=10.0, retries=2)
+                       for c in clients]
+            concurrent.futures.wait(futures)
+
+        :param float timeout: Maximal time in seconds per connection
+            attempt. Defaults to ``connect_timeout`` of the client.
+        :param int retries: Number of retries of failed attempts. Defaults
+            to ``connect_retries`` of the client.
+        :return: A future whose result is ``None`` once the client is
+            connected, or that raises the error of the last attempt.
+        :rtype: :py:class:`concurrent.futures.Future`
+
+        """
+        if timeout is None:
+            timeout = self.connect_timeout
+        if retries is None:
+            retries = self.connect_retries
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self._attempt_connect(future, timeout, retries, 0)
+        return future
+
+    def _attempt_connect(self, future, timeout, retries, attempt):
+        self._connect_attempt += 1
+        token = self._connect_attempt
+        lock = Lock()
+        timer = []
+        finished = []
+
+        def finish(error):
+            # Handle the first outcome of the attempt, i.e. its completion
+            # or its timeout. Returns False for the later one.
+            with lock:
+                if finished:
+                    return False
+                finished.append(error)
+            if timer:
+                timer[0].cancel()
+            if error is None:
+                future.set_result(None)
+            elif attempt < retries:
+                delay = _retry_delay(self.retry_delay, attempt)
+                log.warning("Connecting to {0} failed: {1!r}. Retrying in "
+                            "{2:.2f} s.".format(self._address, error, delay))
+                t = Timer(delay, self._attempt_connect,
+                          (future, timeout, retries, attempt + 1))
+                t.daemon = True
+                t.start()
+            else:
+                future.set_exception(error)
+            return True
+
+        def completed(error):
+            if not finish(error) and error is None and \
+                    token == self._connect_attempt:
+                # Connected after the attempt was given up, and no other
+                # attempt has been started since.
+                log.debug("Late connection to {0}, disconnecting.".format(
+                    self._address))
+                self.disconnect()
+
+        def timed_out():
+            if finish(PyMetaWearConnectionTimeout(
+                    "Could not connect to {0} within {1} s.".format(
+                        self._address, timeout))):
+                # Abort the pending connection, if the backend allows it.
+                self._disconnect_requested = True
+                try:
+                    self.mw.disconnect()
+                except Exception as e:
+                    log.debug("Could not abort connection to {0}: "
+                              "{1!r}".format(self._address, e))
+
+        if timeout is not None:
+            timer.append(Timer(timeout, timed_out))
+            timer[0].daemon = True
+            timer[0].start()
+        try:
+            self.connect_async(completed)
+        except Exception as e:
+            finish(e)
+
+    def _prepare_connect(self):
+        self._disconnect_requested = False
+        if self._state_cache is not None and not self._state_restored:
+            # Only restore into a fresh board; on reconnects the board
+            # state in libmetawear is newer than the cached one.
+            self._state_cache.restore(self.mw)
+            self._state_restored = True
+            if self._persist_settings:
+                self._restored_settings = self._state_cache.load_settings(
+                    self._address)
+
+    def _connected(self, handler):
+        # Runs on the Bluetooth thread, so the cached state is checked
+        # without blocking it. handler is called once, with None or the
+        # error raised.
+        finished = []
+
+        def checked(valid):
+            try:
+                if not valid:
+                    self._state_cache.store(self.mw)
+                    # Settings cached for another firmware or model do not
+                    # apply.
+                    self._restored_settings = {}
+                self._initialize_modules()
+            except Exception as e:
+                finished.append(e)
+                handler(e)
+                return
+            finished.append(None)
+            handler(None)
+
+        if self._state_cache is None:
+            checked(True)
+            return
+        try:
+            self._state_cache.is_valid_async(self.mw, checked)
+        except Exception as e:
+            if finished:
+                raise
+            handler(e)
 
     def disconnect(self):
         """Disconnects this client from the MetaWear device."""
+        if self._persist_settings:
+            settings = dict(self._restored_settings)
+            settings.update(self.written_settings)
+            self._state_cache.store_settings(self._address, settings)
+        self._disconnect_requested = True
         self.mw.disconnect()
 
+    def download_logs(self, timeout=3.0, output='list', checkpoint=None,
+                      progress_update_function=None):
+        """Download the logged data of all modules with loggers at once.
+
+        The firmware sends the entries of all loggers in the same download,
+        so this is considerably faster than calling ``download_log`` on
+        each module in turn.
+
+        .. code-block:: python
+
+            c.accelerometer.start_logging()
+            c.gyroscope.start_logging()
+            ...
+            data = c.download_logs(output='numpy')
+            acc, gyro = data['accelerometer'], data['gyroscope']
+
+        :param timeout: Time to wait for download to resume if connection
+            is lost.
+        :param output: Output format of the data, as for
+            :py:meth:`~pymetawear.modules.base.PyMetaWearLoggingModule.download_log`.
+            Give a dictionary keyed on module name to use different
+            outputs, e.g. sinks, for different modules.
+        :param checkpoint: Directory path or
+            :py:class:`~pymetawear.checkpoint.LogCheckpoint` to store
+            downloaded samples and download progress in.
+        :param progress_update_function: Function called with the number of
+            entries left and the total number of entries, to give feedback
+            on download progress. Replaces the default progress bar.
+        :return: The logged data of each module, keyed on module name,
+            e.g. ``'accelerometer'``.
+        :rtype: dict
+
+        """
+        logging_modules = []
+        for name in ('accelerometer', 'gyroscope', 'magnetometer',
+                     'sensorfusion'):
+            # Modules not created yet can not have loggers.
+            module = self._modules.get(name)
+            if module is not None and module.has_logger:
+                logging_modules.append((name, module))
+        if not logging_modules:
+            return {}
+
+        for _, module in logging_modules:
+            if module._logger_running:
+                module.stop_logging()
+
+        if isinstance(output, DataSink) and len(logging_modules) > 1:
+            raise ValueError("Give a dictionary of sinks as output when "
+                             "downloading the logs of several modules.")
+        if checkpoint is not None and \
+                not isinstance(checkpoint, LogCheckpoint):
+            checkpoint = LogCheckpoint(checkpoint)
+        targets = [
+            LogDownloadTarget(
+                module,
+                output.get(name, 'list') if isinstance(output, dict) else output,
+                checkpoint=checkpoint)
+            for name, module in logging_modules]
+        run_log_download(self.board, targets, timeout=timeout,
+                         progress_update_function=progress_update_function)
+        return dict((name, target.finish()) for (name, _), target
+                    in zip(logging_modules, targets))
+
     def _initialize_modules(self):
-        #self.gpio = modules.GpioModule(
-        #    self.board,
-        #    libmetawear.mbl_mw_metawearboard_lookup_module(
-        #        self.board, modules.Modules.MBL_MW_MODULE_GPIO))
-        self.accelerometer = modules.AccelerometerModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_ACCELEROMETER))
-        self.gyroscope = modules.GyroscopeModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_GYRO))
-        self.magnetometer = modules.MagnetometerModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_MAGNETOMETER))
-        self.barometer = modules.BarometerModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_BAROMETER))
-        self.ambient_light = modules.AmbientLightModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_AMBIENT_LIGHT))
-        self.switch = modules.SwitchModule(self.board)
-        self.settings = modules.SettingsModule(self.board)
-        self.temperature = modules.TemperatureModule(self.board)
-        self.haptic = modules.HapticModule(self.board)
-        self.led = modules.LEDModule(self.board)
-        self.sensorfusion = modules.SensorFusionModule(
-            self.board,
-            libmetawear.mbl_mw_metawearboard_lookup_module(
-                self.board, modules.Modules.MBL_MW_MODULE_SENSOR_FUSION))
+        # The modules are created on first access, see _LazyModule. They
+        # are kept on reconnects, since the board state in libmetawear,
+        # e.g. loggers, is kept as well.
+        self._modules_available = True
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Board configuration
+-------------------
+
+Settings of several modules, described as data, validated on the host and
+then written to a board together.
+
+.. code-block:: python
+
+    from pymetawear.config import BoardConfig
+
+    config = BoardConfig(accelerometer={'data_rate': 50.0, 'data_range': 4.0},
+                         sensorfusion={'mode': 'ndof', 'acc_range': 4.0})
+    config.apply(c)
+
+    # Or from a file.
+    config = BoardConfig.load('profile.json')
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import io
+import json
+import logging
+from collections import OrderedDict
+
+from pymetawear.exceptions import PyMetaWearException
+
+log = logging.getLogger(__name__)
+
+#: Configurable modules, in the order they are written to the board.
+#: Sensor fusion comes last, since it configures the accelerometer,
+#: gyroscope and magnetometer itself when it is started.
+MODULES = ('accelerometer', 'gyroscope', 'magnetometer', 'barometer',
+           'ambient_light', 'sensorfusion')
+
+
+def _yaml():
+    try:
+        import yaml
+    except ImportError:
+        raise PyMetaWearException(
+            "PyYAML is required for this functionality: pip install pyyaml")
+    return yaml
+
+
+class BoardConfig(object):
+    """Settings for the modules of a board.
+
+    Each keyword argument is the name of a module, as a
+    :py:class:`~pymetawear.client.MetaWearClient` attribute, with a
+    dictionary of arguments to its ``set_settings`` method.
+
+    :py:meth:`apply` validates all settings before writing anything, and
+    then makes at most one ``set_settings`` call, i.e. one configuration
+    write, per module. Settings that equal what was last written to the
+    board are left out, so applying the same configuration twice only
+    writes to the board once.
+
+    :raises ValueError: If a module is not configurable.
+
+    """
+
+    def __init__(self, **modules):
+        unknown = sorted(set(modules) - set(MODULES))
+        if unknown:
+            raise ValueError("Modules {0} can not be configured; use any "
+                             "of {1}.".format(unknown, list(MODULES)))
+        self.modules = OrderedDict(
+            (name, dict(modules[name])) for name in MODULES
+            if modules.get(name))
+
+    def __repr__(self):
+        return "<BoardConfig {0}>".format(dict(self.modules))
+
+    def __eq__(self, other):
+        return isinstance(other, BoardConfig) and \
+            self.modules == other.modules
+
+    def __ne__(self, other):
+        return not self == other
+
+    @classmethod
+    def from_dict(cls, settings):
+        """Create a configuration from a dictionary of module settings."""
+        return cls(**dict((str(k), v) for k, v in settings.items()))
+
+    @classmethod
+    def from_json(cls, text):
+        """Create a configuration from a JSON document."""
+        return cls.from_dict(json.loads(text))
+
+    @classmethod
+    def from_yaml(cls, text):
+        """Create a configuration from a YAML document. Requires PyYAML."""
+        return cls.from_dict(_yaml().safe_load(text) or {})
+
+    @classmethod
+    def load(cls, path):
+        """Load a configuration from a JSON file, or a YAML file if the
+        file name ends with ``.yaml`` or ``.yml``."""
+        with io.open(path, encoding='utf-8') as f:
+            text = f.read()
+        if path.lower().endswith(('.yaml', '.yml')):
+            return cls.from_yaml(text)
+        return cls.from_json(text)
+
+    def to_dict(self):
+        """The module settings as a dictionary."""
+        return dict((name, dict(settings))
+                    for name, settings in self.modules.items())
+
+    def to_json(self, **kwargs):
+        """The configuration as a JSON document.
+
+        :param kwargs: Keyword arguments to :py:func:`json.dumps`.
+
+        """
+        kwargs.setdefault('sort_keys', True)
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def validate(self, client):
+        """Check the settings against a connected board, without writing
+        anything to it.
+
+        :param client: A connected
+            :py:class:`~pymetawear.client.MetaWearClient`.
+        :return: The settings of each module, converted to the values
+            written to the board.
+        :rtype: :py:class:`collections.OrderedDict`
+        :raises ValueError: Listing every invalid setting, and every
+            module the board does not have.
+
+        """
+        parsed = OrderedDict()
+        errors = []
+        for name, settings in self.modules.items():
+            module = getattr(client, name)
+            if module is None:
+                raise PyMetaWearException(
+                    "The board must be connected to validate settings.")
+            if not module.is_present:
+                errors.append("{0}: not present on the board".format(name))
+                continue
+            try:
+                parsed[name] = module.parse_settings(**settings)
+            except (ValueError, TypeError) as e:
+                errors.append("{0}: {1}".format(name, e))
+        if errors:
+            raise ValueError("Invalid configuration for {0}:\n  {1}".format(
+                client._address, '\n  '.join(errors)))
+        return parsed
+
+    def apply(self, client):
+        """Validate the settings and write the changed ones to a board.
+
+        :param client: A connected
+            :py:class:`~pymetawear.client.MetaWearClient`.
+        :return: The settings written to each module. Modules without
+            changes are left out.
+        :rtype: :py:class:`collections.OrderedDict`
+        :raises ValueError: If any setting is invalid, in which case
+            nothing is written to the board.
+
+        """
+        written = OrderedDict()
+        for name, values in self.validate(client).items():
+            module = getattr(client, name)
+            changed = dict(
+                (key, self.modules[name][key]) for key, value in values.items()
+                if module.written_settings.get(key) != value)
+            if not changed:
+                log.debug("{0} settings of {1} unchanged.".format(
+                    module.module_name, client._address))
+                continue
+            log.debug("Writing {0} settings {1} to {2}.".format(
+                module.module_name, changed, client._address))
+            module.set_settings(**changed)
+            written[name] = changed
+        return written
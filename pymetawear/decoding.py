@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sample decoding
+---------------
+
+Decoding of the ``Data`` payloads that ``libmetawear`` delivers to
+subscribers and log download handlers.
+
+Instead of casting the value pointer to a ``ctypes`` structure and deep
+copying it, the payload bytes are read once and unpacked with precompiled
+:py:class:`struct.Struct` objects keyed on ``DataTypeId``. Structured values
+are returned as named tuples carrying the same field names as the
+corresponding ``mbientlab.metawear.cbindings`` structures, so e.g.
+``value.x`` works as before.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import struct
+from collections import namedtuple
+from ctypes import c_byte, c_ubyte, c_short, c_ushort, c_int, c_uint, \
+    c_float, c_longlong, sizeof, string_at, memmove, cast, POINTER
+
+from mbientlab.metawear.cbindings import DataTypeId, CartesianFloat, \
+    BatteryState, Tcs34725ColorAdc, EulerAngles, CalibrationState, \
+    Quaternion, CorrectedCartesianFloat
+
+_CTYPE_FORMATS = {
+    c_byte: 'b',
+    c_ubyte: 'B',
+    c_short: 'h',
+    c_ushort: 'H',
+    c_int: 'i',
+    c_uint: 'I',
+    c_float: 'f',
+    c_longlong: 'q',
+}
+
+#: The ``ctypes`` type of the value for each supported ``DataTypeId``.
+VALUE_TYPES = {
+    DataTypeId.UINT32: c_uint,
+    DataTypeId.INT32: c_int,
+    DataTypeId.FLOAT: c_float,
+    DataTypeId.CARTESIAN_FLOAT: CartesianFloat,
+    DataTypeId.BATTERY_STATE: BatteryState,
+    DataTypeId.TCS34725_ADC: Tcs34725ColorAdc,
+    DataTypeId.EULER_ANGLE: EulerAngles,
+    DataTypeId.QUATERNION: Quaternion,
+    DataTypeId.CORRECTED_CARTESIAN_FLOAT: CorrectedCartesianFloat,
+    DataTypeId.CALIBRATION_STATE: CalibrationState,
+}
+
+_VALUE_SIZES = dict((k, sizeof(v)) for k, v in VALUE_TYPES.items())
+
+#: Size in bytes of the epoch column in decoded records.
+EPOCH_SIZE = sizeof(c_longlong)
+
+_EPOCH_STRUCT = struct.Struct('@q')
+
+
+def _struct_format(ctype):
+    if ctype in _CTYPE_FORMATS:
+        return '@' + _CTYPE_FORMATS[ctype]
+    return '@' + ''.join(_CTYPE_FORMATS[t] for _, t in ctype._fields_)
+
+
+def _scalar_decoder(ctype):
+    unpack = struct.Struct(_struct_format(ctype)).unpack
+    size = sizeof(ctype)
+
+    def decode(data):
+        return unpack(string_at(data.value, size))[0]
+
+    return decode
+
+
+def _struct_decoder(ctype, value_tuple):
+    unpack = struct.Struct(_struct_format(ctype)).unpack
+    size = struct.calcsize(_struct_format(ctype))
+    make = value_tuple._make
+
+    def decode(data):
+        return make(unpack(string_at(data.value, size)))
+
+    return decode
+
+
+def _byte_array_decoder(data):
+    return list(bytearray(string_at(data.value, data.length)))
+
+
+#: Named tuple types used for structured values, keyed on ``DataTypeId``.
+VALUE_TUPLES = {}
+
+_DECODERS = {
+    DataTypeId.BYTE_ARRAY: _byte_array_decoder,
+}
+
+for _type_id, _ctype in VALUE_TYPES.items():
+    if _ctype in _CTYPE_FORMATS:
+        _DECODERS[_type_id] = _scalar_decoder(_ctype)
+    else:
+        VALUE_TUPLES[_type_id] = namedtuple(
+            _ctype.__name__, [name for name, _ in _ctype._fields_])
+        _DECODERS[_type_id] = _struct_decoder(
+            _ctype, VALUE_TUPLES[_type_id])
+
+
+def _unknown_type(data):
+    raise RuntimeError('Unrecognized data type id: ' + str(data.type_id))
+
+
+def decode_value(data):
+    """Decode the value of a ``libmetawear`` data point.
+
+    :param data: Pointer to a ``mbientlab.metawear.cbindings.Data`` struct.
+    :return: A plain Python value: an int or float for scalar types,
+        a list of ints for byte arrays and a named tuple for structures.
+
+    """
+    contents = data.contents
+    return _DECODERS.get(contents.type_id, _unknown_type)(contents)
+
+
+def decode(data):
+    """Decode a ``libmetawear`` data point into the PyMetaWear sample format.
+
+    :param data: Pointer to a ``mbientlab.metawear.cbindings.Data`` struct.
+    :return: Dictionary with ``epoch`` and ``value`` keys.
+    :rtype: dict
+
+    """
+    contents = data.contents
+    return {
+        'epoch': contents.epoch,
+        'value': _DECODERS.get(contents.type_id, _unknown_type)(contents),
+    }
+
+
+def decode_counter(data):
+    """Get the counter or tick an accounter data processor added to a
+    data point.
+
+    :param data: Pointer to a ``mbientlab.metawear.cbindings.Data`` struct
+        from an accounter processor.
+    :return: The sample count or board clock tick.
+    :rtype: int
+
+    """
+    return cast(data.contents.extra, POINTER(c_uint)).contents.value
+
+
+def record_size(type_id):
+    """Size in bytes of a decoded record, i.e. an ``int64`` epoch followed
+    by the raw value, padded to 8 byte alignment.
+
+    :param int type_id: The ``DataTypeId`` of the records.
+    :return: The record size in bytes.
+    :rtype: int
+
+    """
+    if type_id not in VALUE_TYPES:
+        raise ValueError(
+            "Data type {0} has no fixed size record layout.".format(type_id))
+    size = EPOCH_SIZE + _VALUE_SIZES[type_id]
+    return size + (-size % 8)
+
+
+def decode_into(data, address):
+    """Copy the epoch and the raw value of a data point to a preallocated
+    buffer, without creating any intermediate Python objects.
+
+    The record is written in the layout described by :func:`record_size`,
+    which is the layout of the NumPy dtypes used by :mod:`pymetawear.sinks`.
+    The caller is responsible for the buffer being large enough and for
+    the data point being of the expected type.
+
+    :param data: Pointer to a ``mbientlab.metawear.cbindings.Data`` struct.
+    :param int address: Memory address to write the record to.
+    :return: The ``DataTypeId`` of the data point.
+    :rtype: int
+
+    """
+    contents = data.contents
+    c_longlong.from_address(address).value = contents.epoch
+    memmove(address + EPOCH_SIZE, contents.value,
+            _VALUE_SIZES[contents.type_id])
+    return contents.type_id
+
+
+def iter_records(type_id, buffer):
+    """Decode records written by :func:`decode_into` back into samples.
+
+    :param int type_id: The ``DataTypeId`` of the records.
+    :param buffer: Bytes holding consecutive records. Any incomplete
+        record at the end is ignored.
+    :return: Iterator over samples in the format of :func:`decode`.
+
+    """
+    size = record_size(type_id)
+    unpack_from = struct.Struct(
+        _struct_format(VALUE_TYPES[type_id])).unpack_from
+    unpack_epoch = _EPOCH_STRUCT.unpack_from
+    value_tuple = VALUE_TUPLES.get(type_id)
+    for offset in range(0, len(buffer) - size + 1, size):
+        value = unpack_from(buffer, offset + EPOCH_SIZE)
+        yield {
+            'epoch': unpack_epoch(buffer, offset)[0],
+            'value': value_tuple._make(value) if value_tuple else value[0],
+        }
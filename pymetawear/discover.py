@@ -16,6 +16,17 @@ import signal
 import subprocess
 import platform
 import time
+import threading
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
 
 from pymetawear.exceptions import PyMetaWearException
 from mbientlab.warble import BleScanner
@@ -26,6 +37,16 @@ except NameError:
     input_fcn = input
 
 
+#: Name given to devices that have not sent their name (yet).
+UNKNOWN_NAME = '(unknown)'
+
+# Time in seconds between checks if a scan without timeout is stopped.
+_POLL_INTERVAL = 0.1
+
+# Marks the end of the hcitool output.
+_EOF = object()
+
+
 def discover_devices(timeout=5):
     """Run a BLE scan to discover nearby devices.
 
@@ -40,6 +61,191 @@ def discover_devices(timeout=5):
         return discover_devices_hcitool(timeout)
 
 
+def iter_devices(timeout=5.0, addresses=None, name=None, count=None,
+                 method=None):
+    """Scan for BLE devices, yielding them as they are found.
+
+    The scan stops when ``timeout`` has passed, when all ``addresses``
+    have been found, when ``count`` devices have been yielded, or when the
+    loop over the devices is left.
+
+    .. code-block:: python
+
+        from pymetawear.discover import iter_devices
+
+        for address, name in iter_devices(name='MetaWear', count=2):
+            print(address, name)
+
+    A device is yielded again if its name is received after its address,
+    unless ``name`` is given, in which case it is only yielded once its
+    name matches.
+
+    :param float timeout: Maximal duration of scanning.
+    :param addresses: If given, only these addresses are yielded, and the
+        scan stops when all of them have been found.
+    :param name: If given, only devices with this name are yielded. A
+        function taking the name and returning ``True`` for wanted devices
+        can be given instead.
+    :param int count: Number of devices to yield before stopping.
+    :param str method: ``'hcitool'`` or ``'warble'``. Defaults to
+        ``'warble'`` on Windows and ``'hcitool'`` otherwise.
+    :return: Generator of tuples with `(address, name)`.
+
+    """
+    if method is None:
+        method = 'warble' if platform.uname()[0] == 'Windows' else 'hcitool'
+    if method not in _scanners:
+        raise ValueError("Unknown scan method: {0}".format(method))
+    if addresses is not None:
+        remaining = set(a.upper() for a in addresses)
+        if not remaining:
+            return
+    if name is not None and not callable(name):
+        wanted_name = name
+
+        def name(device_name):
+            return device_name == wanted_name
+
+    seen = {}
+    n_yielded = 0
+    for address, device_name, _ in _scanners[method](timeout):
+        address = address.upper()
+        known_name = seen.get(address)
+        if known_name is not None and (
+                device_name == UNKNOWN_NAME or device_name == known_name):
+            continue
+        if addresses is not None and address not in remaining:
+            continue
+        if name is not None and not name(device_name):
+            continue
+        seen[address] = device_name
+        yield address, device_name
+        if addresses is not None:
+            remaining.discard(address)
+            if not remaining:
+                return
+        n_yielded += 1
+        if count is not None and n_yielded >= count:
+            return
+
+
+def find_devices(addresses, timeout=5.0, method=None):
+    """Scan until the given devices are found, or the timeout has passed.
+
+    Use this to check that known boards are in range before connecting,
+    without waiting for a full scan.
+
+    :param addresses: The addresses to look for.
+    :param float timeout: Maximal duration of scanning.
+    :param str method: See :func:`iter_devices`.
+    :return: Dictionary with the name of each found address.
+    :rtype: dict
+
+    """
+    return dict(iter_devices(timeout, addresses=addresses, method=method))
+
+
+def _collect(events):
+    # Device names keyed on address, preferring known names.
+    devices = {}
+    for address, name, _ in events:
+        if devices.get(address, UNKNOWN_NAME) == UNKNOWN_NAME:
+            devices[address] = name
+    return list(devices.items())
+
+
+def _next(items, deadline, stopped=None):
+    # Get the next item of a queue, or None when the deadline has passed
+    # or the stopped event is set. A deadline of None means no deadline.
+    while stopped is None or not stopped.is_set():
+        wait = None if deadline is None else deadline - time.time()
+        if wait is not None and wait <= 0:
+            return None
+        if stopped is not None:
+            wait = _POLL_INTERVAL if wait is None else \
+                min(wait, _POLL_INTERVAL)
+        try:
+            return items.get(timeout=wait)
+        except Empty:
+            if stopped is None:
+                return None
+    return None
+
+
+def _scan_hcitool(timeout, device=None, stopped=None):
+    # Yield (address, name, rssi) for each line hcitool prints, until the
+    # timeout has passed or the stopped event is set. hcitool does not
+    # report the RSSI, so it is None. Its output is block buffered when
+    # piped, so stdbuf is used to get lines as they are printed, when it
+    # is available.
+    command = ['hcitool']
+    if device is not None:
+        command += ['-i', device]
+    command.append('lescan')
+    if which('stdbuf'):
+        command = ['stdbuf', '-oL'] + command
+    p = subprocess.Popen(command, stdout=subprocess.PIPE,
+                         stderr=subprocess.PIPE)
+    lines = Queue()
+
+    def read():
+        for line in iter(p.stdout.readline, b''):
+            lines.put(line)
+        lines.put(_EOF)
+
+    reader = threading.Thread(target=read, name="hcitool reader")
+    reader.daemon = True
+    reader.start()
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        while True:
+            line = _next(lines, deadline, stopped)
+            if line is None:
+                return
+            if line is _EOF:
+                break
+            parts = line.decode('utf8').strip().split(' ', 1)
+            if len(parts) == 2 and parts[0].count(':') == 5:
+                yield parts[0], parts[1], None
+    finally:
+        if p.poll() is None:
+            os.kill(p.pid, signal.SIGINT)
+        p.wait()
+    # hcitool quit before the scan was over.
+    err = p.stderr.read()
+    if err == b'Set scan parameters failed: Operation not permitted\n':
+        raise PyMetaWearException("Missing capabilites for hcitool!")
+    if err == b'Set scan parameters failed: Input/output error\n':
+        raise PyMetaWearException("Could not perform scan.")
+
+
+def _scan_warble(timeout, device=None, stopped=None):
+    # Yield (address, name, rssi) for each advertisement PyWarble reports,
+    # until the timeout has passed or the stopped event is set.
+    results = Queue()
+    BleScanner.set_handler(lambda result: results.put(
+        (result.mac, result.name or UNKNOWN_NAME, result.rssi)))
+    if device is None:
+        BleScanner.start()
+    else:
+        BleScanner.start(hci=device)
+    deadline = None if timeout is None else time.time() + timeout
+    try:
+        while True:
+            result = _next(results, deadline, stopped)
+            if result is None:
+                return
+            yield result
+    finally:
+        BleScanner.stop()
+
+
+_scanners = {
+    'hcitool': _scan_hcitool,
+    'warble': _scan_warble,
+}
+
+
 def discover_devices_hcitool(timeout=5):
     """Discover Bluetooth Low Energy Devices nearby on Linux
 
@@ -68,27 +274,7 @@ def discover_devices_hcitool(timeout=5):
     :rtype: list
 
     """
-    p = subprocess.Popen(["hcitool", "lescan"], stdout=subprocess.PIPE,
-                         stderr=subprocess.PIPE)
-    time.sleep(timeout)
-    os.kill(p.pid, signal.SIGINT)
-    out, err = p.communicate()
-    if len(out) == 0 and len(err) > 0:
-        if err == b'Set scan parameters failed: Operation not permitted\n':
-            raise PyMetaWearException("Missing capabilites for hcitool!")
-        if err == b'Set scan parameters failed: Input/output error\n':
-            raise PyMetaWearException("Could not perform scan.")
-    ble_devices = list(set([tuple(x.split(' ')) for x in
-                            filter(None, out.decode('utf8').split('\n')[1:])]))
-    filtered_devices = {}
-    for d in ble_devices:
-        if d[0] not in filtered_devices:
-            filtered_devices[d[0]] = d[1]
-        else:
-            if filtered_devices.get(d[0]) == '(unknown)':
-                filtered_devices[d[0]] = d[1]
-
-    return [(k, v) for k, v in filtered_devices.items()]
+    return _collect(_scan_hcitool(timeout))
 
 
 def discover_devices_warble(timeout=5.0):
@@ -101,18 +287,7 @@ def discover_devices_warble(timeout=5.0):
     :rtype: list
 
     """
-    devices = {}
-
-    def handler(result):
-        devices[result.mac] = result.name
-
-    BleScanner.set_handler(handler)
-    BleScanner.start()
-
-    time.sleep(timeout)
-    BleScanner.stop()
-
-    return list(devices.items())
+    return _collect(_scan_warble(timeout))
 
 
 def select_device(timeout=3):
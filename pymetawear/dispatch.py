@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Callback dispatch
+-----------------
+
+Running notification callbacks on worker threads instead of the
+``libmetawear`` callback thread, so that slow callbacks do not hold up
+the reception of data from the board.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import logging
+from collections import deque
+from threading import Lock, Condition, Thread
+
+from pymetawear.decoding import decode
+from pymetawear.sinks import DataSink
+
+log = logging.getLogger(__name__)
+
+
+class Dispatcher(object):
+    """Pool of worker threads running notification callbacks.
+
+    Callbacks wrapped with :meth:`wrap` are given to ``notifications``
+    like any other callback. The ``libmetawear`` callback thread then
+    only decodes the sample and puts it in a queue, from which the
+    workers call the callback.
+
+    .. code-block:: python
+
+        from pymetawear.dispatch import Dispatcher
+
+        dispatcher = Dispatcher(max_workers=4)
+        c.accelerometer.notifications(dispatcher.wrap(store_in_database))
+        c.gyroscope.notifications(dispatcher.wrap(store_in_database))
+        ...
+        print(dispatcher.queue_depth, dispatcher.max_latency)
+
+    Ordering guarantees:
+
+    * With ``ordered=True`` (default), each wrapped callback receives its
+      samples in the order they arrived from the board, and is never
+      called from more than one worker at a time. Different wrapped
+      callbacks, e.g. for different signals, run in parallel.
+      ``ordered=True`` with ``max_workers=1`` gives a single worker
+      delivering all samples in arrival order.
+    * With ``ordered=False``, samples are handed to any idle worker, so a
+      callback may run concurrently with itself and samples may be
+      delivered out of order. This makes the most use of the workers for
+      callbacks that do not depend on ordering.
+
+    :param int max_workers: Number of worker threads.
+    :param bool ordered: If the samples of each wrapped callback should
+        be delivered in order, one at a time.
+
+    """
+
+    #: Maximal number of samples of one callback delivered before
+    #: letting the worker move on to other callbacks, in ordered mode.
+    BATCH_SIZE = 64
+
+    def __init__(self, max_workers=4, ordered=True):
+        if max_workers < 1:
+            raise ValueError("Number of workers must be a positive integer.")
+        self.max_workers = int(max_workers)
+        self.ordered = ordered
+
+        self._lock = Lock()
+        self._work = Condition(self._lock)
+        self._idle = Condition(self._lock)
+        # Wrapped callbacks with queued samples when ordered, otherwise
+        # the queued (callback, sample, time) tuples.
+        self._ready = deque()
+        self._closed = False
+        self._n_queued = 0
+        self.reset_metrics()
+
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = Thread(target=self._run,
+                            name="PyMetaWear dispatcher {0}".format(i))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def __repr__(self):
+        return "<Dispatcher {0} workers, {1} queued>".format(
+            self.max_workers, self.queue_depth)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def wrap(self, callback):
+        """Wrap a callback to be run by the dispatcher.
+
+        :param callable callback: Function called with each sample
+            dictionary.
+        :return: Sink to give to ``notifications`` instead of the callback.
+        :rtype: :py:class:`DispatchedCallback`
+
+        """
+        return DispatchedCallback(self, callback)
+
+    @property
+    def queue_depth(self):
+        """Number of samples received but not yet delivered."""
+        return self._n_queued
+
+    @property
+    def max_queue_depth(self):
+        """Largest queue depth since the metrics were reset."""
+        return self._max_queued
+
+    @property
+    def n_delivered(self):
+        """Number of samples delivered since the metrics were reset."""
+        return self._n_delivered
+
+    @property
+    def n_errors(self):
+        """Number of callbacks that raised an exception."""
+        return self._n_errors
+
+    @property
+    def mean_latency(self):
+        """Mean time in seconds from reception to delivery of a sample."""
+        if not self._n_delivered:
+            return 0.0
+        return self._total_latency / self._n_delivered
+
+    @property
+    def max_latency(self):
+        """Longest time in seconds from reception to delivery of a sample."""
+        return self._max_latency
+
+    def reset_metrics(self):
+        """Reset the delivery and latency metrics."""
+        with self._lock:
+            self._max_queued = self._n_queued
+            self._n_delivered = 0
+            self._n_errors = 0
+            self._total_latency = 0.0
+            self._max_latency = 0.0
+
+    def _submit(self, target, sample):
+        received = time.time()
+        with self._lock:
+            if self._closed:
+                target.n_dropped += 1
+                return
+            self._n_queued += 1
+            self._max_queued = max(self._max_queued, self._n_queued)
+            target._n_pending += 1
+            if self.ordered:
+                target._queue.append((sample, received))
+                if target._scheduled:
+                    return
+                target._scheduled = True
+                self._ready.append(target)
+            else:
+                self._ready.append((target, sample, received))
+            self._work.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._ready and not self._closed:
+                    self._work.wait()
+                if not self._ready:
+                    return
+                if self.ordered:
+                    target = self._ready.popleft()
+                    n = min(len(target._queue), self.BATCH_SIZE)
+                    batch = [target._queue.popleft() for _ in range(n)]
+                else:
+                    target, sample, received = self._ready.popleft()
+                    batch = [(sample, received)]
+
+            total_latency, max_latency, n_errors = 0.0, 0.0, 0
+            for sample, received in batch:
+                latency = time.time() - received
+                total_latency += latency
+                max_latency = max(max_latency, latency)
+                try:
+                    target.callback(sample)
+                except Exception as e:
+                    n_errors += 1
+                    log.error("Dispatched callback {0} failed: {1!r}".format(
+                        target.callback, e))
+
+            with self._lock:
+                self._n_queued -= len(batch)
+                self._n_delivered += len(batch)
+                self._n_errors += n_errors
+                self._total_latency += total_latency
+                self._max_latency = max(self._max_latency, max_latency)
+                target._n_pending -= len(batch)
+                if self.ordered:
+                    if target._queue:
+                        self._ready.append(target)
+                        self._work.notify()
+                    else:
+                        target._scheduled = False
+                self._idle.notify_all()
+
+    def _wait(self, done, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            while not done():
+                if deadline is None:
+                    self._idle.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._idle.wait(remaining)
+        return True
+
+    def join(self, timeout=None):
+        """Wait until all queued samples have been delivered.
+
+        :param float timeout: Maximal time in seconds to wait.
+        :return: ``True`` if the queue was emptied.
+        :rtype: bool
+
+        """
+        return self._wait(lambda: self._n_queued == 0, timeout)
+
+    def close(self, wait=True):
+        """Stop the workers, after delivering the queued samples.
+
+        :param bool wait: If the call should wait for the workers to finish.
+
+        """
+        with self._lock:
+            self._closed = True
+            self._work.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+class DispatchedCallback(DataSink):
+    """A callback run by a :py:class:`Dispatcher`.
+
+    Created by :py:meth:`Dispatcher.wrap`.
+
+    """
+
+    def __init__(self, dispatcher, callback):
+        self.dispatcher = dispatcher
+        self.callback = callback
+        #: Number of samples received after the dispatcher was closed.
+        self.n_dropped = 0
+        self._queue = deque()
+        self._scheduled = False
+        self._n_pending = 0
+
+    def __repr__(self):
+        return "<DispatchedCallback {0}, {1} queued>".format(
+            getattr(self.callback, '__name__', self.callback),
+            self._n_pending)
+
+    @property
+    def queue_depth(self):
+        """Number of samples of this callback not yet delivered."""
+        return self._n_pending
+
+    def handle_data(self, data):
+        self.dispatcher._submit(self, decode(data))
+
+    def flush(self, timeout=None):
+        """Wait until the queued samples of this callback are delivered."""
+        return self.dispatcher._wait(lambda: self._n_pending == 0, timeout)
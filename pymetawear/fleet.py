@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Fleet of MetaWear boards
+------------------------
+
+Running the same operation on many boards in parallel, using a bounded
+pool of worker threads. Every operation returns a
+:py:class:`FleetResults` reporting the outcome on each board, so that
+one failing board does not stop the others.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import logging
+import functools
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from pymetawear.client import MetaWearClient
+from pymetawear.config import BoardConfig
+from pymetawear.exceptions import PyMetaWearException
+from pymetawear.sinks import DataSink
+
+log = logging.getLogger(__name__)
+
+
+class BoardResult(namedtuple('BoardResult',
+                             ['address', 'value', 'error', 'duration'])):
+    """Outcome of an operation on one board.
+
+    :param str address: MAC address of the board.
+    :param value: Return value of the operation, if it succeeded.
+    :param error: The exception raised by the operation, if it failed.
+    :param float duration: Time in seconds the operation took.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """``True`` if the operation succeeded."""
+        return self.error is None
+
+
+class FleetResults(OrderedDict):
+    """The :py:class:`BoardResult` of each board, keyed on MAC address."""
+
+    @property
+    def succeeded(self):
+        """Addresses of the boards the operation succeeded on."""
+        return [address for address, r in self.items() if r.ok]
+
+    @property
+    def failed(self):
+        """Addresses of the boards the operation failed on."""
+        return [address for address, r in self.items() if not r.ok]
+
+    def raise_on_error(self):
+        """Raise a :py:class:`~pymetawear.exceptions.PyMetaWearException`
+        if the operation failed on any board."""
+        if self.failed:
+            raise PyMetaWearException(
+                "Operation failed on {0} of {1} boards: {2}".format(
+                    len(self.failed), len(self), ', '.join(
+                        "{0} ({1!r})".format(a, self[a].error)
+                        for a in self.failed)))
+        return self
+
+
+class MetaWearFleet(object):
+    """A set of MetaWear boards operated on in parallel.
+
+    .. code-block:: python
+
+        from pymetawear.fleet import MetaWearFleet
+
+        def acc_callback(address, data):
+            print(address, data)
+
+        with MetaWearFleet(['D1:75:74:0B:59:1F', 'F1:D9:71:7E:34:7A']) as fleet:
+            print(fleet.connect().failed)
+            fleet.configure('accelerometer', data_rate=50.0, data_range=4.0)
+            fleet.apply_config('profile.json')
+            fleet.notifications('accelerometer', acc_callback)
+            time.sleep(10.0)
+            fleet.notifications('accelerometer', None)
+
+    :param list addresses: Bluetooth MAC addresses of the boards.
+    :param str device: Bluetooth device to use, see
+        :py:class:`~pymetawear.client.MetaWearClient`.
+    :param int max_workers: Maximal number of boards operated on at
+        the same time.
+    :param bool connect: If the boards should be connected at once.
+    :param pool: An :py:class:`~pymetawear.adapters.AdapterPool` to spread
+        the boards over several Bluetooth devices with, instead of using
+        ``device`` for all of them.
+    :param client_kwargs: Further keyword arguments to
+        :py:class:`~pymetawear.client.MetaWearClient`.
+
+    """
+
+    def __init__(self, addresses, device='hci0', max_workers=8,
+                 connect=False, pool=None, **client_kwargs):
+        client_kwargs.setdefault('connect', False)
+        self.pool = pool
+        if pool is None:
+            self.clients = OrderedDict(
+                (address, MetaWearClient(address, device=device,
+                                         **client_kwargs))
+                for address in addresses)
+        else:
+            self.clients = OrderedDict(
+                (address, pool.client(address, **client_kwargs))
+                for address in addresses)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        if connect:
+            self.connect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        return iter(self.clients.values())
+
+    def __getitem__(self, address):
+        return self.clients[address]
+
+    def __repr__(self):
+        return "<MetaWearFleet, {0} boards>".format(len(self))
+
+    def _run_one(self, address, func, args, kwargs):
+        t = time.time()
+        try:
+            value = func(self.clients[address], *args, **kwargs)
+        except Exception as e:
+            log.warning("{0} failed on {1}: {2!r}".format(
+                getattr(func, '__name__', func), address, e))
+            return BoardResult(address, None, e, time.time() - t)
+        return BoardResult(address, value, None, time.time() - t)
+
+    def run(self, func, *args, **kwargs):
+        """Call a function with each client of the fleet, in parallel.
+
+        .. code-block:: python
+
+            results = fleet.run(lambda c: c.settings.battery_state())
+
+        :param callable func: Function taking a
+            :py:class:`~pymetawear.client.MetaWearClient` as first argument.
+        :param args: Further positional arguments to ``func``.
+        :param kwargs: Further keyword arguments to ``func``. The keyword
+            ``addresses`` can be used to only run on some of the boards.
+        :return: The results of each board.
+        :rtype: :py:class:`FleetResults`
+
+        """
+        addresses = kwargs.pop('addresses', None)
+        if addresses is None:
+            addresses = list(self.clients.keys())
+        futures = [self._executor.submit(
+            self._run_one, address, func, args, kwargs)
+            for address in addresses]
+        return FleetResults((f.result().address, f.result())
+                            for f in futures)
+
+    def connect(self, scanner=None, **kwargs):
+        """Connect all boards.
+
+        :param scanner: A running
+            :py:class:`~pymetawear.scanner.BackgroundScanner`. If given,
+            only the boards it has seen are connected; the others fail
+            at once, without attempting a connection.
+        :param kwargs: Keyword arguments to
+            :py:meth:`~pymetawear.client.MetaWearClient.connect`, e.g.
+            ``timeout``. With an adapter pool, the boards are connected
+            through :py:meth:`~pymetawear.adapters.AdapterPool.connect`.
+
+        """
+        connect = MetaWearClient.connect if self.pool is None \
+            else self.pool.connect
+        if scanner is None:
+            return self.run(connect, **kwargs)
+        in_range = [a for a in self.clients if a in scanner]
+        results = self.run(connect, addresses=in_range, **kwargs)
+        for address in self.clients:
+            if address not in results:
+                results[address] = BoardResult(
+                    address, None, PyMetaWearException(
+                        "{0} has not been seen by the scanner.".format(
+                            address)), 0.0)
+        return FleetResults((a, results[a]) for a in self.clients)
+
+    def disconnect(self, **kwargs):
+        """Disconnect all boards."""
+        return self.run(MetaWearClient.disconnect, **kwargs)
+
+    def configure(self, module, **settings):
+        """Call ``set_settings`` of a module on all boards.
+
+        :param str module: Name of the module, e.g. ``'accelerometer'``.
+        :param settings: Keyword arguments to ``set_settings``.
+
+        """
+        return self.run(_call_module, module, 'set_settings', **settings)
+
+    def apply_config(self, config):
+        """Apply a configuration to all boards.
+
+        Each board is validated before anything is written to it, and
+        only settings that differ from those last written are sent.
+
+        :param config: A :py:class:`~pymetawear.config.BoardConfig`, a
+            dictionary of module settings or the path of a JSON or YAML
+            file with them.
+
+        """
+        if isinstance(config, dict):
+            config = BoardConfig.from_dict(config)
+        elif not isinstance(config, BoardConfig):
+            config = BoardConfig.load(config)
+        return self.run(config.apply)
+
+    def notifications(self, module, callback, **kwargs):
+        """Subscribe or unsubscribe to notifications of a module on all
+        boards.
+
+        :param str module: Name of the module, e.g. ``'accelerometer'``.
+        :param callable callback: Function called with the address of the
+            board and the data, or ``None`` to unsubscribe. A
+            :py:class:`~pymetawear.sinks.DataSink` can not be given, since
+            it would get the data of all boards without their addresses,
+            and be closed when the first board unsubscribes; subscribe one
+            sink to each board instead.
+        :param kwargs: Further keyword arguments to ``notifications``, e.g.
+            ``batch_size``.
+        :raises ValueError: If ``callback`` is a
+            :py:class:`~pymetawear.sinks.DataSink`.
+
+        """
+        if isinstance(callback, DataSink):
+            raise ValueError(
+                "A {0} can not be shared by the boards of a fleet; subscribe "
+                "one sink to each board instead.".format(
+                    type(callback).__name__))
+        return self.run(_notifications, module, callback, **kwargs)
+
+    def start_logging(self, module, **kwargs):
+        """Start logging of a module on all boards."""
+        return self.run(_call_module, module, 'start_logging', **kwargs)
+
+    def stop_logging(self, module, **kwargs):
+        """Stop logging of a module on all boards."""
+        return self.run(_call_module, module, 'stop_logging', **kwargs)
+
+    def download_logs(self, **kwargs):
+        """Download the logs of all boards, see
+        :py:meth:`~pymetawear.client.MetaWearClient.download_logs`."""
+        return self.run(MetaWearClient.download_logs, **kwargs)
+
+    def close(self):
+        """Disconnect all boards and stop the worker threads."""
+        self.disconnect()
+        self._executor.shutdown()
+
+
+def _call_module(client, module, method, *args, **kwargs):
+    return getattr(getattr(client, module), method)(*args, **kwargs)
+
+
+def _board_callback(address, callback):
+    # Pass the address of the board along with each sample.
+    @functools.wraps(callback)
+    def wrapper(data):
+        callback(address, data)
+    return wrapper
+
+
+def _notifications(client, module, callback, **kwargs):
+    if callback is not None:
+        callback = _board_callback(client._address, callback)
+    return getattr(client, module).notifications(callback, **kwargs)
@@ -13,18 +13,44 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
-from .base import PyMetaWearModule, Modules
-from .accelerometer import AccelerometerModule
-from .ambientlight import AmbientLightModule
-from .barometer import BarometerModule
-from .settings import SettingsModule
-from .gyroscope import GyroscopeModule
-from .haptic import HapticModule
-from .led import LEDModule
-from .magnetometer import MagnetometerModule
-from .switch import SwitchModule
-from .temperature import TemperatureModule
-from .sensorfusion import SensorFusionModule
+import sys
+import importlib
+
+# The module classes are imported on first access, since importing them
+# loads the native MetaWear library.
+_submodules = {
+    "PyMetaWearModule": ".base",
+    "Modules": ".base",
+    "AccelerometerModule": ".accelerometer",
+    "AmbientLightModule": ".ambientlight",
+    "BarometerModule": ".barometer",
+    "SettingsModule": ".settings",
+    "GyroscopeModule": ".gyroscope",
+    "HapticModule": ".haptic",
+    "LEDModule": ".led",
+    "MagnetometerModule": ".magnetometer",
+    "SwitchModule": ".switch",
+    "TemperatureModule": ".temperature",
+    "SensorFusionModule": ".sensorfusion",
+}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name not in _submodules:
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(
+                __name__, name))
+        value = getattr(importlib.import_module(_submodules[name], __name__),
+                        name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_submodules))
+else:
+    # Module level __getattr__ requires Python 3.7.
+    for _name, _submodule in _submodules.items():
+        globals()[_name] = getattr(
+            importlib.import_module(_submodule, __name__), _name)
 
 __all__ = [
     "PyMetaWearModule", "Modules",
@@ -21,7 +21,9 @@ from pymetawear import libmetawear
 from mbientlab.metawear.cbindings import AccBma255Odr, AccBmi160Odr, \
     AccBmi160StepCounterMode, AccBoschOrientationMode, AccBoschRange, \
     AccMma8452qOdr, AccMma8452qRange, Const
-from pymetawear.modules.base import PyMetaWearLoggingModule, data_handler
+from pymetawear.modules.base import PyMetaWearLoggingModule, data_handler, \
+    packed_timestamps
+from pymetawear.sinks import batched
 
 log = logging.getLogger(__name__)
 
@@ -31,6 +33,37 @@ _settings_map = {
     Const.MODULE_ACC_TYPE_MMA8452Q: (AccMma8452qOdr, AccMma8452qRange)
 }
 
+_parsed_settings = {}
+
+
+def _parse_settings(module_id):
+    """Parse the possible data rates and ranges of an accelerometer type.
+
+    The result only depends on the ``cbindings`` enum classes of the
+    accelerometer type, so it is cached and shared between clients.
+
+    """
+    if module_id not in _parsed_settings:
+        acc_odr_class, acc_fsr_class = _settings_map.get(module_id)
+        odr, fsr = {}, {}
+
+        if acc_odr_class is not None:
+            # Parse possible output data rates for this accelerometer.
+            for key, value in vars(acc_odr_class).items():
+                if re.search('^_([0-9]+)_*([0-9]*)Hz', key) and key is not None:
+                    odr.update({key[1:-2].replace("_","."): value})
+
+        if acc_fsr_class is not None:
+            # Parse possible output data ranges for this accelerometer.
+            for key, value in vars(acc_fsr_class).items():
+                if re.search('^_([0-9]+)G', key) and key is not None:
+                    fsr.update({key[1:-1]: value})
+
+        sensor_name = acc_odr_class.__name__.replace(
+            'Acc', '').replace('Odr', '')
+        _parsed_settings[module_id] = (odr, fsr, sensor_name)
+    return _parsed_settings[module_id]
+
 
 class AccelerometerModule(PyMetaWearLoggingModule):
     """MetaWear accelerometer module implementation.
@@ -42,34 +75,21 @@ class AccelerometerModule(PyMetaWearLoggingModule):
 
     """
 
+    _setting_parsers = {'data_rate': '_get_odr', 'data_range': '_get_fsr'}
+
     def __init__(self, board, module_id):
         super(AccelerometerModule, self).__init__(board)
         self.module_id = module_id
 
         self.high_frequency_stream = False
+        self.packed_stream = False
 
         self.current_odr = 0
         self.current_fsr = 0
 
-        self.odr = {}
-        self.fsr = {}
-
-        acc_odr_class, acc_fsr_class = _settings_map.get(module_id)
-
-        if acc_odr_class is not None:
-            # Parse possible output data rates for this accelerometer.
-            for key, value in vars(acc_odr_class).items():
-                if re.search('^_([0-9]+)_*([0-9]*)Hz', key) and key is not None:
-                    self.odr.update({key[1:-2].replace("_","."): value})
-
-        if acc_fsr_class is not None:
-            # Parse possible output data ranges for this accelerometer.
-            for key, value in vars(acc_fsr_class).items():
-                if re.search('^_([0-9]+)G', key) and key is not None:
-                    self.fsr.update({key[1:-1]: value})
-
-        self._acc_sensor_name = acc_odr_class.__name__.replace(
-            'Acc', '').replace('Odr', '')
+        odr, fsr, self._acc_sensor_name = _parse_settings(module_id)
+        self.odr = dict(odr)
+        self.fsr = dict(fsr)
 
     def __str__(self):
         return "{0} {1}: Data rates (Hz): {2}, Data ranges (g): {3}".format(
@@ -91,11 +111,20 @@ class AccelerometerModule(PyMetaWearLoggingModule):
 
     @property
     def data_signal(self):
-        if self.high_frequency_stream:
+        if self.packed_stream:
+            return libmetawear.mbl_mw_acc_get_packed_acceleration_data_signal(self.board)
+        elif self.high_frequency_stream:
             return libmetawear.mbl_mw_acc_get_high_freq_acceleration_data_signal(self.board)
         else:
             return libmetawear.mbl_mw_acc_get_acceleration_data_signal(self.board)
 
+    @property
+    def sample_period(self):
+        """Time in milliseconds between samples at the data rate written to
+        the board, or ``None`` if no data rate has been written."""
+        data_rate = self.written_settings.get('data_rate')
+        return 1000.0 / data_rate if data_rate else None
+
     def _get_odr(self, value):
         sorted_ord_keys = sorted(self.odr.keys(), key=lambda x: (float(x)))
         diffs = [abs(value - float(k)) for k in sorted_ord_keys]
@@ -104,7 +133,8 @@ class AccelerometerModule(PyMetaWearLoggingModule):
             raise ValueError(
                 "Requested ODR ({0}) was not part of possible values: {1}".format(
                     value, [float(x) for x in sorted_ord_keys]))
-        return float(value)
+        # The board uses the closest supported rate.
+        return float(sorted_ord_keys[diffs.index(min_diffs)])
 
     def _get_fsr(self, value):
         sorted_ord_keys = sorted(self.fsr.keys(), key=lambda x: (float(x)))
@@ -153,24 +183,31 @@ class AccelerometerModule(PyMetaWearLoggingModule):
 
         """
 
+        changed = self.changed_settings(data_rate=data_rate,
+                                        data_range=data_range)
         if data_rate is not None:
             self.current_odr = data_rate
-            odr = self._get_odr(data_rate)
-            log.debug("Setting Accelerometer ODR to {0}".format(odr))
-            libmetawear.mbl_mw_acc_set_odr(self.board, c_float(odr))
-       
         if data_range is not None:
             self.current_fsr = data_range
-            fsr = self._get_fsr(data_range)
+        self._write_settings(changed)
+
+    def _write_settings(self, settings):
+        if 'data_rate' in settings:
+            odr = settings['data_rate']
+            log.debug("Setting Accelerometer ODR to {0}".format(odr))
+            libmetawear.mbl_mw_acc_set_odr(self.board, c_float(odr))
+
+        if 'data_range' in settings:
+            fsr = settings['data_range']
             log.debug("Setting Accelerometer FSR to {0}".format(fsr))
             libmetawear.mbl_mw_acc_set_range(self.board, c_float(fsr))
 
-        if (data_rate is not None) or (data_range is not None):
-            self.current_odr = data_rate
-            self.current_fsr = data_range
+        if settings:
             libmetawear.mbl_mw_acc_write_acceleration_config(self.board)
+            self.written_settings.update(settings)
 
-    def notifications(self, callback=None):
+    def notifications(self, callback=None, batch_size=None,
+                      batch_interval=None):
         """Subscribe or unsubscribe to accelerometer notifications.
 
         Convenience method for handling accelerometer usage.
@@ -190,6 +227,12 @@ class AccelerometerModule(PyMetaWearLoggingModule):
         :param callable callback: Accelerometer notification callback function.
             If `None`, unsubscription to accelerometer notifications
             is registered.
+        :param int batch_size: If given, the callback is called with lists
+            of this many samples instead of once per sample.
+        :param float batch_interval: If given, the callback is called with
+            lists of the samples received during at most this many
+            milliseconds. Can be combined with ``batch_size``, in which case
+            the batch is delivered on whichever limit is reached first.
 
         """
 
@@ -198,8 +241,11 @@ class AccelerometerModule(PyMetaWearLoggingModule):
             self.toggle_sampling(False)
             super(AccelerometerModule, self).notifications(None)
         else:
-            super(AccelerometerModule, self).notifications(
-                data_handler(callback))
+            handler = data_handler(
+                batched(callback, batch_size, batch_interval))
+            if self.packed_stream or self.high_frequency_stream:
+                handler = packed_timestamps(handler, self.sample_period)
+            super(AccelerometerModule, self).notifications(handler)
             self.toggle_sampling(True)
             self.start()
 
@@ -22,6 +22,7 @@ from pymetawear.exceptions import PyMetaWearException
 from mbientlab.metawear.cbindings import AlsLtr329Gain, \
     AlsLtr329IntegrationTime, AlsLtr329MeasurementRate
 from pymetawear.modules.base import PyMetaWearModule, Modules, data_handler
+from pymetawear.sinks import batched
 
 log = logging.getLogger(__name__)
 
@@ -43,6 +44,10 @@ class AmbientLightModule(PyMetaWearModule):
 
     """
 
+    _setting_parsers = {'gain': '_get_gain',
+                        'integration_time': '_get_integration_time',
+                        'measurement_rate': '_get_measurement_rate'}
+
     def __init__(self, board, module_id):
         super(AmbientLightModule, self).__init__(board)
         self.module_id = module_id
@@ -180,25 +185,32 @@ class AmbientLightModule(PyMetaWearModule):
         :param float measurement_rate: Sensor measurement rate
 
         """
-        if gain is not None:
-            g = self._get_gain(gain)
+        changed = self.changed_settings(gain=gain,
+                                        integration_time=integration_time,
+                                        measurement_rate=measurement_rate)
+        self._write_settings(changed)
+
+    def _write_settings(self, settings):
+        if 'gain' in settings:
+            g = settings['gain']
             log.debug("Setting Ambient Light gain to {0}".format(g))
             libmetawear.mbl_mw_als_ltr329_set_gain(self.board, g)
-        if integration_time is not None:
-            itime = self._get_integration_time(integration_time)
+        if 'integration_time' in settings:
+            itime = settings['integration_time']
             log.debug("Setting Ambient Light integration time to {0}".format(itime))
             libmetawear.mbl_mw_als_ltr329_set_integration_time(self.board, itime)
-        if measurement_rate is not None:
-            mr = self._get_measurement_rate(measurement_rate)
+        if 'measurement_rate' in settings:
+            mr = settings['measurement_rate']
             log.debug("Setting Ambient Light measurement rate to {0}".format(mr))
             libmetawear.mbl_mw_als_ltr329_set_measurement_rate(self.board, mr)
 
-        if (gain is not None) or (integration_time is not None) or \
-                (measurement_rate is not None):
+        if settings:
             libmetawear.mbl_mw_als_ltr329_write_config(self.board)
+            self.written_settings.update(settings)
 
     @require_ltr329
-    def notifications(self, callback=None):
+    def notifications(self, callback=None, batch_size=None,
+                      batch_interval=None):
         """Subscribe or unsubscribe to notifications.
 
         Convenience method for handling ambient light sensor usage.
@@ -215,16 +227,25 @@ class AmbientLightModule(PyMetaWearModule):
         :param callable callback: Ambient Light notification callback function.
             If `None`, unsubscription to ambient light notifications
             is registered.
+        :param int batch_size: If given, the callback is called with lists
+            of this many samples instead of once per sample.
+        :param float batch_interval: If given, the callback is called with
+            lists of the samples received during at most this many
+            milliseconds. Can be combined with ``batch_size``, in which case
+            the batch is delivered on whichever limit is reached first.
 
         """
         if callback is None:
             super(AmbientLightModule, self).notifications(None)
             self.stop()
         else:
-            super(AmbientLightModule, self).notifications(
-                data_handler(callback))
+            super(AmbientLightModule, self).notifications(data_handler(
+                batched(callback, batch_size, batch_interval)))
             self.start()
 
+    def _resume(self):
+        self.start()
+
     @require_ltr329
     def start(self):
         """Starts luminance sampling"""
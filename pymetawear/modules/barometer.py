@@ -21,6 +21,7 @@ from mbientlab.metawear.cbindings import BaroBme280StandbyTime, \
     BaroBmp280StandbyTime, BaroBoschIirFilter, \
     BaroBoschOversampling
 from pymetawear.modules.base import PyMetaWearModule, data_handler
+from pymetawear.sinks import batched
 
 log = logging.getLogger(__name__)
 
@@ -35,6 +36,10 @@ class BarometerModule(PyMetaWearModule):
 
     """
 
+    _setting_parsers = {'oversampling': '_get_oversampling',
+                        'iir_filter': '_get_iir_filter',
+                        'standby_time': '_get_standby_time'}
+
     def __init__(self, board, module_id):
         super(BarometerModule, self).__init__(board)
         self.module_id = module_id
@@ -183,35 +188,42 @@ class BarometerModule(PyMetaWearModule):
         :param float standby_time:
 
         """
-        if oversampling is not None:
-            oversampling = self._get_oversampling(oversampling)
+        changed = self.changed_settings(oversampling=oversampling,
+                                        iir_filter=iir_filter,
+                                        standby_time=standby_time)
+        self._write_settings(changed)
+
+    def _write_settings(self, settings):
+        if 'oversampling' in settings:
+            oversampling = settings['oversampling']
             log.debug("Setting Barometer Oversampling to {0}".format(
                 oversampling))
             libmetawear.mbl_mw_baro_bosch_set_oversampling(
                 self.board, oversampling)
             self.current_oversampling = oversampling
 
-        if iir_filter is not None:
-            iir_filter = self._get_iir_filter(iir_filter)
+        if 'iir_filter' in settings:
+            iir_filter = settings['iir_filter']
             log.debug(
                 "Setting Barometer IIR filter to {0}".format(iir_filter))
             libmetawear.mbl_mw_baro_bosch_set_iir_filter(
                 self.board, iir_filter)
             self.current_iir_filter = iir_filter
 
-        if standby_time is not None:
-            standby_time = self._get_standby_time(standby_time)
+        if 'standby_time' in settings:
+            standby_time = settings['standby_time']
             log.debug("Setting Barometer Standby Time to {0}".format(
                 standby_time))
             libmetawear.mbl_mw_baro_bosch_set_standby_time(
                 self.board, standby_time)
             self.current_standby_time = standby_time
 
-        if (oversampling is not None) or (iir_filter is not None) or \
-                (standby_time is not None):
+        if settings:
             libmetawear.mbl_mw_baro_bosch_write_config(self.board)
+            self.written_settings.update(settings)
 
-    def notifications(self, callback=None):
+    def notifications(self, callback=None, batch_size=None,
+                      batch_interval=None):
         """Subscribe to or unsubscribe from barometer notifications.
 
         Convenience method for handling barometer usage.
@@ -230,6 +242,12 @@ class BarometerModule(PyMetaWearModule):
 
         :param callable callback: Barometer notification callback function.
             If `None`, unsubscription to barometer notifications is registered.
+        :param int batch_size: If given, the callback is called with lists
+            of this many samples instead of once per sample.
+        :param float batch_interval: If given, the callback is called with
+            lists of the samples received during at most this many
+            milliseconds. Can be combined with ``batch_size``, in which case
+            the batch is delivered on whichever limit is reached first.
 
         """
 
@@ -237,9 +255,13 @@ class BarometerModule(PyMetaWearModule):
             self.stop()
             super(BarometerModule, self).notifications(None)
         else:
-            super(BarometerModule, self).notifications(data_handler(callback))
+            super(BarometerModule, self).notifications(data_handler(
+                batched(callback, batch_size, batch_interval)))
             self.start()
 
+    def _resume(self):
+        self.start()
+
     def start(self):
         """Switches the barometer to active mode."""
         libmetawear.mbl_mw_baro_bosch_start(self.board)
@@ -14,15 +14,16 @@ from __future__ import print_function
 from __future__ import absolute_import
 
 import logging
-from copy import deepcopy
+from contextlib import contextmanager
 from ctypes import c_int, c_uint, c_float, cast, POINTER, c_ubyte, byref
 from functools import wraps
 from threading import Event
 
-import tqdm
-
 from pymetawear import libmetawear
+from pymetawear.decoding import decode, decode_counter
 from pymetawear.exceptions import PyMetaWearException, PyMetaWearDownloadTimeout
+from pymetawear.sinks import DataSink, FanOut, SampleQueue, _RecordArray
+from pymetawear.checkpoint import LogCheckpoint
 from mbientlab.metawear.cbindings import FnVoid_VoidP_DataP,  \
     DataTypeId, CartesianFloat, BatteryState, Tcs34725ColorAdc, EulerAngles, \
     CalibrationState, Quaternion, CorrectedCartesianFloat, FnVoid_VoidP_VoidP, \
@@ -75,6 +76,13 @@ class PyMetaWearModule(object):
         self.board = board
         self.is_present = True
         self.callback = None
+        self._fanout = None
+        #: Settings last written to the board by :meth:`set_settings`, as
+        #: the values given to ``libmetawear``.
+        self.written_settings = {}
+        #: Number of notifications received by the subscriptions of this
+        #: module.
+        self.n_notifications = 0
 
     def __str__(self):
         return "PyMetaWearModule"
@@ -113,10 +121,69 @@ class PyMetaWearModule(object):
         raise PyMetaWearException(
             "No data signal exists for {0} module.".format(self))
 
+    #: Names of the :meth:`set_settings` arguments, mapped to the names of
+    #: the methods converting them to the values written to the board.
+    _setting_parsers = {}
+
     def set_settings(self, **kwargs):
         raise PyMetaWearException(
             "No settings exists for {0} module.".format(self))
 
+    def _write_settings(self, settings):
+        # Write settings converted by parse_settings to the board, and
+        # record them in written_settings.
+        raise PyMetaWearException(
+            "No settings exists for {0} module.".format(self))
+
+    def restore_settings(self):
+        """Write :attr:`written_settings` to the board again, e.g. after
+        the board has been reset.
+
+        :return: ``True`` if there were settings to write.
+        :rtype: bool
+
+        """
+        if not self.written_settings:
+            return False
+        log.debug("Restoring {0} settings: {1}".format(
+            self.module_name, self.written_settings))
+        self._write_settings(dict(self.written_settings))
+        return True
+
+    def parse_settings(self, **settings):
+        """Validate settings without writing them to the board.
+
+        :param settings: Keyword arguments to :meth:`set_settings`.
+        :return: The settings that are not ``None``, converted to the
+            values written to the board.
+        :rtype: dict
+        :raises ValueError: If a setting is unknown or has an invalid value.
+
+        """
+        parsed = {}
+        for name, value in settings.items():
+            if name not in self._setting_parsers:
+                raise ValueError("{0} has no setting {1!r}.".format(
+                    self.module_name, name))
+            if value is not None:
+                parsed[name] = getattr(self, self._setting_parsers[name])(
+                    value)
+        return parsed
+
+    def changed_settings(self, **settings):
+        """Validate settings and leave out those already written.
+
+        :param settings: Keyword arguments to :meth:`set_settings`.
+        :return: The settings that differ from :attr:`written_settings`,
+            converted to the values written to the board.
+        :rtype: dict
+        :raises ValueError: If a setting is unknown or has an invalid value.
+
+        """
+        return dict((name, value) for name, value
+                    in self.parse_settings(**settings).items()
+                    if self.written_settings.get(name) != value)
+
     def get_current_settings(self):
         return {}
 
@@ -128,7 +195,9 @@ class PyMetaWearModule(object):
         on the MetaWear board.
 
         :param callable callback: The function to call when
-            data signal notification arrives. If ``None``, an
+            data signal notification arrives, or a
+            :py:class:`~pymetawear.sinks.DataSink` wrapped by
+            :func:`data_handler`. If ``None``, an
             unsubscription to notifications is sent.
 
         """
@@ -139,8 +208,7 @@ class PyMetaWearModule(object):
             if self.callback is not None:
                 raise PyMetaWearException(
                     "Subscription to {0} signal already in place!")
-            # Handle the context argument added in MetaWear C++ API 0.12.
-            callback = context_callback(callback)
+            callback = self._subscription_callback(callback)
             self.callback = (callback, FnVoid_VoidP_DataP(callback))
             libmetawear.mbl_mw_datasignal_subscribe(
                 data_signal, None, self.callback[1])
@@ -150,8 +218,115 @@ class PyMetaWearModule(object):
             if self.callback is None:
                 return
             libmetawear.mbl_mw_datasignal_unsubscribe(data_signal)
+            close_sink(self.callback[0])
             self.callback = None
 
+    def _subscription_callback(self, func):
+        # Like context_callback, also counting the notifications.
+        @wraps(func)
+        def wrapper(context, *args):
+            self.n_notifications += 1
+            func(*args)
+        return wrapper
+
+    def resubscribe(self, resume=True):
+        """Subscribe to the data signal again with the current callback,
+        e.g. after the connection to the board has been restored.
+
+        :param bool resume: If sampling should be restarted. Give
+            ``False`` to restart it once for several restored
+            subscriptions and loggers.
+        :return: ``True`` if there was a subscription to restore.
+        :rtype: bool
+
+        """
+        if self.callback is None:
+            return False
+        log.debug("Resubscribing to {0} changes.".format(self.module_name))
+        libmetawear.mbl_mw_datasignal_subscribe(
+            self.data_signal, None, self.callback[1])
+        if resume:
+            self._resume()
+        return True
+
+    def _resume(self):
+        # Restart sampling that notifications started, for modules that
+        # sample on their own.
+        pass
+
+    def add_subscriber(self, callback):
+        """Add a subscriber to the notifications of this module.
+
+        The data signal is subscribed to once, when the first subscriber
+        is added, and unsubscribed from when the last one is removed.
+        Subscribers added or removed in between do not cause any
+        communication with the board. Each sample is decoded once for
+        all subscribers.
+
+        .. code-block:: python
+
+            c.accelerometer.add_subscriber(recorder)
+            c.accelerometer.add_subscriber(dashboard)
+            ...
+            c.accelerometer.remove_subscriber(dashboard)
+
+        Can not be combined with a callback given to ``notifications``.
+
+        :param callable callback: Function called with each sample, or a
+            :py:class:`~pymetawear.sinks.DataSink`.
+        :return: The subscriber, to be given to :meth:`remove_subscriber`.
+
+        """
+        if self._fanout is not None and not self._fanout.closed:
+            self._fanout.add(callback)
+            return callback
+        fanout = FanOut()
+        fanout.add(callback)
+        self.notifications(fanout)
+        self._fanout = fanout
+        return callback
+
+    def remove_subscriber(self, callback):
+        """Remove a subscriber added by :meth:`add_subscriber`.
+
+        :param callback: The subscriber to remove.
+        :return: ``True`` if the subscriber was found.
+        :rtype: bool
+
+        """
+        if self._fanout is None or not self._fanout.remove(callback):
+            return False
+        if not len(self._fanout):
+            self._fanout = None
+            self.notifications(None)
+        return True
+
+    @contextmanager
+    def stream(self, maxsize=1024, overflow='block'):
+        """Iterate over notifications, as an alternative to callbacks.
+
+        Subscribes to notifications with a bounded
+        :py:class:`~pymetawear.sinks.SampleQueue`, which is returned, and
+        unsubscribes when the ``with`` block is left.
+
+        .. code-block:: python
+
+            with c.accelerometer.stream(maxsize=500) as samples:
+                for data in samples:
+                    print(data)
+
+        :param int maxsize: Maximal number of samples waiting to be consumed.
+        :param str overflow: What to do when the queue is full:
+            ``'block'`` (default), ``'drop_oldest'`` or ``'drop_newest'``.
+
+        """
+        queue = SampleQueue(maxsize, overflow)
+        self.notifications(queue)
+        try:
+            yield queue
+        finally:
+            self.notifications(None)
+
 
 class PyMetaWearLoggingModule(PyMetaWearModule):
     """Special class with additions for modules with logging support."""
@@ -160,13 +335,9 @@ class PyMetaWearLoggingModule(PyMetaWearModule):
         super(PyMetaWearLoggingModule, self).__init__(board)
 
         self._logger_ready_event = None
-        self._data_received = None
-        self._download_done = False
         self._logger_running = False
         self._logger_address = None
 
-        self._progress_bar = None
-
         self._logged_data = []
 
     def _logger_ready(self, address):
@@ -178,39 +349,6 @@ class PyMetaWearLoggingModule(PyMetaWearModule):
             pass
         self._logger_ready_event.set()
 
-    def _progress_update(self, entries_left, total_entries):
-        if self._progress_bar is None:
-            self._progress_bar = tqdm.tqdm(total=total_entries)
-        n_read_entries = total_entries - entries_left
-        self._progress_bar.update(n_read_entries - self._progress_bar.n)
-        self._data_received.set()
-        if entries_left == 0:
-            self._progress_bar.update(
-                total_entries - self._progress_bar.n)
-            self._progress_bar.close()
-            self._progress_bar = None
-            self._download_done = True
-
-    def _unknown_entry(self, id, epoch, data, length):
-        """Handle unknown data entries in the log.
-
-        I have no idea what this data is. Needs further investigation.
-
-        :param id (int):
-        :param epoch (int):
-        :param data:
-        :param length (int):
-
-        """
-        self._data_received.set()
-        log.debug('Unknown Entry: ID: {0}, epoch: {1}, '
-                  'data: {2}, Length: {3}'.format(
-            id, epoch, bytearray(data)[:length], length))
-
-    def _unhandled_entry(self, data):
-        self._data_received.set()
-        log.debug('Unhandled Entry: ' + str(data))
-
     def _default_download_callback(self, data):
         self._logged_data.append(data)
 
@@ -223,12 +361,27 @@ class PyMetaWearLoggingModule(PyMetaWearModule):
     def toggle_sampling(self, enabled=True):
         raise NotImplementedError("Must be implemented by module.")
 
+    def _resume(self):
+        self.toggle_sampling(True)
+        self.start()
+
+    @property
+    def has_logger(self):
+        """``True`` if this module has a logger with data to download."""
+        return self._logger_address is not None
+
+    @property
+    def is_logging(self):
+        """``True`` while the logger of this module is running."""
+        return self._logger_running
+
     def start_logging(self):
         """Setup and start logging of data signals on the MetaWear board"""
         data_signal = self.data_signal
-        if getattr(self, 'high_frequency_stream', False):
+        if getattr(self, 'high_frequency_stream', False) or \
+                getattr(self, 'packed_stream', False):
             raise PyMetaWearException(
-                "Cannot log on high frequency stream signal.")
+                "Cannot log on high frequency or packed stream signal.")
         self._logger_ready_event = Event()
         logger_ready = FnVoid_VoidP_VoidP(context_callback(self._logger_ready))
         libmetawear.mbl_mw_datasignal_log(self.data_signal, None, logger_ready)
@@ -242,7 +395,6 @@ class PyMetaWearLoggingModule(PyMetaWearModule):
             self._logger_address, data_signal))
 
         self._logger_running = True
-        self._download_done = False
         libmetawear.mbl_mw_logging_start(self.board, 0)
         self.toggle_sampling(True)
         self.start()
@@ -256,82 +408,311 @@ class PyMetaWearLoggingModule(PyMetaWearModule):
         libmetawear.mbl_mw_logging_stop(self.board)
         self._logger_running = False
 
+    def reattach_logger(self, resume=True):
+        """Look up the logger of this module on the board again, e.g. after
+        the connection to the board has been restored, and restart logging
+        if it was running.
+
+        :param bool resume: If logging and sampling should be restarted.
+            Give ``False`` to restart them once for several restored
+            subscriptions and loggers.
+        :return: ``True`` if the logger is still on the board. If not,
+            the module no longer has a logger.
+        :rtype: bool
+
+        """
+        if self._logger_address is None:
+            return False
+        logger_id = libmetawear.mbl_mw_logger_get_id(self._logger_address)
+        address = libmetawear.mbl_mw_logger_lookup_id(self.board, logger_id)
+        if not address:
+            log.warning("Logger {0} of {1} module is gone from the "
+                        "board.".format(logger_id, self.module_name))
+            self._logger_address = None
+            self._logger_running = False
+            return False
+        self._logger_address = address
+        if self._logger_running and resume:
+            log.debug("Restarting Logger (Logger#: {0})".format(address))
+            libmetawear.mbl_mw_logging_start(self.board, 0)
+            self._resume()
+        return True
+
     def download_log(
             self,
             timeout=3.0,
             data_callback=None,
             progress_update_function=None,
             unknown_entry_function=None,
-            unhandled_entry_function=None
+            unhandled_entry_function=None,
+            output='list',
+            checkpoint=None
     ):
         """Download logged data from the MetaWear board
 
+        To download the logs of several modules at once, use
+        :py:meth:`pymetawear.client.MetaWearClient.download_logs` instead.
+
         :param timeout: Time to wait for download to resume if connection is lost.
         :param data_callback: Function called to process each downloaded sample.
-        :param progress_update_function: Function called each
-         `progress_update_each_n_sample` to give feedback on download progress.
+        :param progress_update_function: Function called with the number of
+         entries left and the total number of entries, to give feedback on
+         download progress. Replaces the default progress bar.
         :param unknown_entry_function: Function called when unknown logging
          entries are encountered.
         :param unhandled_entry_function: Function called when unhandled entries
          are encountered.
-        :return: The logged data, in case download was successful.
+        :param str output: ``'list'`` to get the logged data as a list of
+         ``{'epoch', 'value'}`` dictionaries or ``'numpy'`` to get it as a
+         NumPy structured array with an ``epoch`` column and one column
+         per value field, e.g. ``x``, ``y`` and ``z``. The array is
+         preallocated from the size of the log, which uses much less
+         memory for long logs. A :py:class:`~pymetawear.sinks.DataSink`,
+         e.g. a :py:class:`~pymetawear.sinks.BinaryFile` or
+         :py:class:`~pymetawear.sinks.CSVFile`, can also be given, in which
+         case samples are passed on to it as they arrive. Not used if
+         ``data_callback`` is given.
+        :param checkpoint: Directory path or
+         :py:class:`~pymetawear.checkpoint.LogCheckpoint` to store
+         downloaded samples and download progress in. If the download
+         times out, the samples received so far are kept on disk and
+         calling this method again continues where it stopped. Can not
+         be combined with ``data_callback`` or a sink ``output``.
+        :return: The logged data, in case download was successful. For
+         ``'numpy'`` output, ``None`` is returned if there was no data. If
+         ``output`` is a sink, it is closed and returned.
 
         """
         if self._logger_running:
             # Stop logging if it is active.
             self.stop_logging()
 
+        target = LogDownloadTarget(self, output, data_callback, checkpoint)
+        run_log_download(
+            self.board, [target], timeout=timeout,
+            progress_update_function=progress_update_function,
+            unknown_entry_function=unknown_entry_function,
+            unhandled_entry_function=unhandled_entry_function)
+        return target.finish()
+
+
+class LogDownloadTarget(object):
+    """Receiver of the downloaded entries of one logging module.
+
+    Translates the ``output``, ``data_callback`` and ``checkpoint``
+    arguments of :py:meth:`PyMetaWearLoggingModule.download_log` into a
+    data point handler, and produces the return value of the download.
+
+    """
+
+    def __init__(self, module, output='list', data_callback=None,
+                 checkpoint=None):
+        self.module = module
+        self.address = module._logger_address
+        self.reserve = None
+        self._checkpoint = None
+        self._logger_id = None
+
+        self.sink = output if isinstance(output, DataSink) else None
+        if self.sink is None and output not in ('list', 'numpy'):
+            raise ValueError("Unknown output format: {0}".format(output))
+        self._output = output
+
+        if self.address is None:
+            raise PyMetaWearException(
+                "No logger to download for {0} module.".format(
+                    module.module_name))
+
+        if checkpoint is not None:
+            if self.sink is not None or data_callback is not None:
+                raise ValueError("A checkpoint can not be combined with a "
+                                 "data callback or sink output.")
+            if not isinstance(checkpoint, LogCheckpoint):
+                checkpoint = LogCheckpoint(checkpoint)
+            self._checkpoint = checkpoint
+            self._logger_id = libmetawear.mbl_mw_logger_get_id(self.address)
+            self.sink = checkpoint.sink(self._logger_id)
+
         if data_callback is None:
-            data_callback = data_handler(self._default_download_callback)
-        if progress_update_function is None:
-            progress_update_function = self._progress_update
-        if unknown_entry_function is None:
-            unknown_entry_function = self._unknown_entry
-        if unhandled_entry_function is None:
-            unhandled_entry_function = self._unhandled_entry
-
-        data_point_handler = FnVoid_VoidP_DataP(context_callback(data_callback))
-        progress_update = FnVoid_VoidP_UInt_UInt(context_callback(progress_update_function))
-        unknown_entry = FnVoid_VoidP_UByte_Long_UByteP_UByte(context_callback(unknown_entry_function))
-        unhandled_entry = FnVoid_VoidP_DataP(data_handler(context_callback(unhandled_entry_function)))
-        log_download_handler = LogDownloadHandler(
-            received_progress_update=progress_update,
-            received_unknown_entry=unknown_entry,
-            received_unhandled_entry=unhandled_entry
-        )
+            if self.sink is not None:
+                data_callback = data_handler(self.sink)
+            elif output == 'numpy':
+                # Keep the data from previous, timed out attempts.
+                if not isinstance(module._logged_data, _RecordArray):
+                    module._logged_data = _RecordArray()
+                records = module._logged_data
+                data_callback = records.append
+                self.reserve = lambda n: records.reserve(len(records) + n)
+            else:
+                if isinstance(module._logged_data, _RecordArray):
+                    module._logged_data = []
+                data_callback = data_handler(
+                    module._default_download_callback)
+        self.callback = data_callback
+
+    def timed_out(self):
+        """Called when the download has timed out."""
+        if self._checkpoint is not None:
+            self.sink.close()
+        elif self.sink is not None:
+            # Write out what has been received so far.
+            self.sink.flush()
+
+    def finish(self):
+        """Remove the logger and get the downloaded data."""
+        log.debug("Remove logger. (Logger#: {0})".format(self.address))
+        libmetawear.mbl_mw_logger_remove(self.address)
+        self.module._logger_address = None
+
+        if self.sink is not None:
+            self.sink.close()
+            if self._checkpoint is not None:
+                logged_data = self._checkpoint.read(
+                    self._logger_id, self._output)
+                self._checkpoint.remove(self._logger_id)
+                return logged_data
+            return self.sink
+
+        logged_data = self.module._logged_data
+        self.module._logged_data = []
+        if isinstance(logged_data, _RecordArray):
+            logged_data = logged_data.take()
+        return logged_data
+
+
+class _LogDownload(object):
+    """Progress of a running ``mbl_mw_logging_download``."""
+
+    def __init__(self, targets, progress_update_function=None,
+                 unknown_entry_function=None, unhandled_entry_function=None):
+        self.targets = targets
+        self.data_received = Event()
+        self.done = False
+        self.progress_bar = None
+        self._started = False
+        self._progress_update_function = progress_update_function
+        self._unknown_entry_function = unknown_entry_function
+        self._unhandled_entry_function = unhandled_entry_function
+
+    def progress_update(self, entries_left, total_entries):
+        if not self._started:
+            self._started = True
+            if len(self.targets) == 1 and self.targets[0].reserve:
+                # Each sample takes up at least one log entry, so this
+                # is an upper bound of the number of samples.
+                self.targets[0].reserve(total_entries)
+            if self._progress_update_function is None:
+                # Imported here, as it is only needed for log downloads.
+                from tqdm import tqdm
+                self.progress_bar = tqdm(total=total_entries)
+        if self._progress_update_function is not None:
+            self._progress_update_function(entries_left, total_entries)
+        else:
+            self.progress_bar.update(
+                total_entries - entries_left - self.progress_bar.n)
+        self.data_received.set()
+        if entries_left == 0:
+            self.close_progress_bar()
+            self.done = True
+
+    def unknown_entry(self, id, epoch, data, length):
+        """Handle unknown data entries in the log.
+
+        I have no idea what this data is. Needs further investigation.
+
+        :param id (int):
+        :param epoch (int):
+        :param data:
+        :param length (int):
+
+        """
+        self.data_received.set()
+        if self._unknown_entry_function is not None:
+            self._unknown_entry_function(id, epoch, data, length)
+        else:
+            log.debug('Unknown Entry: ID: {0}, epoch: {1}, '
+                      'data: {2}, Length: {3}'.format(
+                id, epoch, bytearray(data[:length]), length))
+
+    def unhandled_entry(self, data):
+        self.data_received.set()
+        if self._unhandled_entry_function is not None:
+            self._unhandled_entry_function(data)
+        else:
+            log.debug('Unhandled Entry: ' + str(data))
+
+    def close_progress_bar(self):
+        if self.progress_bar is not None:
+            self.progress_bar.close()
+            self.progress_bar = None
+
+
+def run_log_download(board, targets, timeout=3.0,
+                     progress_update_function=None,
+                     unknown_entry_function=None,
+                     unhandled_entry_function=None):
+    """Download the logs of a board in one ``mbl_mw_logging_download``.
+
+    The firmware sends the entries of all loggers in the same download,
+    so every logger to get data from is subscribed before it starts.
+
+    :param board: The MetaWear board pointer value.
+    :param list targets: The loggers to download, as objects with an
+        ``address`` attribute holding the logger and a ``callback``
+        attribute holding the function to call with each data point.
+        A ``timed_out`` method is called on them if the download times out.
+    :param timeout: Time to wait for download to resume if connection is lost.
+    :param progress_update_function: Function called with the number of
+        entries left and the total number of entries.
+    :param unknown_entry_function: Function called when unknown logging
+        entries are encountered.
+    :param unhandled_entry_function: Function called with decoded samples
+        when unhandled entries are encountered.
+    :raises PyMetaWearDownloadTimeout: If no data has been received
+        within ``timeout`` seconds.
 
+    """
+    download = _LogDownload(targets, progress_update_function,
+                            unknown_entry_function, unhandled_entry_function)
+    # Keep references to the callbacks until the download is done.
+    data_point_handlers = []
+    for target in targets:
+        data_point_handlers.append(
+            FnVoid_VoidP_DataP(context_callback(target.callback)))
         log.debug("Subscribe to Logger. (Logger#: {0})".format(
-            self._logger_address))
+            target.address))
         libmetawear.mbl_mw_logger_subscribe(
-            self._logger_address, None, data_point_handler)
-        self._data_received = Event()
-        log.debug("Waiting for completed download. (Logger#: {0})".format(
-            self._logger_address))
-        libmetawear.mbl_mw_logging_download(
-            self.board, 1000,
-            byref(log_download_handler))
-
-        while not self._download_done:
-            status = self._data_received.wait(timeout)
-            self._data_received.clear()
-            if not self._download_done and not status:
-                if self._progress_bar is not None:
-                    self._progress_bar.close()
-                    self._progress_bar = None
-                raise PyMetaWearDownloadTimeout(
-                    "Bluetooth connection lost! Please reconnect and retry download...")
-
-        log.debug("Download done. (Logger#: {0})".format(
-            self._logger_address))
-        log.debug("Remove logger. (Logger#: {0})".format(
-            self._logger_address))
-        libmetawear.mbl_mw_logger_remove(self._logger_address)
-
-        logged_data = self._logged_data
-        self._logged_data = []
-        self._data_received = None
-
-        return logged_data
+            target.address, None, data_point_handlers[-1])
+
+    progress_update = FnVoid_VoidP_UInt_UInt(
+        context_callback(download.progress_update))
+    unknown_entry = FnVoid_VoidP_UByte_Long_UByteP_UByte(
+        context_callback(download.unknown_entry))
+    unhandled_entry = FnVoid_VoidP_DataP(
+        context_callback(data_handler(download.unhandled_entry)))
+    log_download_handler = LogDownloadHandler(
+        received_progress_update=progress_update,
+        received_unknown_entry=unknown_entry,
+        received_unhandled_entry=unhandled_entry
+    )
+
+    log.debug("Waiting for completed download. (Loggers#: {0})".format(
+        ', '.join(str(t.address) for t in targets)))
+    libmetawear.mbl_mw_logging_download(
+        board, 1000, byref(log_download_handler))
+
+    while not download.done:
+        status = download.data_received.wait(timeout)
+        download.data_received.clear()
+        if not download.done and not status:
+            download.close_progress_bar()
+            for target in targets:
+                target.timed_out()
+            raise PyMetaWearDownloadTimeout(
+                "Bluetooth connection lost! Please reconnect and retry download...")
+
+    log.debug("Download done. (Loggers#: {0})".format(
+        ', '.join(str(t.address) for t in targets)))
 
 
 def _error_handler(data):
@@ -341,7 +722,7 @@ def _error_handler(data):
 
 def _byte_array_handler(data):
     ptr = cast(data.contents.value, POINTER(c_ubyte * data.contents.length))
-    return [ptr.contents[i].value for i in range(0, data.contents.length)]
+    return [ptr.contents[i] for i in range(0, data.contents.length)]
 
 
 DATA_HANDLERS = {
@@ -386,12 +767,117 @@ def context_callback(func):
 
 
 def data_handler(func):
+    """Decorator converting ``libmetawear`` data points to PyMetaWear samples.
+
+    The wrapped function is called with a dictionary with ``epoch`` and
+    ``value`` keys. The value is decoded by :func:`pymetawear.decoding.decode`
+    directly from the payload, so it is safe to keep after the callback
+    has returned.
+
+    If ``func`` is a :py:class:`~pymetawear.sinks.DataSink`, it instead
+    receives the data points as they are, and the returned function has
+    the sink in its ``sink`` attribute.
+
+    :param func: The function or sink to call with decoded samples.
+    :return: The wrapped function.
+
+    """
+    if isinstance(func, DataSink):
+        handle_data = func.handle_data
+
+        def sink_wrapper(data):
+            handle_data(data)
+
+        sink_wrapper.sink = func
+        return sink_wrapper
+
+    @wraps(func)
+    def wrapper(data):
+        func(decode(data))
+
+    return wrapper
+
+
+def packed_timestamps(func, period, samples_per_packet=3):
+    """Decorator spreading out the epochs of samples from packed signals.
+
+    ``libmetawear`` gives all samples of a packed notification the time
+    the notification was received. The wrapper instead gives the last
+    sample of each notification that time, and the earlier ones times
+    ``period`` milliseconds apart before it, keeping the epochs from
+    decreasing. The epoch is changed in the data point itself, so ``func``
+    can be any data point handler, e.g. one made by :func:`data_handler`.
+
+    :param func: The data point handler to wrap.
+    :param float period: Time in milliseconds between samples, i.e. the
+        inverse of the data rate. If ``None``, the epochs are kept.
+    :param int samples_per_packet: Number of samples per notification.
+    :return: The wrapped function.
+
+    """
+    if not period:
+        return func
+    offsets = [int((samples_per_packet - 1 - i) * period + 0.5)
+               for i in range(samples_per_packet)]
+    state = {'n': 0, 'last': None}
+
     @wraps(func)
     def wrapper(data):
-        func({
-            'epoch': int(data.contents.epoch),
-            'value': deepcopy(DATA_HANDLERS.get(
-                data.contents.type_id, _error_handler)(data)),
-        })
+        # Samples of a notification are delivered together, and lost
+        # notifications lose all of them, so the position in the
+        # notification follows from the sample count.
+        epoch = data.contents.epoch - offsets[state['n'] % samples_per_packet]
+        state['n'] += 1
+        if state['last'] is not None and epoch < state['last']:
+            epoch = state['last']
+        state['last'] = epoch
+        data.contents.epoch = epoch
+        func(data)
 
     return wrapper
+
+
+def counter_timestamps(func, period):
+    """Decorator giving samples epochs from their accounter sample count.
+
+    The first sample keeps its epoch, and later samples are placed
+    ``period`` milliseconds apart according to the count the board
+    gave them, so that bursts of notifications do not distort the
+    spacing. Since a sample can not be received before it was taken, the
+    time line is moved back whenever it gets ahead of the reception
+    time, which keeps it from drifting away from the board clock.
+
+    :param func: The data point handler to wrap.
+    :param float period: Time in milliseconds between samples counted
+        by the accounter.
+    :return: The wrapped function.
+
+    """
+    state = {}
+
+    @wraps(func)
+    def wrapper(data):
+        count = decode_counter(data)
+        received = data.contents.epoch
+        if not state:
+            state['anchor'], state['first'] = received, count
+        epoch = state['anchor'] + int((count - state['first']) * period + 0.5)
+        if epoch > received:
+            state['anchor'] -= epoch - received
+            epoch = received
+        data.contents.epoch = epoch
+        func(data)
+
+    return wrapper
+
+
+def close_sink(handler):
+    """Close the sink of a handler created by :func:`data_handler`, if any.
+
+    :param handler: A data handler, possibly wrapped by
+        :func:`context_callback`.
+
+    """
+    sink = getattr(handler, 'sink', None)
+    if sink is not None:
+        sink.close()
@@ -18,7 +18,9 @@ import logging
 from pymetawear import libmetawear
 from pymetawear.exceptions import PyMetaWearException
 from mbientlab.metawear.cbindings import GyroBmi160Odr, GyroBmi160Range
-from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, data_handler
+from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, \
+    data_handler, packed_timestamps
+from pymetawear.sinks import batched
 
 log = logging.getLogger(__name__)
 
@@ -33,6 +35,32 @@ def require_bmi160(f):
     return wrapper
 
 
+_parsed_settings = {}
+
+
+def _parse_settings(gyro_o_class, gyro_r_class):
+    """Parse the possible data rates and ranges of a gyroscope type.
+
+    The result only depends on the ``cbindings`` enum classes, so it is
+    cached and shared between clients.
+
+    """
+    classes = (gyro_o_class, gyro_r_class)
+    if classes not in _parsed_settings:
+        odr, fsr = {}, {}
+        # Parse possible output data rates for this gyroscope.
+        for key, value in vars(gyro_o_class).items():
+            if re.search('_([0-9]+)Hz', key) and key is not None:
+                odr.update({key[1:-2]: value})
+
+        # Parse possible ranges for this gyroscope.
+        for key, value in vars(gyro_r_class).items():
+            if re.search('_([0-9]+)dps', key) and key is not None:
+                fsr.update({key[1:-3]: value})
+        _parsed_settings[classes] = (odr, fsr)
+    return _parsed_settings[classes]
+
+
 class GyroscopeModule(PyMetaWearLoggingModule):
     """MetaWear gyroscope module implementation.
 
@@ -43,11 +71,14 @@ class GyroscopeModule(PyMetaWearLoggingModule):
 
     """
 
+    _setting_parsers = {'data_rate': '_get_odr', 'data_range': '_get_fsr'}
+
     def __init__(self, board, module_id):
         super(GyroscopeModule, self).__init__(board)
         self.module_id = module_id
 
         self.high_frequency_stream = False
+        self.packed_stream = False
 
         self.odr = {}
         self.fsr = {}
@@ -57,6 +88,7 @@ class GyroscopeModule(PyMetaWearLoggingModule):
 
         if self.module_id == Modules.MBL_MW_MODULE_NA:
             # No gyroscope present!
+            self.is_present = False
             self.gyro_r_class = None
             self.gyro_o_class = None
         else:
@@ -64,16 +96,9 @@ class GyroscopeModule(PyMetaWearLoggingModule):
             self.gyro_o_class = GyroBmi160Odr
 
         if self.gyro_o_class is not None:
-            # Parse possible output data rates for this gyroscope.
-            for key, value in vars(self.gyro_o_class).items():
-                if re.search('_([0-9]+)Hz', key) and key is not None:
-                    self.odr.update({key[1:-2]: value})
-
-        if self.gyro_r_class is not None:
-            # Parse possible ranges for this gyroscope.
-            for key, value in vars(self.gyro_r_class).items():
-                if re.search('_([0-9]+)dps', key) and key is not None:
-                    self.fsr.update({key[1:-3]: value})
+            odr, fsr = _parse_settings(self.gyro_o_class, self.gyro_r_class)
+            self.odr.update(odr)
+            self.fsr.update(fsr)
 
     def __str__(self):
         return "{0} {1}: Data rates (Hz): {2}, Data ranges (dps): {3}".format(
@@ -100,13 +125,26 @@ class GyroscopeModule(PyMetaWearLoggingModule):
     @property
     @require_bmi160
     def data_signal(self):
-        if self.high_frequency_stream:
+        if self.packed_stream:
+            return libmetawear.mbl_mw_gyro_bmi160_get_packed_rotation_data_signal(
+                self.board)
+        elif self.high_frequency_stream:
             return libmetawear.mbl_mw_gyro_bmi160_get_high_freq_rotation_data_signal(
                 self.board)
         else:
             return libmetawear.mbl_mw_gyro_bmi160_get_rotation_data_signal(
                 self.board)
 
+    @property
+    def sample_period(self):
+        """Time in milliseconds between samples at the data rate written to
+        the board, or ``None`` if no data rate has been written."""
+        data_rate = self.written_settings.get('data_rate')
+        for k, v in self.odr.items():
+            if v == data_rate:
+                return 1000.0 / float(k)
+        return None
+
     def _get_odr(self, value):
         sorted_ord_keys = sorted(self.odr.keys(), key=lambda x: (float(x)))
         diffs = [abs(value - float(k)) for k in sorted_ord_keys]
@@ -169,21 +207,30 @@ class GyroscopeModule(PyMetaWearLoggingModule):
             degrees per second.
 
         """
+        changed = self.changed_settings(data_rate=data_rate,
+                                        data_range=data_range)
         if data_rate is not None:
-            odr = self._get_odr(data_rate)
-            log.debug("Setting Gyroscope ODR to {0}".format(odr))
-            libmetawear.mbl_mw_gyro_bmi160_set_odr(self.board, odr)
             self.current_odr = data_rate
         if data_range is not None:
-            fsr = self._get_fsr(data_range)
+            self.current_fsr = data_range
+        self._write_settings(changed)
+
+    def _write_settings(self, settings):
+        if 'data_rate' in settings:
+            odr = settings['data_rate']
+            log.debug("Setting Gyroscope ODR to {0}".format(odr))
+            libmetawear.mbl_mw_gyro_bmi160_set_odr(self.board, odr)
+        if 'data_range' in settings:
+            fsr = settings['data_range']
             log.debug("Setting Gyroscope FSR to {0}".format(fsr))
             libmetawear.mbl_mw_gyro_bmi160_set_range(self.board, fsr)
-            self.current_fsr = data_range
-        if (data_rate is not None) or (data_range is not None):
+        if settings:
             libmetawear.mbl_mw_gyro_bmi160_write_config(self.board)
+            self.written_settings.update(settings)
 
     @require_bmi160
-    def notifications(self, callback=None):
+    def notifications(self, callback=None, batch_size=None,
+                      batch_interval=None):
         """Subscribe or unsubscribe to gyroscope notifications.
 
         Convenience method for handling gyroscope usage.
@@ -202,6 +249,12 @@ class GyroscopeModule(PyMetaWearLoggingModule):
 
         :param callable callback: Gyroscope notification callback function.
             If `None`, unsubscription to gyroscope notifications is registered.
+        :param int batch_size: If given, the callback is called with lists
+            of this many samples instead of once per sample.
+        :param float batch_interval: If given, the callback is called with
+            lists of the samples received during at most this many
+            milliseconds. Can be combined with ``batch_size``, in which case
+            the batch is delivered on whichever limit is reached first.
 
         """
         if callback is None:
@@ -209,7 +262,11 @@ class GyroscopeModule(PyMetaWearLoggingModule):
             self.toggle_sampling(False)
             super(GyroscopeModule, self).notifications(None)
         else:
-            super(GyroscopeModule, self).notifications(data_handler(callback))
+            handler = data_handler(
+                batched(callback, batch_size, batch_interval))
+            if self.packed_stream or self.high_frequency_stream:
+                handler = packed_timestamps(handler, self.sample_period)
+            super(GyroscopeModule, self).notifications(handler)
             self.toggle_sampling(True)
             self.start()
 
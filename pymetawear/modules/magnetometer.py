@@ -18,10 +18,20 @@ import logging
 from pymetawear import libmetawear
 from pymetawear.exceptions import PyMetaWearException
 from mbientlab.metawear.cbindings import MagBmm150Odr, MagBmm150Preset
-from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, data_handler
+from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, \
+    data_handler, packed_timestamps
+from pymetawear.sinks import batched
 
 log = logging.getLogger(__name__)
 
+# Data rates in Hz of the BMM150 power presets.
+_PRESET_DATA_RATES = {
+    MagBmm150Preset.LOW_POWER: 10.0,
+    MagBmm150Preset.REGULAR: 10.0,
+    MagBmm150Preset.ENHANCED_REGULAR: 10.0,
+    MagBmm150Preset.HIGH_ACCURACY: 20.0,
+}
+
 
 def require_bmm150(f):
     def wrapper(*args, **kwargs):
@@ -43,9 +53,12 @@ class MagnetometerModule(PyMetaWearLoggingModule):
 
     """
 
+    _setting_parsers = {'power_preset': '_get_power_preset'}
+
     def __init__(self, board, module_id):
         super(MagnetometerModule, self).__init__(board)
         self.current_power_preset = None
+        self.packed_stream = False
 
         self.module_id = module_id
         
@@ -54,6 +67,7 @@ class MagnetometerModule(PyMetaWearLoggingModule):
 
         if self.module_id == Modules.MBL_MW_MODULE_NA:
             # No magnetometer present!
+            self.is_present = False
             self.mag_o_class = None
             self.mag_p_class = None
         else:
@@ -95,8 +109,18 @@ class MagnetometerModule(PyMetaWearLoggingModule):
     @property
     @require_bmm150
     def data_signal(self):
+        if self.packed_stream:
+            return libmetawear.mbl_mw_mag_bmm150_get_packed_b_field_data_signal(
+                self.board)
         return libmetawear.mbl_mw_mag_bmm150_get_b_field_data_signal(self.board)
 
+    @property
+    def sample_period(self):
+        """Time in milliseconds between samples for the current power
+        preset, or ``None`` if no preset has been set."""
+        data_rate = _PRESET_DATA_RATES.get(self.current_power_preset)
+        return 1000.0 / data_rate if data_rate else None
+
     def _get_power_preset(self, value):
         if value.lower() in self.power_presets:
             return self.power_presets.get(value.lower())
@@ -131,14 +155,20 @@ class MagnetometerModule(PyMetaWearLoggingModule):
             accuracy and power consumption
 
         """
+        self._write_settings(self.changed_settings(power_preset=power_preset))
         if power_preset is not None:
-            pp = self._get_power_preset(power_preset)
+            self.current_power_preset = self.written_settings['power_preset']
+
+    def _write_settings(self, settings):
+        if 'power_preset' in settings:
+            pp = settings['power_preset']
             log.debug("Setting Magnetometer power preset to {0}".format(pp))
             libmetawear.mbl_mw_mag_bmm150_set_preset(self.board, pp)
-            self.current_power_preset = pp
+            self.written_settings.update(settings)
 
     @require_bmm150
-    def notifications(self, callback=None):
+    def notifications(self, callback=None, batch_size=None,
+                      batch_interval=None):
         """Subscribe or unsubscribe to magnetometer notifications.
 
         Convenience method for handling magnetometer usage.
@@ -157,6 +187,12 @@ class MagnetometerModule(PyMetaWearLoggingModule):
 
         :param callable callback: Magnetometer notification callback function.
             If `None`, unsubscription to magnetometer notifications is registered.
+        :param int batch_size: If given, the callback is called with lists
+            of this many samples instead of once per sample.
+        :param float batch_interval: If given, the callback is called with
+            lists of the samples received during at most this many
+            milliseconds. Can be combined with ``batch_size``, in which case
+            the batch is delivered on whichever limit is reached first.
 
         """
         if callback is None:
@@ -164,7 +200,11 @@ class MagnetometerModule(PyMetaWearLoggingModule):
             self.toggle_sampling(False)
             super(MagnetometerModule, self).notifications(None)
         else:
-            super(MagnetometerModule, self).notifications(data_handler(callback))
+            handler = data_handler(
+                batched(callback, batch_size, batch_interval))
+            if self.packed_stream:
+                handler = packed_timestamps(handler, self.sample_period)
+            super(MagnetometerModule, self).notifications(handler)
             self.toggle_sampling(True)
             self.start()
 
@@ -14,19 +14,53 @@ from __future__ import absolute_import
 
 import warnings
 import logging
-from threading import Event
+from contextlib import contextmanager
 
 from pymetawear import libmetawear
 from pymetawear.exceptions import PyMetaWearException
 from mbientlab.metawear.cbindings import SensorFusionAccRange, \
     SensorFusionData, SensorFusionGyroRange, SensorFusionMode, \
-    SensorOrientation, FnVoid_VoidP_VoidP, FnVoid_VoidP_DataP, TimeMode
-from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, data_handler, context_callback
+    SensorOrientation, FnVoid_VoidP_DataP, TimeMode
+from pymetawear.modules.base import PyMetaWearLoggingModule, Modules, \
+    data_handler, close_sink
+from pymetawear.processors import create_processor
+from pymetawear.sinks import FanOut, SampleQueue, batched
 
 log = logging.getLogger(__name__)
 PROCESSOR_SET_WAIT_TIME = 5
 
 
+_MODES = dict((k, v) for k, v in vars(SensorFusionMode).items()
+              if not k.startswith('_'))
+
+# The data sources, named as the callback arguments of notifications.
+_DATA_SOURCES = {
+    'corrected_acc': SensorFusionData.CORRECTED_ACC,
+    'corrected_gyro': SensorFusionData.CORRECTED_GYRO,
+    'corrected_mag': SensorFusionData.CORRECTED_MAG,
+    'quaternion': SensorFusionData.QUATERNION,
+    'euler_angle': SensorFusionData.EULER_ANGLE,
+    'gravity': SensorFusionData.GRAVITY_VECTOR,
+    'linear_acc': SensorFusionData.LINEAR_ACC,
+}
+
+
+def _ranges(range_class, unit):
+    # Ranges in the given unit, mapped to their constants, e.g. 8.0: _8G.
+    return dict((float(k[1:-len(unit)]), v)
+                for k, v in vars(range_class).items()
+                if k.startswith('_') and k.endswith(unit))
+
+
+def _get_range(range_class, unit, value):
+    ranges = _ranges(range_class, unit)
+    if float(value) not in ranges:
+        raise ValueError(
+            "Requested range ({0}) was not part of possible values: "
+            "{1}".format(value, sorted(ranges)))
+    return ranges[float(value)]
+
+
 def require_fusion_module(f):
     def wrapper(*args, **kwargs):
         if getattr(args[0], 'available', False) is False:
@@ -47,12 +81,16 @@ class SensorFusionModule(PyMetaWearLoggingModule):
 
     """
 
+    _setting_parsers = {'mode': '_get_mode', 'acc_range': '_get_acc_range',
+                        'gyro_range': '_get_gyro_range'}
+
     def __init__(self, board, module_id):
         super(SensorFusionModule, self).__init__(board)
         self.module_id = module_id
 
         if self.module_id == Modules.MBL_MW_MODULE_NA:
             # No sensor fusion present!
+            self.is_present = False
             self.available = False
         else:
             self.available = True
@@ -84,6 +122,7 @@ class SensorFusionModule(PyMetaWearLoggingModule):
 
         self._callbacks = {}
         self._calibration_state_callback = None
+        self._fanouts = {}
 
     def __str__(self):
         return "{0}".format(self.module_name)
@@ -118,31 +157,9 @@ class SensorFusionModule(PyMetaWearLoggingModule):
             log.debug("Creating time dataprocessor for signal {0}".format(
                 self._data_source_signals[data_source]
             ))
-            _done = Event()
-
-            def _processor_set(context, processor):
-                """
-                Set global variables as the libmetawear callback can't handle the self
-                parameter of instance methods.
-
-                :param context: Pointer to additional data for the callback function
-                :param processor: The processor that was created
-
-                """
-                self._data_source_signals[data_source] = processor
-                _done.set()
-
-            processor_set_func = FnVoid_VoidP_VoidP(_processor_set)
-            libmetawear.mbl_mw_dataprocessor_time_create(
-                self._data_source_signals[data_source],
-                mode,
-                delay,
-                None,
-                processor_set_func)
-            _done.wait(timeout=PROCESSOR_SET_WAIT_TIME)
-
-            if self._data_source_signals[data_source] is None:
-                raise PyMetaWearException("Can't set data processor!")
+            self._data_source_signals[data_source] = create_processor(
+                'time', self._data_source_signals[data_source], mode, delay,
+                timeout=PROCESSOR_SET_WAIT_TIME)
         else:
             data_signal = libmetawear.mbl_mw_sensor_fusion_get_data_signal(
                     self.board, data_source)
@@ -152,27 +169,50 @@ class SensorFusionModule(PyMetaWearLoggingModule):
                 )
                 self._data_source_signals[data_source] = data_signal
 
-    def _delay_set(self, processor):
-        self._current_processor = processor
-        self._waiting_for_processor = False
-
     @require_fusion_module
     def set_mode(self, mode):
+        if self.written_settings.get('mode') == mode:
+            return
         libmetawear.mbl_mw_sensor_fusion_set_mode(self.board,
                                                   mode)
         libmetawear.mbl_mw_sensor_fusion_write_config(self.board)
+        self.written_settings['mode'] = mode
 
     @require_fusion_module
     def set_acc_range(self, acc_range):
+        if self.written_settings.get('acc_range') == acc_range:
+            return
         libmetawear.mbl_mw_sensor_fusion_set_acc_range(self.board,
                                                        acc_range)
         libmetawear.mbl_mw_sensor_fusion_write_config(self.board)
+        self.written_settings['acc_range'] = acc_range
 
     @require_fusion_module
     def set_gyro_range(self, gyro_range):
+        if self.written_settings.get('gyro_range') == gyro_range:
+            return
         libmetawear.mbl_mw_sensor_fusion_set_gyro_range(self.board,
                                                         gyro_range)
         libmetawear.mbl_mw_sensor_fusion_write_config(self.board)
+        self.written_settings['gyro_range'] = gyro_range
+
+    def _get_mode(self, value):
+        try:
+            key = value.upper()
+        except AttributeError:
+            # A SensorFusionMode constant.
+            key = next((k for k in _MODES if _MODES[k] == value), None)
+        if key not in _MODES:
+            raise ValueError(
+                "Requested mode ({0}) was not part of possible values: "
+                "{1}".format(value, sorted(k.lower() for k in _MODES)))
+        return _MODES[key]
+
+    def _get_acc_range(self, value):
+        return _get_range(SensorFusionAccRange, 'G', value)
+
+    def _get_gyro_range(self, value):
+        return _get_range(SensorFusionGyroRange, 'DPS', value)
 
     @require_fusion_module
     def get_data_signal(self, data_source):
@@ -204,13 +244,51 @@ class SensorFusionModule(PyMetaWearLoggingModule):
         return "Sensor Fusion"
 
     def get_current_settings(self):
-        raise NotImplementedError()
+        return dict(self.written_settings)
 
     def get_possible_settings(self):
-        raise NotImplementedError()
+        return {
+            'mode': sorted(k.lower() for k in _MODES),
+            'acc_range': sorted(_ranges(SensorFusionAccRange, 'G')),
+            'gyro_range': sorted(_ranges(SensorFusionGyroRange, 'DPS')),
+        }
 
-    def set_settings(self):
-        raise NotImplementedError()
+    @require_fusion_module
+    def set_settings(self, mode=None, acc_range=None, gyro_range=None):
+        """Set sensor fusion settings.
+
+        All given settings are written to the board together, whereas
+        :meth:`set_mode`, :meth:`set_acc_range` and :meth:`set_gyro_range`
+        make one write each.
+
+        .. code-block:: python
+
+            mwclient.sensorfusion.set_settings(mode='ndof', acc_range=8.0,
+                                               gyro_range=1000.0)
+
+        :param mode: The fusion mode, e.g. ``'ndof'`` or ``'imu_plus'``, or
+            a ``SensorFusionMode`` constant.
+        :param float acc_range: The accelerometer range in the unit ``g``.
+        :param float gyro_range: The gyroscope range in the unit ``dps``.
+
+        """
+        self._write_settings(self.changed_settings(
+            mode=mode, acc_range=acc_range, gyro_range=gyro_range))
+
+    def _write_settings(self, settings):
+        if 'mode' in settings:
+            libmetawear.mbl_mw_sensor_fusion_set_mode(
+                self.board, settings['mode'])
+        if 'acc_range' in settings:
+            libmetawear.mbl_mw_sensor_fusion_set_acc_range(
+                self.board, settings['acc_range'])
+        if 'gyro_range' in settings:
+            libmetawear.mbl_mw_sensor_fusion_set_gyro_range(
+                self.board, settings['gyro_range'])
+        if settings:
+            log.debug("Writing Sensor Fusion settings {0}".format(settings))
+            libmetawear.mbl_mw_sensor_fusion_write_config(self.board)
+            self.written_settings.update(settings)
 
     def read_calibration_state(self):
         """Triggers the calibration state notification.
@@ -234,7 +312,9 @@ class SensorFusionModule(PyMetaWearLoggingModule):
                       euler_angle_callback=None,
                       gravity_callback=None,
                       linear_acc_callback=None,
-                      calibration_state_callback=None):
+                      calibration_state_callback=None,
+                      batch_size=None,
+                      batch_interval=None):
         """Subscribe or unsubscribe to sensor fusion notifications.
 
         Convenience method for handling sensor fusion usage.
@@ -281,6 +361,13 @@ class SensorFusionModule(PyMetaWearLoggingModule):
             callback function.
             If `None`, unsubscription to calibration state notifications is
             registered.
+        :param int batch_size: If given, the data stream callbacks are called
+            with lists of this many samples instead of once per sample.
+        :param float batch_interval: If given, the data stream callbacks are
+            called with lists of the samples received during at most this
+            many milliseconds. Can be combined with ``batch_size``, in which
+            case a batch is delivered on whichever limit is reached first.
+            Batching does not apply to the calibration state callback.
 
         """
         callback_data_source_map = {
@@ -314,7 +401,8 @@ class SensorFusionModule(PyMetaWearLoggingModule):
             if callback is not None:
                 self.check_and_change_callback(
                     self.get_data_signal(data_source),
-                    data_handler(callback)
+                    data_handler(
+                        batched(callback, batch_size, batch_interval))
                 )
             else:
                 self.check_and_change_callback(
@@ -335,8 +423,135 @@ class SensorFusionModule(PyMetaWearLoggingModule):
             self.toggle_sampling(True)
             self.start()
 
+    @require_fusion_module
+    def source_notifications(self, data_source, callback=None,
+                             batch_size=None, batch_interval=None):
+        """Subscribe or unsubscribe to the notifications of one data source.
+
+        Unlike :meth:`notifications`, the subscriptions of the other data
+        sources and of the calibration state are left as they are. Removing
+        a data source briefly stops the sensor fusion, to take the data
+        source out of its output.
+
+        .. code-block:: python
+
+            mwclient.sensorfusion.source_notifications(
+                'euler_angle', handle_notification)
+
+        :param str data_source: The data source, named as the callback
+            arguments of :meth:`notifications` without the ``_callback``
+            suffix, e.g. ``'quaternion'``, ``'euler_angle'`` or
+            ``'corrected_acc'``.
+        :param callable callback: Notification callback function.
+            If `None`, unsubscription to the data source is registered.
+        :param int batch_size: As for :meth:`notifications`.
+        :param float batch_interval: As for :meth:`notifications`.
+
+        """
+        if data_source not in _DATA_SOURCES:
+            raise ValueError(
+                "Requested data source ({0}) was not part of possible "
+                "values: {1}".format(data_source, sorted(_DATA_SOURCES)))
+        source = _DATA_SOURCES[data_source]
+        data_signal = self.get_data_signal(source)
+        if callback is not None:
+            self._streams_to_enable[source] = True
+            self.current_active_signal = data_signal
+            self.check_and_change_callback(
+                data_signal,
+                data_handler(batched(callback, batch_size, batch_interval)))
+            libmetawear.mbl_mw_sensor_fusion_enable_data(self.board, source)
+            self.start()
+        else:
+            self._streams_to_enable[source] = False
+            self.check_and_change_callback(data_signal, None)
+            # The output of a data source can only be disabled by clearing
+            # all of them, so the remaining ones are enabled again.
+            self.stop()
+            self.toggle_sampling(False)
+            if any(self._streams_to_enable.values()):
+                self.toggle_sampling(True)
+                self.start()
+
+    @contextmanager
+    def stream(self, data_source='quaternion', maxsize=1024,
+               overflow='block'):
+        """Iterate over the notifications of a sensor fusion data source.
+
+        .. code-block:: python
+
+            with c.sensorfusion.stream('euler_angle') as samples:
+                for data in samples:
+                    print(data)
+
+        Only the given data source is subscribed to, and unsubscribed from
+        when leaving the block; see :meth:`source_notifications`.
+
+        :param str data_source: The data source, named as in
+            :meth:`source_notifications`.
+        :param int maxsize: Maximal number of samples waiting to be consumed.
+        :param str overflow: What to do when the queue is full:
+            ``'block'`` (default), ``'drop_oldest'`` or ``'drop_newest'``.
+
+        """
+        queue = SampleQueue(maxsize, overflow)
+        self.source_notifications(data_source, queue)
+        try:
+            yield queue
+        finally:
+            self.source_notifications(data_source, None)
+
+    def add_subscriber(self, callback, data_source='quaternion'):
+        """Add a subscriber to the notifications of a data source.
+
+        As :meth:`~pymetawear.modules.base.PyMetaWearModule.add_subscriber`,
+        for the given data source. Only that data source is subscribed to
+        or unsubscribed from, see :meth:`source_notifications`, when it
+        gets its first subscriber or loses its last one. Subscribers of
+        data sources that already have subscribers are added without any
+        communication with the board.
+
+        :param callable callback: Function called with each sample, or a
+            :py:class:`~pymetawear.sinks.DataSink`.
+        :param str data_source: The data source, named as in :meth:`stream`.
+        :return: The subscriber, to be given to :meth:`remove_subscriber`.
+
+        """
+        fanout = self._fanouts.get(data_source)
+        if fanout is not None and not fanout.closed:
+            fanout.add(callback)
+            return callback
+        fanout = FanOut()
+        fanout.add(callback)
+        self.source_notifications(data_source, fanout)
+        self._fanouts[data_source] = fanout
+        return callback
+
+    def remove_subscriber(self, callback, data_source='quaternion'):
+        """Remove a subscriber added by :meth:`add_subscriber`.
+
+        :param callback: The subscriber to remove.
+        :param str data_source: The data source it was added to.
+        :return: ``True`` if the subscriber was found.
+        :rtype: bool
+
+        """
+        fanout = self._fanouts.get(data_source)
+        if fanout is None or not fanout.remove(callback):
+            return False
+        if not len(fanout):
+            del self._fanouts[data_source]
+            self.source_notifications(data_source, None)
+        return True
+
     def check_and_change_callback(self, data_signal, callback):
         if callback is not None:
+            sink = getattr(callback, 'sink', None)
+            if sink is not None and data_signal in self._callbacks and \
+                    getattr(self._callbacks[data_signal][0], 'sink', None) \
+                    is sink:
+                # Already subscribed with this sink, e.g. a fan-out.
+                return
 
             log.debug("Subscribing to {0} changes. (Sig#: {1})".format(
                 self.module_name, data_signal))
@@ -344,8 +559,8 @@ class SensorFusionModule(PyMetaWearLoggingModule):
                 log.debug('Replacing callback for datasignal {0}...'.format(
                     data_signal))
                 libmetawear.mbl_mw_datasignal_unsubscribe(data_signal)
-                self._callbacks.pop(data_signal)
-            callback = context_callback(callback)
+                close_sink(self._callbacks.pop(data_signal)[0])
+            callback = self._subscription_callback(callback)
             self._callbacks[data_signal] = (callback, FnVoid_VoidP_DataP(callback))
             libmetawear.mbl_mw_datasignal_subscribe(
                 data_signal, None, self._callbacks[data_signal][1])
@@ -355,7 +570,25 @@ class SensorFusionModule(PyMetaWearLoggingModule):
             log.debug("Unsubscribing to {0} changes. (Sig#: {1})".format(
                 self.module_name, data_signal))
             libmetawear.mbl_mw_datasignal_unsubscribe(data_signal)
-            self._callbacks.pop(data_signal)
+            close_sink(self._callbacks.pop(data_signal)[0])
+
+    def resubscribe(self, resume=True):
+        """Subscribe to each data signal again with its current callback,
+        e.g. after the connection to the board has been restored.
+
+        :param bool resume: If the sensor fusion should be restarted.
+        :return: ``True`` if there were subscriptions to restore.
+        :rtype: bool
+
+        """
+        if not self._callbacks:
+            return False
+        log.debug("Resubscribing to {0} changes.".format(self.module_name))
+        for data_signal, (_, fn) in self._callbacks.items():
+            libmetawear.mbl_mw_datasignal_subscribe(data_signal, None, fn)
+        if resume:
+            self._resume()
+        return True
 
     @require_fusion_module
     def start(self):
@@ -38,6 +38,43 @@ _CHANNEL_ID_TO_SOURCE_NAME_2 = {
     1: 'External',
 }
 
+_channels_per_model = {}
+
+
+def _get_channel_source_mapping(n_channels):
+    if n_channels == 4:
+        return _CHANNEL_ID_TO_SOURCE_NAME_4
+    elif n_channels == 2:
+        return _CHANNEL_ID_TO_SOURCE_NAME_2
+    else:
+        return _CHANNEL_ID_TO_SOURCE_NAME
+
+
+def _get_channels(board):
+    """Get the number of temperature channels and the channel sources
+    of a board.
+
+    The channels are given by the board model, so the result is cached
+    per model.
+
+    """
+    model = libmetawear.mbl_mw_metawearboard_get_model(board)
+    if model in _channels_per_model:
+        return _channels_per_model[model]
+
+    n_channels = int(
+        libmetawear.mbl_mw_multi_chnl_temp_get_num_channels(board))
+    channel_source_mapping = _get_channel_source_mapping(n_channels)
+    channels = {}
+    for i in range(n_channels):
+        source_enum = libmetawear.mbl_mw_multi_chnl_temp_get_source(board, i)
+        channels[channel_source_mapping.get(source_enum)] = source_enum
+
+    if model >= 0:
+        # Do not cache for boards of unknown model.
+        _channels_per_model[model] = (n_channels, channels)
+    return n_channels, channels
+
 
 class TemperatureModule(PyMetaWearModule):
     """MetaWear Temperature module implementation.
@@ -52,24 +89,14 @@ class TemperatureModule(PyMetaWearModule):
 
         self._active_channel = 0
 
-        self.n_channels = int(
-            libmetawear.mbl_mw_multi_chnl_temp_get_num_channels(self.board))
-        self.channels = {}
-        if self.n_channels == 4:
-            self._channel_source_mapping = _CHANNEL_ID_TO_SOURCE_NAME_4
-        elif self.n_channels == 2:
-            self._channel_source_mapping = _CHANNEL_ID_TO_SOURCE_NAME_2
-        else:
-            self._channel_source_mapping = _CHANNEL_ID_TO_SOURCE_NAME
+        self.n_channels, channels = _get_channels(self.board)
+        self.channels = dict(channels)
+        self._channel_source_mapping = _get_channel_source_mapping(
+            self.n_channels)
 
         self._reverse_channel_source_mapping = {
             v: k for k, v in self._channel_source_mapping.items()}
 
-        for i in range(self.n_channels):
-            source_enum = libmetawear.mbl_mw_multi_chnl_temp_get_source(
-                self.board, i)
-            self.channels[self._channel_source_mapping.get(source_enum)] = source_enum
-
     def __str__(self):
         return "{0}".format(self.module_name)
 
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Data processors
+---------------
+
+Chains of data processors run on the MetaWear board, e.g. to average,
+filter or threshold a data signal before it is sent over Bluetooth.
+
+.. code-block:: python
+
+    from pymetawear.processors import Pipeline
+
+    # Send the 8 sample moving average of the acceleration magnitude,
+    # at most every 100 ms.
+    with Pipeline(c.accelerometer).rss().average(8).time(100) as magnitude:
+        magnitude.notifications(print)
+        time.sleep(10.0)
+        magnitude.notifications(None)
+
+A pipeline is a module in its own right: it can be used with
+``notifications``, ``stream``, ``add_subscriber`` and, for source
+modules that support logging, ``start_logging`` and ``download_log``.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import logging
+from functools import wraps
+from threading import Event, Lock
+
+from pymetawear import libmetawear
+from pymetawear.exceptions import PyMetaWearException
+from pymetawear.decoding import decode, decode_counter
+from pymetawear.modules.base import PyMetaWearLoggingModule, data_handler, \
+    counter_timestamps
+from pymetawear.sinks import DataSink
+from mbientlab.metawear.cbindings import FnVoid_VoidP_VoidP, \
+    ThresholdMode, ComparatorOperation, DeltaMode, MathOperation, \
+    PassthroughMode, TimeMode
+
+log = logging.getLogger(__name__)
+
+#: Time in seconds to wait for the board to create a processor.
+PROCESSOR_CREATE_TIMEOUT = 5.0
+
+# The done events and ctypes handlers of processor creations. libmetawear
+# calls a handler when the board responds, also after create_processor has
+# timed out, so handlers are kept until a later creation finds them done.
+_create_handlers = []
+_create_handlers_lock = Lock()
+
+
+def create_processor(kind, source, *args, **kwargs):
+    """Create a data processor on the board and wait for it.
+
+    :param str kind: The processor type, as in the name of the
+        ``mbl_mw_dataprocessor_<kind>_create`` function, e.g. ``'average'``.
+    :param source: The data signal to process.
+    :param args: The arguments of the create function between the data
+        signal and the context.
+    :param float timeout: Time in seconds to wait for the processor.
+        Default is :py:data:`PROCESSOR_CREATE_TIMEOUT`.
+    :param str function: Name of the create function, if it does not
+        follow the naming above.
+    :return: The processor, which is also a data signal.
+    :raises PyMetaWearException: If the processor could not be created.
+
+    """
+    timeout = kwargs.pop('timeout', PROCESSOR_CREATE_TIMEOUT)
+    function = kwargs.pop('function', None) or \
+        'mbl_mw_dataprocessor_{0}_create'.format(kind)
+    done = Event()
+    result = []
+
+    def created(context, processor):
+        result.append(processor)
+        done.set()
+
+    handler = FnVoid_VoidP_VoidP(created)
+    with _create_handlers_lock:
+        _create_handlers[:] = [(e, h) for e, h in _create_handlers
+                               if not e.is_set()]
+        _create_handlers.append((done, handler))
+    create = getattr(libmetawear, function)
+    create(*((source, ) + args + (None, handler)))
+    if not done.wait(timeout):
+        raise PyMetaWearException(
+            "Timed out creating {0} processor.".format(kind))
+    if not result[0]:
+        raise PyMetaWearException(
+            "Could not create {0} processor.".format(kind))
+    log.debug("Created {0} processor {1} on signal {2}".format(
+        kind, result[0], source))
+    return result[0]
+
+
+def _mode(enum, value):
+    # Accept both the cbindings constants and their names.
+    if isinstance(value, str):
+        return getattr(enum, value.upper())
+    return value
+
+
+def _counter_handler(func):
+    # As data_handler, adding the accounter counter to the samples.
+    @wraps(func)
+    def wrapper(data):
+        sample = decode(data)
+        sample['counter'] = decode_counter(data)
+        func(sample)
+
+    return wrapper
+
+
+class Pipeline(PyMetaWearLoggingModule):
+    """A chain of data processors on the data signal of a module.
+
+    Each processor method creates a processor on the board, fed by the
+    previous one, and returns the pipeline so that calls can be chained.
+    The processors are removed from the board by :meth:`remove`, or when
+    a ``with`` block using the pipeline is left.
+
+    :param module: The module whose data signal is processed.
+    :param data_signal: The data signal to process, if not the
+        ``data_signal`` of the module.
+    :param float timeout: Time in seconds to wait for the board to create
+        each processor.
+
+    """
+
+    def __init__(self, module, data_signal=None,
+                 timeout=PROCESSOR_CREATE_TIMEOUT):
+        super(Pipeline, self).__init__(module.board)
+        self.module = module
+        self.source = module.data_signal if data_signal is None \
+            else data_signal
+        self.timeout = timeout
+        self.processors = []
+        self.steps = []
+        self._accounter = None
+
+    def __str__(self):
+        return self.module_name
+
+    def __repr__(self):
+        return "<Pipeline {0}>".format(self.module_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.remove()
+
+    @property
+    def module_name(self):
+        return ' -> '.join([self.module.module_name] + self.steps)
+
+    @property
+    def data_signal(self):
+        """The output of the last processor in the pipeline."""
+        return self.processors[-1] if self.processors else self.source
+
+    def add(self, kind, *args, **kwargs):
+        """Add a processor to the pipeline.
+
+        :param str kind: The processor type, as in the name of the
+            ``mbl_mw_dataprocessor_<kind>_create`` function.
+        :param args: The arguments of the create function between the
+            data signal and the context.
+        :param str function: Name of the create function, if it does not
+            follow the naming above.
+
+        """
+        self.processors.append(create_processor(
+            kind, self.data_signal, *args, timeout=self.timeout,
+            function=kwargs.get('function')))
+        self.steps.append(kind)
+        return self
+
+    def accounter(self, mode='time', period=None):
+        """Let the board add its clock tick or a sample count to each sample.
+
+        In ``'time'`` mode, ``libmetawear`` computes the epochs of the
+        samples from the board clock tick instead of the time they were
+        received. In ``'count'`` mode, the epochs are reconstructed from
+        the sample count, see
+        :func:`~pymetawear.modules.base.counter_timestamps`. In both modes,
+        samples given to callbacks have the tick or count in a ``counter``
+        entry.
+
+        This should be the last step of the pipeline, and is meant for
+        streaming; logged samples already get epochs from the board clock.
+
+        :param str mode: ``'time'`` or ``'count'``.
+        :param float period: Time in milliseconds between counted samples.
+            Defaults to the ``sample_period`` of the module, if it has one.
+
+        """
+        if mode not in ('time', 'count'):
+            raise ValueError("Unknown accounter mode: {0}".format(mode))
+        function = 'mbl_mw_dataprocessor_accounter_create'
+        if mode == 'count':
+            function += '_count'
+        self.add('accounter', function=function)
+        self._accounter = (mode, period)
+        return self
+
+    def average(self, size):
+        """Moving average over ``size`` samples."""
+        return self.add('average', size)
+
+    def lowpass(self, size):
+        """Low-pass filter, i.e. moving average over ``size`` samples."""
+        return self.add('lowpass', size)
+
+    def highpass(self, size):
+        """High-pass filter, subtracting the moving average over ``size``
+        samples."""
+        return self.add('highpass', size)
+
+    def rms(self):
+        """Root mean square of the components of each sample."""
+        return self.add('rms')
+
+    def rss(self):
+        """Root sum square, i.e. magnitude, of each sample."""
+        return self.add('rss')
+
+    def threshold(self, boundary, hysteresis=0.0, mode='absolute'):
+        """Only let samples crossing a boundary through.
+
+        :param float boundary: The boundary value.
+        :param float hysteresis: Distance from the boundary a sample has
+            to be to count as a crossing.
+        :param mode: ``'absolute'`` to output the samples as they are or
+            ``'binary'`` to output 1 or -1 for the direction of the
+            crossing. A ``ThresholdMode`` constant can also be given.
+
+        """
+        return self.add('threshold', _mode(ThresholdMode, mode),
+                        boundary, hysteresis)
+
+    def comparator(self, operation, reference):
+        """Only let samples satisfying a comparison through.
+
+        :param operation: ``'eq'``, ``'neq'``, ``'lt'``, ``'lte'``,
+            ``'gt'`` or ``'gte'``, or a ``ComparatorOperation`` constant.
+        :param float reference: The value to compare with.
+
+        """
+        return self.add('comparator',
+                        _mode(ComparatorOperation, operation), reference)
+
+    def delta(self, magnitude, mode='absolute'):
+        """Only let samples that differ enough from the last one through.
+
+        :param float magnitude: Minimal difference.
+        :param mode: ``'absolute'``, ``'differential'`` or ``'binary'``,
+            or a ``DeltaMode`` constant.
+
+        """
+        return self.add('delta', _mode(DeltaMode, mode), magnitude)
+
+    def math(self, operation, rhs=0.0):
+        """Apply an arithmetic operation to each sample.
+
+        :param operation: E.g. ``'add'``, ``'multiply'`` or ``'abs_value'``,
+            or a ``MathOperation`` constant.
+        :param float rhs: Right hand side of the operation.
+
+        """
+        return self.add('math', _mode(MathOperation, operation), rhs)
+
+    def time(self, period, differential=False):
+        """Only let a sample through every ``period`` milliseconds,
+        reducing the data rate.
+
+        :param int period: Minimal time in milliseconds between samples.
+        :param bool differential: Output the difference from the previous
+            sample instead of the sample itself.
+
+        """
+        mode = TimeMode.DIFFERENTIAL if differential else TimeMode.ABSOLUTE
+        return self.add('time', mode, period)
+
+    def passthrough(self, count, mode='count'):
+        """Let a limited number of samples through.
+
+        :param int count: Number of samples, for the ``'count'`` mode.
+        :param mode: ``'all'``, ``'conditional'`` or ``'count'``, or a
+            ``PassthroughMode`` constant.
+
+        """
+        return self.add('passthrough', _mode(PassthroughMode, mode), count)
+
+    def accumulator(self):
+        """Running sum of the samples."""
+        return self.add('accumulator')
+
+    def counter(self):
+        """Count the samples."""
+        return self.add('counter')
+
+    def notifications(self, callback=None):
+        """Subscribe or unsubscribe to the output of the pipeline.
+
+        The source module is started when subscribing and stopped when
+        unsubscribing.
+
+        :param callable callback: Function called with each processed
+            sample, or a :py:class:`~pymetawear.sinks.DataSink`. If
+            ``None``, an unsubscription is registered.
+
+        """
+        if callback is None:
+            self.stop()
+            self.toggle_sampling(False)
+            super(Pipeline, self).notifications(None)
+        else:
+            super(Pipeline, self).notifications(self._handler(callback))
+            self.toggle_sampling(True)
+            self.start()
+
+    def _handler(self, callback):
+        if self._accounter is None:
+            return data_handler(callback)
+        if isinstance(callback, DataSink):
+            handler = data_handler(callback)
+        else:
+            handler = _counter_handler(callback)
+        mode, period = self._accounter
+        if mode == 'count':
+            period = period or getattr(self.module, 'sample_period', None)
+            if period:
+                handler = counter_timestamps(handler, period)
+            else:
+                log.warning("No sample period known for {0}; keeping the "
+                            "epochs of the samples.".format(self.module_name))
+        return handler
+
+    def start(self):
+        self.module.start()
+
+    def stop(self):
+        self.module.stop()
+
+    def toggle_sampling(self, enabled=True):
+        try:
+            self.module.toggle_sampling(enabled)
+        except NotImplementedError:
+            # The module has no separate sampling switch.
+            pass
+
+    def remove(self):
+        """Unsubscribe and remove the processors of the pipeline from the
+        board."""
+        if self.callback is not None:
+            self.notifications(None)
+        if self.processors:
+            # Removing a processor also removes the ones fed by it.
+            log.debug("Removing processors of {0}".format(self.module_name))
+            libmetawear.mbl_mw_dataprocessor_remove(self.processors[0])
+        self.processors = []
+        self.steps = []
+        self._accounter = None
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Reconnect supervisor
+--------------------
+
+Reconnects a :py:class:`~pymetawear.client.MetaWearClient` when the link to
+the board is lost, and replays the settings, subscriptions and loggers of its
+modules onto the board.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import logging
+from collections import namedtuple
+from threading import Event, Lock, Thread
+
+from pymetawear import libmetawear
+
+log = logging.getLogger(__name__)
+
+
+class ReconnectIncident(namedtuple('ReconnectIncident', [
+        'disconnected_at', 'recovered_at', 'attempts', 'samples_lost',
+        'error'])):
+    """A lost connection handled by a :py:class:`ReconnectSupervisor`.
+
+    :param float disconnected_at: Time the link was lost, as given by
+        :py:func:`time.time`.
+    :param float recovered_at: Time the subscriptions and loggers were
+        restored, or ``None`` if recovering failed.
+    :param int attempts: Number of connection attempts made.
+    :param dict samples_lost: Estimated number of samples not streamed
+        while disconnected, keyed on the module names of the client.
+        Only modules with a known sample rate are included. Logged samples
+        are kept on the board and not counted.
+    :param Exception error: The last error, if recovering failed.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def recovered(self):
+        """``True`` if the connection was restored."""
+        return self.recovered_at is not None
+
+    @property
+    def time_to_recover(self):
+        """Seconds from losing the link until it was restored, or ``None``
+        if recovering failed."""
+        if self.recovered_at is None:
+            return None
+        return self.recovered_at - self.disconnected_at
+
+
+class ReconnectSupervisor(object):
+    """Reconnects a client when its link to the board is lost.
+
+    .. code-block:: python
+
+        from pymetawear.client import MetaWearClient
+        from pymetawear.reconnect import ReconnectSupervisor
+
+        c = MetaWearClient('DD:3A:7D:4D:56:F0')
+        c.accelerometer.notifications(callback)
+        with ReconnectSupervisor(c, max_attempts=10) as supervisor:
+            ...
+            for incident in supervisor.incidents:
+                print(incident.time_to_recover, incident.samples_lost)
+
+    When the link drops, the client is connected again with exponential
+    backoff between the attempts. Once connected, the settings written to
+    the modules are written again, loggers are looked up and restarted if
+    they were running, and all active subscriptions, including those of the
+    sensor fusion module, are renewed with their current callbacks.
+    Disconnects made with :py:meth:`~pymetawear.client.MetaWearClient.disconnect`
+    are not handled.
+
+    With a ``pool``, the client is connected through
+    :py:meth:`~pymetawear.adapters.AdapterPool.connect`. The pool only moves
+    clients without subscriptions or loggers to another adapter, so clients
+    streaming or logging reconnect through the adapter they had.
+
+    :param client: The :py:class:`~pymetawear.client.MetaWearClient` to
+        supervise.
+    :param int max_attempts: Maximal number of connection attempts per
+        incident. Default is ``None``, i.e. try until stopped.
+    :param float initial_delay: Seconds to wait after the first failed
+        attempt.
+    :param float max_delay: Maximal seconds between two attempts.
+    :param float backoff: Factor the delay grows with after each failed
+        attempt.
+    :param bool restore_settings: If the settings written to the modules
+        should be written again after reconnecting, in case the board has
+        been reset. Default is ``True``.
+    :param callable on_recovered: Function called with each
+        :py:class:`ReconnectIncident` that was recovered from.
+    :param callable on_failed: Function called with each
+        :py:class:`ReconnectIncident` that was not recovered from.
+    :param pool: The :py:class:`~pymetawear.adapters.AdapterPool` of the
+        client, if it has one.
+
+    """
+
+    def __init__(self, client, max_attempts=None, initial_delay=0.5,
+                 max_delay=30.0, backoff=2.0, restore_settings=True,
+                 on_recovered=None, on_failed=None, pool=None):
+        self.client = client
+        self.pool = pool
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.restore_settings = restore_settings
+        self.on_recovered = on_recovered
+        self.on_failed = on_failed
+        #: The handled incidents, as :py:class:`ReconnectIncident`.
+        self.incidents = []
+
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread = None
+        self._previous_handler = None
+        self._started = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __repr__(self):
+        return "<ReconnectSupervisor, {0}, {1} incidents>".format(
+            self.client._address, len(self.incidents))
+
+    @property
+    def recovering(self):
+        """``True`` while reconnecting after a lost link."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start handling lost links of the client."""
+        if self._started:
+            return
+        self._stopped.clear()
+        self._previous_handler = self.client.mw.on_disconnect
+        self.client.mw.on_disconnect = self._on_disconnect
+        self._started = True
+
+    def stop(self, timeout=None):
+        """Stop handling lost links, and any ongoing reconnection.
+
+        :param float timeout: Maximal time in seconds to wait for an ongoing
+            reconnection attempt to finish.
+
+        """
+        self._stopped.set()
+        if self._started:
+            self.client.mw.on_disconnect = self._previous_handler
+            self._started = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _on_disconnect(self, status):
+        if self._previous_handler is not None:
+            self._previous_handler(status)
+        if self.client._disconnect_requested or self._stopped.is_set():
+            return
+        with self._lock:
+            if self.recovering:
+                return
+            log.warning("Lost connection to {0} (status {1}).".format(
+                self.client._address, status))
+            self._thread = Thread(target=self._recover, args=(time.time(),),
+                                  name="PyMetaWear reconnect {0}".format(
+                                      self.client._address))
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _recover(self, disconnected_at):
+        attempts, error = self._reconnect()
+        recovered_at = samples_lost = None
+        if error is None:
+            try:
+                resubscribed = self.restore()
+            except Exception as e:
+                log.error("Could not restore {0}: {1!r}".format(
+                    self.client._address, e))
+                error = e
+            else:
+                recovered_at = time.time()
+                samples_lost = _samples_lost(
+                    resubscribed, recovered_at - disconnected_at)
+        incident = ReconnectIncident(disconnected_at, recovered_at, attempts,
+                                     samples_lost, error)
+        self.incidents.append(incident)
+        if incident.recovered:
+            log.info("Reconnected to {0} in {1:.2f} s after {2} attempts, "
+                     "samples lost: {3}".format(
+                         self.client._address, incident.time_to_recover,
+                         attempts, samples_lost))
+            callback = self.on_recovered
+        else:
+            log.error("Could not reconnect to {0} after {1} attempts.".format(
+                self.client._address, attempts))
+            callback = self.on_failed
+        if callback is not None:
+            callback(incident)
+
+    def _reconnect(self):
+        # Connect with backoff. Returns the number of attempts and the last
+        # error, which is None on success.
+        attempts = 0
+        delay = self.initial_delay
+        error = None
+        while self.max_attempts is None or attempts < self.max_attempts:
+            if attempts and self._stopped.wait(delay):
+                break
+            attempts += 1
+            try:
+                if self.pool is None:
+                    self.client.connect()
+                else:
+                    self.pool.connect(self.client)
+            except Exception as e:
+                log.debug("Reconnect attempt {0} to {1} failed: {2!r}".format(
+                    attempts, self.client._address, e))
+                error = e
+                delay = min(delay * self.backoff, self.max_delay)
+            else:
+                return attempts, None
+        return attempts, error
+
+    def restore(self):
+        """Replay the state of the modules of the client onto the board.
+
+        Called after reconnecting; can also be called after the board has
+        been reset while connected.
+
+        :return: The modules whose subscriptions were renewed, keyed on
+            their names in the client.
+        :rtype: dict
+
+        """
+        modules = dict(self.client._modules)
+        if self.restore_settings:
+            for module in modules.values():
+                module.restore_settings()
+        logging = dict(
+            (name, module) for name, module in modules.items()
+            if hasattr(module, 'reattach_logger') and
+            module.reattach_logger(resume=False) and module.is_logging)
+        resubscribed = dict((name, module) for name, module in modules.items()
+                            if module.resubscribe(resume=False))
+        # Logging is started for the whole board, and each module is
+        # resumed once, also if it both logs and streams.
+        if logging:
+            libmetawear.mbl_mw_logging_start(self.client.board, 0)
+        for name, module in modules.items():
+            if name in logging or name in resubscribed:
+                module._resume()
+        return resubscribed
+
+
+def _samples_lost(modules, downtime):
+    # Samples that would have been streamed during downtime seconds.
+    lost = {}
+    for name, module in modules.items():
+        period = getattr(module, 'sample_period', None)
+        if period:
+            lost[name] = int(downtime * 1000.0 / period)
+    return lost
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Background scanner
+------------------
+
+A BLE scan running in the background, keeping a table of the devices in
+range, so that decisions on e.g. reconnecting boards can be made at once
+from an up-to-date view instead of a new scan.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import logging
+import platform
+from collections import namedtuple
+from threading import Condition, Event, Lock, Thread
+
+from pymetawear.discover import UNKNOWN_NAME, _scanners
+
+log = logging.getLogger(__name__)
+
+
+class ScannedDevice(namedtuple('ScannedDevice',
+                               ['address', 'name', 'rssi', 'last_seen'])):
+    """A device seen by a :py:class:`BackgroundScanner`.
+
+    :param str address: MAC address of the device.
+    :param str name: Advertised name, or ``'(unknown)'``.
+    :param int rssi: Signal strength in dBm of the latest advertisement,
+        or ``None`` if the scan method does not report it.
+    :param float last_seen: Time of the latest advertisement, as given by
+        :py:func:`time.time`.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def age(self):
+        """Seconds since the device was last seen."""
+        return time.time() - self.last_seen
+
+
+class BackgroundScanner(object):
+    """BLE scan running on a thread, with a table of the devices seen.
+
+    .. code-block:: python
+
+        from pymetawear.scanner import BackgroundScanner
+
+        with BackgroundScanner(ttl=30.0) as scanner:
+            ...
+            if 'DD:3A:7D:4D:56:F0' in scanner:
+                c.connect()
+            print(scanner.devices)
+
+    Devices not seen for ``ttl`` seconds are removed from the table. All
+    methods are thread safe and return at once, except :meth:`wait_for`.
+
+    :param float ttl: Seconds a device is kept after its latest
+        advertisement.
+    :param str method: ``'hcitool'`` or ``'warble'``, see
+        :py:func:`~pymetawear.discover.iter_devices`. Only PyWarble reports
+        the RSSI.
+    :param str device: The Bluetooth device to scan with, e.g. ``'hci1'``.
+    :param bool record: If the advertisements should be kept in
+        :attr:`recording`, e.g. for replaying with :py:class:`FakeScanner`.
+
+    """
+
+    def __init__(self, ttl=60.0, method=None, device=None, record=False):
+        if method is None:
+            method = 'warble' if platform.uname()[0] == 'Windows' \
+                else 'hcitool'
+        if method not in _scanners:
+            raise ValueError("Unknown scan method: {0}".format(method))
+        self.ttl = ttl
+        self.method = method
+        self.device = device
+        #: The advertisements received, as tuples of seconds since the
+        #: start of the scan, address, name and RSSI, if ``record`` is set.
+        self.recording = [] if record else None
+        #: The exception that ended the scan, if any.
+        self.error = None
+        #: Number of advertisements received.
+        self.n_advertisements = 0
+
+        self._lock = Lock()
+        self._updated = Condition(self._lock)
+        self._devices = {}
+        self._stopped = Event()
+        self._thread = None
+        self._started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def __repr__(self):
+        return "<BackgroundScanner {0}, {1} devices>".format(
+            self.method, len(self))
+
+    def __len__(self):
+        return len(self.devices)
+
+    def __contains__(self, address):
+        return self.get(address) is not None
+
+    @property
+    def running(self):
+        """``True`` while the scan is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start scanning."""
+        if self.running:
+            return
+        self._stopped.clear()
+        self._started = time.time()
+        self.error = None
+        self._thread = Thread(target=self._run,
+                              name="PyMetaWear scanner {0}".format(
+                                  self.device or self.method))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop scanning. The device table is kept.
+
+        :param float timeout: Maximal time in seconds to wait for the scan
+            to stop.
+
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _scan(self, stopped):
+        # Yield (address, name, rssi) of each advertisement until stopped.
+        return _scanners[self.method](None, self.device, stopped)
+
+    def _run(self):
+        try:
+            for address, name, rssi in self._scan(self._stopped):
+                self._update(address, name, rssi)
+        except Exception as e:
+            log.error("Scan with {0} failed: {1!r}".format(self.method, e))
+            self.error = e
+        with self._lock:
+            self._updated.notify_all()
+
+    def _update(self, address, name, rssi):
+        now = time.time()
+        address = address.upper()
+        with self._lock:
+            self.n_advertisements += 1
+            if self.recording is not None:
+                self.recording.append(
+                    (now - self._started, address, name, rssi))
+            known = self._devices.get(address)
+            if known is not None and name == UNKNOWN_NAME:
+                name = known.name
+            self._devices[address] = ScannedDevice(address, name, rssi, now)
+            self._updated.notify_all()
+
+    def _evict(self):
+        # Remove expired devices. Called with the lock held.
+        oldest = time.time() - self.ttl
+        for address in [a for a, d in self._devices.items()
+                        if d.last_seen < oldest]:
+            del self._devices[address]
+
+    @property
+    def devices(self):
+        """The devices in range, keyed on address.
+
+        :rtype: dict
+
+        """
+        with self._lock:
+            self._evict()
+            return dict(self._devices)
+
+    def get(self, address):
+        """Get a device from the table.
+
+        :param str address: MAC address of the device.
+        :return: The device, or ``None`` if it has not been seen within
+            the last ``ttl`` seconds.
+        :rtype: :py:class:`ScannedDevice`
+
+        """
+        with self._lock:
+            self._evict()
+            return self._devices.get(address.upper())
+
+    def wait_for(self, addresses, timeout=None):
+        """Wait until the given devices are in the table.
+
+        :param addresses: MAC addresses of the devices.
+        :param float timeout: Maximal time in seconds to wait.
+        :return: The devices that were found, keyed on address.
+        :rtype: dict
+
+        """
+        addresses = set(a.upper() for a in addresses)
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            while True:
+                self._evict()
+                found = dict((a, self._devices[a]) for a in addresses
+                             if a in self._devices)
+                if len(found) == len(addresses) or not self.running:
+                    return found
+                if deadline is None:
+                    self._updated.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return found
+                    self._updated.wait(remaining)
+
+
+class FakeScanner(BackgroundScanner):
+    """Scanner replaying recorded advertisements, for tests.
+
+    .. code-block:: python
+
+        scanner = FakeScanner([
+            (0.0, 'DD:3A:7D:4D:56:F0', 'MetaWear', -60),
+            (0.5, 'FF:50:35:82:3B:5A', 'MetaWear', -72),
+        ])
+
+    :param advertisements: Tuples of seconds since the start of the scan,
+        address, name and RSSI, e.g. the ``recording`` of a
+        :py:class:`BackgroundScanner`.
+    :param float speed: Replay speed, relative to the recorded times.
+    :param bool loop: If the advertisements should be replayed over and
+        over until the scanner is stopped.
+    :param kwargs: Further keyword arguments to
+        :py:class:`BackgroundScanner`.
+
+    """
+
+    def __init__(self, advertisements, speed=1.0, loop=False, **kwargs):
+        kwargs.setdefault('method', 'warble')
+        super(FakeScanner, self).__init__(**kwargs)
+        self.advertisements = sorted(advertisements, key=lambda a: a[0])
+        self.speed = speed
+        self.loop = loop
+
+    def __repr__(self):
+        return "<FakeScanner, {0} devices>".format(len(self))
+
+    def _scan(self, stopped):
+        while True:
+            start = time.time()
+            for offset, address, name, rssi in self.advertisements:
+                delay = start + offset / self.speed - time.time()
+                if stopped.wait(max(0.0, delay)):
+                    return
+                yield address, name, rssi
+            if not self.loop or not self.advertisements:
+                # Keep running, as a real scan would, until stopped.
+                stopped.wait()
+                return
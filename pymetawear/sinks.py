@@ -0,0 +1,963 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Data sinks
+----------
+
+Built-in receivers of sample data that can be used instead of callback
+functions, e.g. in :py:meth:`~pymetawear.modules.base.PyMetaWearModule.notifications`.
+
+A sink receives the raw ``libmetawear`` data points, which means that
+it can skip the creation of the sample dictionaries that callbacks get.
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import time
+import struct
+import logging
+from ctypes import memmove, create_string_buffer, addressof, string_at
+from collections import deque
+from threading import Lock, Condition, Thread
+
+from mbientlab.metawear.cbindings import DataTypeId
+
+from pymetawear.decoding import VALUE_TYPES, VALUE_TUPLES, EPOCH_SIZE, \
+    decode, decode_into, record_size, iter_records
+from pymetawear.exceptions import PyMetaWearException
+
+log = logging.getLogger(__name__)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise PyMetaWearException(
+            "NumPy is required for this functionality: pip install numpy")
+    return numpy
+
+
+def record_dtype(type_id):
+    """Get the NumPy dtype of decoded records of a data type.
+
+    The dtype has an ``epoch`` column followed by one column per field
+    of the ``ctypes`` structure of the data type (e.g. ``x``, ``y`` and
+    ``z`` for ``CartesianFloat``) or a single ``value`` column for
+    scalar types. It matches the layout written by
+    :func:`pymetawear.decoding.decode_into`.
+
+    :param int type_id: The ``DataTypeId`` of the records.
+    :return: The structured dtype.
+    :rtype: :py:class:`numpy.dtype`
+
+    """
+    np = _numpy()
+    ctype = VALUE_TYPES.get(type_id)
+    if ctype is None:
+        raise PyMetaWearException(
+            "Data type {0} can not be stored in an array.".format(type_id))
+    names, formats, offsets = ['epoch'], [np.int64], [0]
+    if hasattr(ctype, '_fields_'):
+        for name, field_type in ctype._fields_:
+            names.append(name)
+            formats.append(np.dtype(field_type))
+            offsets.append(EPOCH_SIZE + getattr(ctype, name).offset)
+    else:
+        names.append('value')
+        formats.append(np.dtype(ctype))
+        offsets.append(EPOCH_SIZE)
+    return np.dtype({'names': names, 'formats': formats,
+                     'offsets': offsets, 'itemsize': record_size(type_id)})
+
+
+class DataSink(object):
+    """Base class for sinks of ``libmetawear`` data points.
+
+    Subclasses implement :meth:`handle_data`, which is called on the
+    ``libmetawear`` callback thread for every data point, and optionally
+    :meth:`close`, which is called when the subscription feeding the sink
+    is removed.
+
+    """
+
+    def handle_data(self, data):
+        """Handle a data point.
+
+        :param data: Pointer to a ``mbientlab.metawear.cbindings.Data`` struct.
+
+        """
+        raise NotImplementedError("Must be implemented by sink.")
+
+    def flush(self):
+        """Write out or deliver any data held back by the sink."""
+        pass
+
+    def close(self):
+        """Called when no more data will be delivered to the sink."""
+        pass
+
+
+class RingBuffer(DataSink):
+    """Fixed capacity NumPy ring buffer of samples.
+
+    Samples are copied straight from the ``libmetawear`` data points into
+    a preallocated structured array with an ``epoch`` column and the value
+    columns of the data type, see :func:`record_dtype`.
+
+    .. code-block:: python
+
+        from pymetawear.sinks import RingBuffer
+
+        buffer = RingBuffer(4096)
+        c.accelerometer.notifications(buffer)
+        ...
+        latest = buffer.latest(100)
+        print(latest['epoch'], latest['x'], latest['y'], latest['z'])
+
+    The arrays returned by :meth:`latest` and :meth:`read` are views into
+    the buffer, and will be overwritten when the buffer wraps around. Call
+    ``.copy()`` on them if they are to be kept.
+
+    :param int capacity: Maximal number of samples held by the buffer.
+    :param int type_id: The ``DataTypeId`` of the samples. Defaults to
+        ``CARTESIAN_FLOAT``, which is what accelerometer, gyroscope and
+        magnetometer deliver.
+
+    """
+
+    def __init__(self, capacity, type_id=DataTypeId.CARTESIAN_FLOAT):
+        if capacity < 1:
+            raise ValueError("Capacity must be a positive integer.")
+        self.capacity = int(capacity)
+        self.type_id = type_id
+        self.dtype = record_dtype(type_id)
+
+        # Every record is written twice, at index i and i + capacity,
+        # so that the latest samples always form a contiguous slice.
+        self._array = _numpy().zeros(2 * self.capacity, dtype=self.dtype)
+        self._address = self._array.ctypes.data
+        self._itemsize = self.dtype.itemsize
+        self._lock = Lock()
+
+        self._n_written = 0
+        self._n_read = 0
+        self._n_overflowed = 0
+        self._n_rejected = 0
+
+    def __len__(self):
+        return min(self._n_written, self.capacity)
+
+    def __repr__(self):
+        return "<RingBuffer {0}/{1} samples ({2})>".format(
+            len(self), self.capacity, ', '.join(self.dtype.names))
+
+    @property
+    def n_written(self):
+        """Total number of samples written to the buffer."""
+        return self._n_written
+
+    @property
+    def n_overwritten(self):
+        """Number of samples that have been overwritten by newer ones."""
+        return max(0, self._n_written - self.capacity)
+
+    @property
+    def n_overflowed(self):
+        """Number of samples that were overwritten before being returned
+        by :meth:`read`."""
+        return self._n_overflowed
+
+    @property
+    def n_rejected(self):
+        """Number of data points dropped due to having another data type
+        than the buffer."""
+        return self._n_rejected
+
+    @property
+    def n_unread(self):
+        """Number of samples not yet returned by :meth:`read`."""
+        return self._n_written - self._n_read
+
+    def handle_data(self, data):
+        if data.contents.type_id != self.type_id:
+            self._n_rejected += 1
+            return
+        with self._lock:
+            index = self._n_written % self.capacity
+            address = self._address + index * self._itemsize
+            decode_into(data, address)
+            memmove(address + self.capacity * self._itemsize,
+                    address, self._itemsize)
+            self._n_written += 1
+            if self._n_written - self._n_read > self.capacity:
+                self._n_read += 1
+                self._n_overflowed += 1
+
+    def _slice(self, n):
+        end = self._n_written % self.capacity + self.capacity
+        return self._array[end - n:end]
+
+    def latest(self, n=None):
+        """Get the most recent samples.
+
+        :param int n: Number of samples to get. Defaults to all samples
+            in the buffer.
+        :return: Zero-copy view of the samples, oldest sample first.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        with self._lock:
+            n = len(self) if n is None else min(int(n), len(self))
+            return self._slice(n)
+
+    def read(self):
+        """Get the samples written since the last call to this method.
+
+        :return: Zero-copy view of the unread samples, oldest sample first.
+        :rtype: :py:class:`numpy.ndarray`
+
+        """
+        with self._lock:
+            n = self._n_written - self._n_read
+            self._n_read = self._n_written
+            return self._slice(n)
+
+    def clear(self):
+        """Discard all samples in the buffer and reset the counters."""
+        with self._lock:
+            self._n_written = 0
+            self._n_read = 0
+            self._n_overflowed = 0
+            self._n_rejected = 0
+
+
+class _RecordArray(object):
+    """Growable structured array of decoded records.
+
+    The data type is taken from the first appended data point, unless
+    given explicitly. The array grows geometrically when full.
+
+    """
+
+    def __init__(self, capacity=1024, type_id=None):
+        # Fail here rather than on the libmetawear thread.
+        _numpy()
+        self._capacity = max(int(capacity), 1)
+        self._array = None
+        self._n = 0
+        self.type_id = None
+        if type_id is not None:
+            self._allocate(type_id)
+
+    def __len__(self):
+        return self._n
+
+    def _allocate(self, type_id):
+        self.type_id = type_id
+        self._array = _numpy().empty(
+            self._capacity, dtype=record_dtype(type_id))
+        self._address = self._array.ctypes.data
+        self._itemsize = self._array.dtype.itemsize
+
+    def reserve(self, capacity):
+        """Make room for at least ``capacity`` records in total."""
+        capacity = int(capacity)
+        if self._array is None:
+            self._capacity = max(capacity, 1)
+        elif capacity > len(self._array):
+            array = _numpy().empty(capacity, dtype=self._array.dtype)
+            array[:self._n] = self._array[:self._n]
+            self._array = array
+            self._address = array.ctypes.data
+
+    def append(self, data):
+        """Append a data point. Returns ``False`` if it was of another
+        data type than the array."""
+        if self._array is None:
+            self._allocate(data.contents.type_id)
+        elif data.contents.type_id != self.type_id:
+            return False
+        if self._n == len(self._array):
+            self.reserve(2 * self._n)
+        decode_into(data, self._address + self._n * self._itemsize)
+        self._n += 1
+        return True
+
+    def take(self):
+        """Get the appended records and empty the array.
+
+        :return: Structured array trimmed to the number of records, or
+            ``None`` if no data type is known yet.
+
+        """
+        array, n = self._array, self._n
+        self._array, self._n = None, 0
+        if self.type_id is not None and array is None:
+            self._allocate(self.type_id)
+            return self._array[:0].copy()
+        if array is not None:
+            array.resize(n, refcheck=False)
+        return array
+
+
+def batched(callback, batch_size=None, batch_interval=None):
+    """Wrap a callback in a :py:class:`Batcher` if batching is requested.
+
+    :param callable callback: The callback to wrap.
+    :param int batch_size: Number of samples per batch, or ``None``.
+    :param float batch_interval: Maximal time in milliseconds to collect
+        samples for, or ``None``.
+    :return: The callback itself if both batching parameters are ``None``
+        or if the callback is ``None``, otherwise a :py:class:`Batcher`.
+
+    """
+    if callback is None or (batch_size is None and batch_interval is None):
+        return callback
+    return Batcher(callback, batch_size=batch_size,
+                   batch_interval=batch_interval)
+
+
+class Batcher(DataSink):
+    """Delivers samples to a callback in batches.
+
+    Samples are decoded on the ``libmetawear`` callback thread and
+    collected until ``batch_size`` samples have been received or
+    ``batch_interval`` milliseconds have passed since the first sample of
+    the batch, whichever comes first. The callback is then called once
+    with the whole batch.
+
+    .. code-block:: python
+
+        def acc_callback(samples):
+            for data in samples:
+                print(data['epoch'], data['value'])
+
+        c.accelerometer.notifications(
+            acc_callback, batch_size=100, batch_interval=250)
+
+    Batches are delivered in order, but not always from the same thread:
+    size triggered batches are delivered on the ``libmetawear`` thread,
+    and time triggered batches on a background thread owned by the
+    batcher. Remaining samples are delivered when the subscription is
+    removed.
+
+    :param callable callback: Function called with each batch.
+    :param int batch_size: Number of samples per batch.
+    :param float batch_interval: Maximal time in milliseconds that samples
+        are held before being delivered.
+    :param bool as_array: If ``True``, batches are delivered as NumPy
+        structured arrays (see :func:`record_dtype`) instead of lists
+        of sample dictionaries.
+
+    """
+
+    def __init__(self, callback, batch_size=None, batch_interval=None,
+                 as_array=False):
+        if batch_size is None and batch_interval is None:
+            raise ValueError(
+                "At least one of batch_size and batch_interval must be set.")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("Batch size must be a positive integer.")
+        self._callback = callback
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.as_array = as_array
+
+        self._lock = Lock()
+        self._delivery_lock = Lock()
+        self._batch = self._new_batch()
+        self._deadline = None
+        self._closed = False
+
+        self._flusher = None
+        if batch_interval is not None:
+            self._interval = batch_interval / 1000.0
+            self._condition = Condition(self._lock)
+            self._flusher = Thread(target=self._run_flusher,
+                                   name="PyMetaWear batcher")
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def _new_batch(self):
+        if self.as_array:
+            return _RecordArray(self.batch_size or 256)
+        return []
+
+    def handle_data(self, data):
+        with self._lock:
+            if self._closed:
+                # Samples arriving after close would never be delivered.
+                return
+            if self.as_array:
+                self._batch.append(data)
+            else:
+                self._batch.append(decode(data))
+            n = len(self._batch)
+            if n == 1 and self._flusher is not None:
+                self._deadline = time.time() + self._interval
+                self._condition.notify()
+        if self.batch_size is not None and n >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Deliver the samples collected so far, if any."""
+        with self._delivery_lock:
+            with self._lock:
+                batch = self._batch
+                if not len(batch):
+                    return
+                self._batch = self._new_batch()
+                self._deadline = None
+            self._callback(batch.take() if self.as_array else batch)
+
+    def _run_flusher(self):
+        while True:
+            with self._lock:
+                while not self._closed:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Batch callback failed: {0}".format(e))
+
+    def close(self):
+        """Deliver remaining samples and stop the background thread.
+        Samples received after closing are ignored."""
+        with self._lock:
+            self._closed = True
+            if self._flusher is not None:
+                self._condition.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+
+class FanOut(DataSink):
+    """Delivers the data points of one subscription to several subscribers.
+
+    Each data point is decoded once, and the sample dictionary is passed
+    to every subscribing function; subscribing sinks get the data point
+    as it is. Subscribers should therefore not modify the samples.
+    Subscribers can be added and removed while data is being delivered.
+    An exception raised by one subscriber is logged and does not affect
+    the others.
+
+    It is usually managed by the ``add_subscriber`` and
+    ``remove_subscriber`` methods of the modules.
+
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        # Replaced, not modified, so that handle_data needs no lock.
+        self._sinks = ()
+        self._callbacks = ()
+        self.closed = False
+
+    def __len__(self):
+        return len(self._sinks) + len(self._callbacks)
+
+    def __repr__(self):
+        return "<FanOut {0} subscribers>".format(len(self))
+
+    def add(self, subscriber):
+        """Add a subscribing function or sink."""
+        with self._lock:
+            if isinstance(subscriber, DataSink):
+                self._sinks += (subscriber, )
+            else:
+                self._callbacks += (subscriber, )
+
+    def remove(self, subscriber):
+        """Remove a subscriber. Sinks are closed when removed.
+
+        :return: ``True`` if the subscriber was found.
+        :rtype: bool
+
+        """
+        with self._lock:
+            if subscriber in self._sinks:
+                self._sinks = _without(self._sinks, subscriber)
+            elif subscriber in self._callbacks:
+                self._callbacks = _without(self._callbacks, subscriber)
+                return True
+            else:
+                return False
+        subscriber.close()
+        return True
+
+    def handle_data(self, data):
+        for sink in self._sinks:
+            try:
+                sink.handle_data(data)
+            except Exception as e:
+                log.error("Subscriber {0} failed: {1!r}".format(sink, e))
+        callbacks = self._callbacks
+        if callbacks:
+            sample = decode(data)
+            for callback in callbacks:
+                try:
+                    callback(sample)
+                except Exception as e:
+                    log.error("Subscriber {0} failed: {1!r}".format(
+                        callback, e))
+
+    def close(self):
+        """Close all subscribing sinks."""
+        with self._lock:
+            self.closed = True
+            sinks, self._sinks, self._callbacks = self._sinks, (), ()
+        for sink in sinks:
+            sink.close()
+
+
+def _without(items, item):
+    # Remove the first occurrence only; bound methods compare equal but
+    # are not identical.
+    index = items.index(item)
+    return items[:index] + items[index + 1:]
+
+
+class SampleQueue(DataSink):
+    """Bounded queue of samples, iterated over by a consumer thread.
+
+    Samples are decoded on the ``libmetawear`` callback thread and put in
+    the queue. When the queue is full, the ``overflow`` policy decides
+    what happens to new samples:
+
+    * ``'block'``: the callback thread waits until the consumer has
+      made room. No samples are lost, but no other data from the board
+      is processed while waiting.
+    * ``'drop_oldest'``: the oldest sample in the queue is discarded.
+    * ``'drop_newest'``: the new sample is discarded.
+
+    Iterating over the queue yields samples until the subscription
+    feeding it is removed and all queued samples have been consumed.
+    It is usually created by the ``stream`` method of the modules:
+
+    .. code-block:: python
+
+        with c.accelerometer.stream(maxsize=1000,
+                                    overflow='drop_oldest') as samples:
+            for data in samples:
+                print(data['epoch'], data['value'])
+                if samples.n_dropped:
+                    break
+
+    :param int maxsize: Maximal number of samples in the queue.
+    :param str overflow: ``'block'``, ``'drop_oldest'`` or
+        ``'drop_newest'``.
+
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, maxsize=1024, overflow='block'):
+        if maxsize < 1:
+            raise ValueError("Queue size must be a positive integer.")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy: {0}".format(overflow))
+        self.maxsize = int(maxsize)
+        self.overflow = overflow
+
+        self._queue = deque()
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._closed = False
+
+        self._n_received = 0
+        self._n_dropped = 0
+        self._n_blocked = 0
+        self._high_water = 0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def __repr__(self):
+        return "<SampleQueue {0}/{1} samples ({2})>".format(
+            len(self), self.maxsize, self.overflow)
+
+    @property
+    def n_received(self):
+        """Number of samples received from the board."""
+        return self._n_received
+
+    @property
+    def n_dropped(self):
+        """Number of samples discarded due to the queue being full."""
+        return self._n_dropped
+
+    @property
+    def n_blocked(self):
+        """Number of times the callback thread had to wait for room in
+        the queue, with the ``'block'`` policy."""
+        return self._n_blocked
+
+    @property
+    def high_water(self):
+        """Largest number of samples that have been in the queue."""
+        return self._high_water
+
+    def handle_data(self, data):
+        sample = decode(data)
+        with self._lock:
+            self._n_received += 1
+            if len(self._queue) >= self.maxsize:
+                if self.overflow == 'drop_newest':
+                    self._n_dropped += 1
+                    return
+                elif self.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self._n_dropped += 1
+                else:
+                    self._n_blocked += 1
+                    while len(self._queue) >= self.maxsize and \
+                            not self._closed:
+                        self._not_full.wait()
+                    if self._closed:
+                        self._n_dropped += 1
+                        return
+            self._queue.append(sample)
+            self._high_water = max(self._high_water, len(self._queue))
+            self._not_empty.notify()
+
+    def get(self, timeout=None):
+        """Get the next sample.
+
+        :param float timeout: Maximal time in seconds to wait for a
+            sample. Default is ``None``, i.e. wait until one arrives.
+        :return: The sample, or ``None`` if there was none within
+            ``timeout`` or the queue has been closed and is empty.
+        :rtype: dict
+
+        """
+        with self._lock:
+            if timeout is None:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+            elif not self._queue and not self._closed:
+                deadline = time.time() + timeout
+                while not self._queue and not self._closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._not_empty.wait(remaining)
+            if not self._queue:
+                return None
+            sample = self._queue.popleft()
+            self._not_full.notify()
+            return sample
+
+    def __iter__(self):
+        while True:
+            sample = self.get()
+            if sample is None:
+                return
+            yield sample
+
+    def close(self):
+        """Stop iteration once the queued samples have been consumed."""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+
+class BinaryFile(DataSink):
+    """Append-only binary file of samples.
+
+    The file starts with a 16 byte header identifying the data type,
+    followed by the records in the layout of :func:`record_dtype`, in
+    native byte order. Records are collected in memory and written to
+    the file in chunks of ``chunk_size`` samples, so that at most one
+    chunk is lost if the process dies.
+
+    If the file already exists, new samples are appended to it, given
+    that they are of the same data type. Use :func:`load_binary` to read
+    the file into a NumPy structured array.
+
+    .. code-block:: python
+
+        from pymetawear.sinks import BinaryFile, load_binary
+
+        f = c.accelerometer.download_log(output=BinaryFile('acc.bin'))
+        data = load_binary(f.path)
+
+    :param str path: Path of the file to write to.
+    :param int type_id: The ``DataTypeId`` of the samples. If not given, the
+        data type of the first sample or of the existing file is used.
+    :param int chunk_size: Number of samples to write at a time.
+
+    """
+
+    MAGIC = b'PYMWBIN\x00'
+    HEADER = struct.Struct('<8sHHI')
+
+    def __init__(self, path, type_id=None, chunk_size=4096):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be a positive integer.")
+        self.path = path
+        self.type_id = None
+        self.chunk_size = int(chunk_size)
+
+        self._lock = Lock()
+        self._file = None
+        self._buffer = None
+        self._n_buffered = 0
+        self._n_existing = 0
+        self._n_written = 0
+        self._n_rejected = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            existing_type_id, self._n_existing = _read_binary_header(path)
+            if type_id is not None and type_id != existing_type_id:
+                raise PyMetaWearException(
+                    "{0} contains data of type {1}, not {2}.".format(
+                        path, existing_type_id, type_id))
+            type_id = existing_type_id
+        if type_id is not None:
+            self._allocate(type_id)
+
+    def __repr__(self):
+        return "<BinaryFile {0} ({1} samples)>".format(self.path, len(self))
+
+    def __len__(self):
+        return self._n_existing + self._n_written
+
+    @property
+    def n_written(self):
+        """Number of samples received by this sink, including buffered
+        samples not yet written to the file."""
+        return self._n_written
+
+    @property
+    def n_rejected(self):
+        """Number of data points dropped due to having another data type
+        than the file."""
+        return self._n_rejected
+
+    def _allocate(self, type_id):
+        if type_id not in VALUE_TYPES:
+            raise PyMetaWearException(
+                "Data type {0} can not be stored in a binary file.".format(
+                    type_id))
+        self.type_id = type_id
+        self._itemsize = record_size(type_id)
+        self._buffer = create_string_buffer(self.chunk_size * self._itemsize)
+        self._address = addressof(self._buffer)
+
+    def _open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            _, n = _read_binary_header(self.path)
+            self._file = open(self.path, 'r+b')
+            # Drop any incomplete record at the end of the file.
+            self._file.seek(self.HEADER.size + n * self._itemsize)
+            self._file.truncate()
+        else:
+            self._file = open(self.path, 'wb')
+            self._file.write(self.HEADER.pack(
+                self.MAGIC, 1, self.type_id, self._itemsize))
+
+    def handle_data(self, data):
+        type_id = data.contents.type_id
+        with self._lock:
+            if self.type_id is None:
+                self._allocate(type_id)
+            elif type_id != self.type_id:
+                self._n_rejected += 1
+                return
+            decode_into(data, self._address +
+                        self._n_buffered * self._itemsize)
+            self._n_buffered += 1
+            self._n_written += 1
+            if self._n_buffered == self.chunk_size:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        if self._file is None:
+            self._open()
+        self._file.write(string_at(
+            self._address, self._n_buffered * self._itemsize))
+        self._file.flush()
+        self._n_buffered = 0
+
+    def flush(self):
+        """Write buffered samples to the file."""
+        with self._lock:
+            if self._n_buffered or (self._file is None and
+                                    self.type_id is not None):
+                self._write_chunk()
+
+    def close(self):
+        """Write buffered samples and close the file."""
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _read_binary_header(path):
+    with open(path, 'rb') as f:
+        header = f.read(BinaryFile.HEADER.size)
+    try:
+        magic, version, type_id, itemsize = BinaryFile.HEADER.unpack(header)
+    except struct.error:
+        magic = None
+    if magic != BinaryFile.MAGIC:
+        raise PyMetaWearException(
+            "{0} is not a PyMetaWear binary file.".format(path))
+    if version != 1 or itemsize != record_size(type_id):
+        raise PyMetaWearException(
+            "{0} has an unsupported record layout.".format(path))
+    n = (os.path.getsize(path) - BinaryFile.HEADER.size) // itemsize
+    return type_id, n
+
+
+def read_binary(path):
+    """Read a file written by :class:`BinaryFile` into a list of samples.
+
+    Unlike :func:`load_binary`, this does not require NumPy.
+
+    :param str path: Path of the file.
+    :return: The samples, as ``{'epoch', 'value'}`` dictionaries.
+    :rtype: list
+
+    """
+    type_id, _ = _read_binary_header(path)
+    with open(path, 'rb') as f:
+        f.seek(BinaryFile.HEADER.size)
+        return list(iter_records(type_id, f.read()))
+
+
+def load_binary(path):
+    """Read a file written by :class:`BinaryFile`.
+
+    :param str path: Path of the file.
+    :return: The samples, with the dtype given by :func:`record_dtype`.
+    :rtype: :py:class:`numpy.ndarray`
+
+    """
+    type_id, n = _read_binary_header(path)
+    with open(path, 'rb') as f:
+        f.seek(BinaryFile.HEADER.size)
+        return _numpy().fromfile(f, dtype=record_dtype(type_id), count=n)
+
+
+class CSVFile(DataSink):
+    """CSV file of samples.
+
+    The first row holds the column names: ``epoch`` followed by the
+    field names of the value (e.g. ``x``, ``y`` and ``z``), or ``value``
+    for scalar data types. Byte arrays are written as hexadecimal strings.
+    Rows are collected in memory and written to the file in chunks of
+    ``chunk_size`` samples.
+
+    .. code-block:: python
+
+        from pymetawear.sinks import CSVFile
+
+        f = c.accelerometer.download_log(output=CSVFile('acc.csv'))
+
+    :param str path: Path of the file to write to. An existing file is
+        overwritten.
+    :param int chunk_size: Number of samples to write at a time.
+
+    """
+
+    def __init__(self, path, chunk_size=4096):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be a positive integer.")
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self.type_id = None
+
+        self._lock = Lock()
+        self._file = None
+        self._rows = []
+        self._n_written = 0
+        self._n_rejected = 0
+
+    def __repr__(self):
+        return "<CSVFile {0} ({1} samples)>".format(self.path, len(self))
+
+    def __len__(self):
+        return self._n_written
+
+    @property
+    def n_written(self):
+        """Number of samples received by this sink, including buffered
+        samples not yet written to the file."""
+        return self._n_written
+
+    @property
+    def n_rejected(self):
+        """Number of data points dropped due to having another data type
+        than the first one."""
+        return self._n_rejected
+
+    def _open(self, type_id):
+        self.type_id = type_id
+        value_tuple = VALUE_TUPLES.get(type_id)
+        columns = value_tuple._fields if value_tuple else ('value', )
+        self._file = open(self.path, 'w')
+        self._file.write(','.join(('epoch', ) + tuple(columns)) + '\n')
+
+    def _format(self, sample):
+        value = sample['value']
+        if isinstance(value, tuple):
+            value = ','.join(repr(v) for v in value)
+        elif isinstance(value, list):
+            value = ''.join('{0:02x}'.format(v) for v in value)
+        else:
+            value = repr(value)
+        return '{0},{1}\n'.format(sample['epoch'], value)
+
+    def handle_data(self, data):
+        type_id = data.contents.type_id
+        row = self._format(decode(data))
+        with self._lock:
+            if self.type_id is None:
+                self._open(type_id)
+            elif type_id != self.type_id:
+                self._n_rejected += 1
+                return
+            self._rows.append(row)
+            self._n_written += 1
+            if len(self._rows) == self.chunk_size:
+                self._write_chunk()
+
+    def _write_chunk(self):
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        self._file.write(''.join(self._rows))
+        self._file.flush()
+        self._rows = []
+
+    def flush(self):
+        """Write buffered rows to the file."""
+        with self._lock:
+            if self._rows:
+                self._write_chunk()
+
+    def close(self):
+        """Write buffered rows and close the file."""
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
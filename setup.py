@@ -23,8 +23,15 @@ AUTHOR = 'Henrik Blidh'
 REQUIRED = [
     'metawear==0.7.0',
     'tqdm',
+    'futures; python_version < "3.2"',
 ]
 
+# What packages are optional?
+EXTRAS = {
+    'numpy': ['numpy'],
+    'yaml': ['pyyaml'],
+}
+
 # ------------------------------------------------
 
 here = os.path.abspath(os.path.dirname(__file__))
@@ -83,6 +90,7 @@ setup(
     url=URL,
     packages=find_packages(exclude=['tests', 'docs', 'examples', 'examples.*']),
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     include_package_data=True,
     license='MIT',
     classifiers=[
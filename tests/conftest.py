@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+import pymetawear.cache
+import pymetawear.client
+import pymetawear.processors
+import pymetawear.reconnect
+import pymetawear.modules.base
+import pymetawear.modules.accelerometer
+import pymetawear.modules.gyroscope
+import pymetawear.modules.sensorfusion
+from .mock_backend import FakeLibMetaWear, FakeMetaWear, \
+    FakeBluetoothThread
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    # The asyncio front end uses async/await syntax.
+    collect_ignore.append('test_aio.py')
+
+
+@pytest.fixture
+def lib(monkeypatch):
+    """A :class:`~tests.mock_backend.FakeLibMetaWear` used by the client
+    and the modules."""
+    lib = FakeLibMetaWear()
+    for module in (pymetawear.cache,
+                   pymetawear.client,
+                   pymetawear.processors,
+                   pymetawear.reconnect,
+                   pymetawear.modules.base,
+                   pymetawear.modules.accelerometer,
+                   pymetawear.modules.gyroscope,
+                   pymetawear.modules.sensorfusion):
+        monkeypatch.setattr(module, 'libmetawear', lib)
+    return lib
+
+
+@pytest.fixture
+def fake_mw(monkeypatch):
+    """A subclass of :class:`~tests.mock_backend.FakeMetaWear` used by the
+    client, with its own Bluetooth thread."""
+
+    class MetaWear(FakeMetaWear):
+        bluetooth = FakeBluetoothThread()
+
+    monkeypatch.setattr(pymetawear.client, 'MetaWear', MetaWear)
+    yield MetaWear
+    MetaWear.bluetooth.stop()
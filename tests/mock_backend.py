@@ -14,7 +14,23 @@ from __future__ import unicode_literals
 from __future__ import absolute_import
 
 import uuid
-from ctypes import create_string_buffer
+import weakref
+import threading
+from ctypes import c_ubyte, c_void_p, cast, pointer, sizeof, POINTER, \
+    string_at, create_string_buffer
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from mbientlab.metawear.cbindings import Const, Data, DataTypeId, \
+    CartesianFloat
+
+import pymetawear.cache
+from pymetawear.modules import AccelerometerModule, GyroscopeModule, \
+    SensorFusionModule, Modules
+
+ADDRESS = 'D1:75:74:0B:59:1F'
 
 
 class MockBackend(object):
@@ -383,3 +399,300 @@ class MockBackend(object):
 
     def _response_2_string_buffer(self, response):
         return create_string_buffer(bytes(response), len(response))
+
+
+def data_point(value, type_id, epoch=1573000000000):
+    """A pointer to a ``Data`` struct, as given to data handlers."""
+    data = Data(epoch=epoch, extra=None,
+                value=cast(pointer(value), c_void_p).value,
+                type_id=type_id, length=sizeof(value))
+    data._value_ref = value
+    return pointer(data)
+
+
+def acc_data_point(i):
+    return data_point(CartesianFloat(x=i, y=-i, z=2 * i),
+                      DataTypeId.CARTESIAN_FLOAT, epoch=1000 + i)
+
+
+class FakeLibMetaWear(object):
+    """Stands in for libmetawear.
+
+    All calls are recorded in ``calls`` as tuples of the function name
+    and the arguments. Data signals are ``100 + data_source`` for the
+    sensor fusion and ``200`` for its calibration state, and the
+    subscribed ones are kept in ``subscribed``. Freed boards are kept in
+    ``freed``. All modules are present, with the implementation ``0``.
+    Loggers have the id ``address - 1`` and are looked up in
+    ``loggers``. Processors are created with increasing addresses from
+    ``next_processor``, except for comparators, which fail. Log downloads
+    replay ``n_samples`` accelerometer samples of each subscribed logger.
+    The board state is ``state``.
+
+    """
+
+    def __init__(self, state=b'\x01\x02\x00\xff'):
+        self.calls = []
+        self.subscribed = {}
+        self.loggers = {}
+        self.freed = []
+        self.next_processor = 100
+        # If True, processor handlers are kept instead of called, as for
+        # a board that responds late. Like libmetawear, which only holds
+        # their pointers, weak references are kept.
+        self.late = False
+        self.handlers = []
+        self.state = (c_ubyte * len(state)).from_buffer_copy(state)
+        self.deserialized = []
+        self.n_samples = 0
+        self.total_entries = None
+        self.interrupt_after = None
+        self.data_handlers = {}
+        self.removed = []
+
+    @property
+    def names(self):
+        """The names of the called functions."""
+        return [call[0] for call in self.calls]
+
+    def _record(self, name, *args):
+        self.calls.append((name, ) + args)
+
+    def mbl_mw_sensor_fusion_get_data_signal(self, board, data_source):
+        self._record('mbl_mw_sensor_fusion_get_data_signal', board,
+                     data_source)
+        return 100 + data_source
+
+    def mbl_mw_sensor_fusion_calibration_state_data_signal(self, board):
+        self._record('mbl_mw_sensor_fusion_calibration_state_data_signal',
+                     board)
+        return 200
+
+    def mbl_mw_datasignal_subscribe(self, data_signal, context, fn):
+        self._record('mbl_mw_datasignal_subscribe', data_signal, context, fn)
+        self.subscribed[data_signal] = fn
+
+    def mbl_mw_datasignal_unsubscribe(self, data_signal):
+        self._record('mbl_mw_datasignal_unsubscribe', data_signal)
+        self.subscribed.pop(data_signal, None)
+
+    def mbl_mw_logger_get_id(self, logger):
+        self._record('mbl_mw_logger_get_id', logger)
+        return logger - 1
+
+    def mbl_mw_logger_lookup_id(self, board, logger_id):
+        self._record('mbl_mw_logger_lookup_id', board, logger_id)
+        return self.loggers.get(logger_id)
+
+    def mbl_mw_logger_subscribe(self, logger, context, handler):
+        self._record('mbl_mw_logger_subscribe', logger, context, handler)
+        self.data_handlers[logger] = handler
+
+    def mbl_mw_logger_remove(self, logger):
+        self._record('mbl_mw_logger_remove', logger)
+        self.removed.append(logger)
+
+    def mbl_mw_logging_download(self, board, n_notifies, handler_ref):
+        self._record('mbl_mw_logging_download', board, n_notifies,
+                     handler_ref)
+        handler = handler_ref._obj
+        total_entries = self.total_entries or 2 * self.n_samples
+        handler.received_progress_update(None, total_entries, total_entries)
+        for i in range(self.n_samples):
+            if i == self.interrupt_after:
+                return
+            # Entries of different loggers are interleaved.
+            for logger, data_handler in sorted(self.data_handlers.items()):
+                data_handler(None, data_point(
+                    CartesianFloat(x=i, y=-i, z=0.5 * i),
+                    DataTypeId.CARTESIAN_FLOAT, epoch=1000 * logger + i))
+        handler.received_progress_update(None, 0, total_entries)
+
+    def mbl_mw_metawearboard_lookup_module(self, board, module):
+        self._record('mbl_mw_metawearboard_lookup_module', board, module)
+        return 0
+
+    def mbl_mw_metawearboard_free(self, board):
+        self._record('mbl_mw_metawearboard_free', board)
+        self.freed.append(board)
+
+    def mbl_mw_metawearboard_serialize(self, board, size):
+        self._record('mbl_mw_metawearboard_serialize', board, size)
+        size._obj.value = len(self.state)
+        return cast(self.state, POINTER(c_ubyte))
+
+    def mbl_mw_metawearboard_deserialize(self, board, raw, size):
+        self._record('mbl_mw_metawearboard_deserialize', board, raw, size)
+        self.deserialized.append(string_at(raw, size))
+        return 0
+
+    def __getattr__(self, name):
+        if not name.startswith('mbl_mw_'):
+            raise AttributeError(name)
+
+        def call(*args):
+            if '_create' in name and self.late:
+                # Only the weak reference to the handler is kept.
+                self._record(name, *args[:-1])
+                self.handlers.append(weakref.ref(args[-1]))
+                return
+            self._record(name, *args)
+            if '_create' in name:
+                processor = None
+                if 'comparator' not in name:
+                    processor = self.next_processor
+                    self.next_processor += 1
+                args[-1](None, processor)
+        return call
+
+
+class FakeBluetoothThread(object):
+    """Runs callbacks one at a time on one thread, as warble does, so a
+    callback that waits for another never returns."""
+
+    def __init__(self):
+        self.callbacks = Queue()
+        thread = threading.Thread(target=self._run)
+        thread.daemon = True
+        thread.start()
+
+    def post(self, callback, *args):
+        self.callbacks.put((callback, args))
+
+    def post_later(self, delay, callback, *args):
+        timer = threading.Timer(delay, self.post, (callback, ) + args)
+        timer.daemon = True
+        timer.start()
+
+    def stop(self):
+        self.callbacks.put(None)
+
+    def _run(self):
+        while True:
+            item = self.callbacks.get()
+            if item is None:
+                return
+            callback, args = item
+            callback(*args)
+
+
+class FakeGattChar(object):
+
+    def __init__(self, value, bluetooth=None):
+        self.value = value
+        self.bluetooth = bluetooth
+
+    def read_value_async(self, handler):
+        value = bytearray(self.value.encode('utf8'))
+        if self.bluetooth is None:
+            handler(value, None)
+        else:
+            self.bluetooth.post(handler, value, None)
+
+
+class FakeWarble(object):
+    """Reads the device information of the board it is connected to."""
+
+    def __init__(self, info, bluetooth=None):
+        self.info = info
+        self.bluetooth = bluetooth
+
+    def find_characteristic(self, uuid):
+        key = dict((v, k) for k, v in
+                   pymetawear.cache._DEVICE_INFO_UUIDS.items())[uuid]
+        return FakeGattChar(self.info[key], self.bluetooth)
+
+
+class FakeMetaWear(object):
+    """Stands in for ``mbientlab.metawear.MetaWear``.
+
+    Connection attempt ``n`` completes after ``delays[n]`` seconds, or
+    never if the delay is ``None``, on ``bluetooth``, a
+    :class:`FakeBluetoothThread`, if set. Attempts fail for the addresses
+    in ``failing``, and while ``failures`` is positive.
+
+    """
+
+    delays = [0.0]
+    failing = ()
+    bluetooth = None
+
+    def __init__(self, address=ADDRESS, hci_mac=None, firmware='1.4.5',
+                 model='5', **kwargs):
+        self.address = address
+        self.hci_mac = hci_mac
+        self.board = object()
+        self.on_disconnect = None
+        self.info = {'firmware': firmware, 'model': model, 'serial': '0123'}
+        self.warble = FakeWarble(dict(self.info), self.bluetooth)
+        self.is_connected = False
+        self.failures = 0
+        self.attempts = 0
+        self.n_disconnects = 0
+
+    def connect_async(self, handler, **kwargs):
+        delay = self.delays[min(self.attempts, len(self.delays) - 1)]
+        self.attempts += 1
+        # As MetaWear, which reads the firmware again on each connect.
+        self.info.pop('firmware', None)
+        if delay is None:
+            return
+
+        def completed():
+            if self.address in self.failing or self.failures:
+                self.failures = max(self.failures - 1, 0)
+                handler(RuntimeError("Could not connect"))
+            else:
+                self.is_connected = True
+                handler(None)
+
+        if self.bluetooth is not None:
+            self.bluetooth.post_later(delay, completed)
+        elif delay:
+            timer = threading.Timer(delay, completed)
+            timer.daemon = True
+            timer.start()
+        else:
+            completed()
+
+    def connect(self, **kwargs):
+        result = []
+        done = threading.Event()
+
+        def completed(error):
+            result.append(error)
+            done.set()
+
+        self.connect_async(completed)
+        done.wait()
+        if result[0] is not None:
+            raise result[0]
+
+    def disconnect(self):
+        self.is_connected = False
+        self.n_disconnects += 1
+
+
+class FakeClient(object):
+    """A client of a board with an accelerometer and sensor fusion, but
+    without a gyroscope."""
+
+    _address = ADDRESS
+    board = 1
+
+    def __init__(self):
+        self.mw = FakeMetaWear(self._address)
+        self._disconnect_requested = False
+        self.accelerometer = AccelerometerModule(
+            1, Const.MODULE_ACC_TYPE_BMI160)
+        self.gyroscope = GyroscopeModule(1, Modules.MBL_MW_MODULE_NA)
+        self.sensorfusion = SensorFusionModule(1, 0)
+        self._modules = {'accelerometer': self.accelerometer,
+                         'sensorfusion': self.sensorfusion}
+
+    def connect(self):
+        self.mw.connect()
+
+    def disconnect(self):
+        self._disconnect_requested = True
+        self.mw.on_disconnect(0)
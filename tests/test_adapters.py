@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_adapters`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+
+import pytest
+
+from pymetawear.adapters import AdapterPool
+from pymetawear.exceptions import PyMetaWearException
+
+ADDRESSES = ['D1:75:74:0B:59:1{0}'.format(i) for i in range(4)]
+
+
+class FakeModule(object):
+
+    def __init__(self, n_notifications=0, callback=None, callbacks=None,
+                 has_logger=False):
+        self.n_notifications = n_notifications
+        self.callback = callback
+        self._callbacks = callbacks or []
+        self.has_logger = has_logger
+        self.written_settings = {}
+
+
+@pytest.fixture
+def pool(lib, fake_mw):
+    return AdapterPool(['hci0', 'hci1'], max_boards=3, interval=0.0)
+
+
+def test_balances_on_boards_and_rate(pool, lib):
+    clients = [pool.client(a) for a in ADDRESSES]
+    assert [c.device for c in clients] == ['hci0', 'hci1', 'hci0', 'hci1']
+    old_mw = clients[2].mw
+
+    pool.connect(clients[0])
+    streaming = clients[0]._modules['accelerometer'] = FakeModule()
+    # The streaming board on hci0 outweighs two boards on hci1.
+    for c in clients[1:]:
+        streaming.n_notifications += 1000
+        pool.connect(c)
+    assert [c.device for c in clients] == ['hci0', 'hci1', 'hci1', 'hci1']
+    assert clients[2].mw.hci_mac == 'hci1'
+    # The board object of the old adapter is released.
+    assert lib.freed == [old_mw.board]
+    assert old_mw.n_disconnects == 1 and old_mw.on_disconnect is None
+
+    streaming.n_notifications += 1000
+    stats = pool.stats()
+    assert (stats['hci0'].n_connected, stats['hci1'].n_connected) == (1, 3)
+    assert stats['hci0'].n_notifications == 4000
+    assert stats['hci0'].rate > 0 and stats['hci1'].rate == 0
+    assert stats['hci0'].load > stats['hci1'].load
+
+    pool.client('C0:FF:EE:00:00:01')
+    pool.client('C0:FF:EE:00:00:02')
+    with pytest.raises(PyMetaWearException):
+        pool.client('C0:FF:EE:00:00:03')
+
+
+@pytest.mark.parametrize('module', [
+    FakeModule(callback=object()),
+    FakeModule(callbacks=[object()]),
+    FakeModule(has_logger=True),
+], ids=['callback', 'subscribers', 'logger'])
+def test_keeps_clients_with_subscriptions(pool, module):
+    a, b, c = [pool.client(address) for address in ADDRESSES[:3]]
+    assert (a.device, c.device) == ('hci0', 'hci0')
+    pool.connect(b)
+    pool.connect(c)
+    streaming = c._modules['accelerometer'] = FakeModule()
+
+    a._modules['accelerometer'] = module
+    streaming.n_notifications += 5000
+    pool.connect(a)
+    assert a.device == 'hci0'
+
+    a.disconnect()
+    del a._modules['accelerometer']
+    streaming.n_notifications += 5000
+    pool.connect(a)
+    assert a.device == 'hci1'
+
+
+def test_max_boards(lib, fake_mw):
+    pool = AdapterPool(['hci0', 'hci1'], max_boards=2, interval=0.0)
+    a, b, c, d = [pool.client(address) for address in ADDRESSES]
+    assert [x.device for x in (a, b, c, d)] == ['hci0', 'hci1'] * 2
+    with pytest.raises(PyMetaWearException):
+        pool.client('C0:FF:EE:00:00:01')
+    assert list(pool.clients) == ADDRESSES
+
+    # A full adapter is skipped, even if it is the least loaded one.
+    pool.connect(a)
+    a._modules['accelerometer'] = FakeModule(n_notifications=5000)
+    pool.connect(c)
+    assert c.device == 'hci0'
+
+    pool.remove(b)
+    c.disconnect()
+    pool.connect(c)
+    assert c.device == 'hci1'
+    assert pool.client('C0:FF:EE:00:00:01').device == 'hci0'
+
+
+def test_rates_after_move(pool):
+    a, b, c = [pool.client(address) for address in ADDRESSES[:3]]
+    pool.connect(b)
+    pool.connect(c)
+    streaming = c._modules['accelerometer'] = FakeModule()
+    a._modules['accelerometer'] = FakeModule(n_notifications=300)
+    pool.stats()
+
+    streaming.n_notifications += 5000
+    pool.connect(a)
+    assert a.device == 'hci1' and a.n_notifications == 0
+    # The count of the moved client restarts, which is not a negative rate.
+    stats = pool.stats()
+    assert stats['hci1'].rate == 0
+    assert stats['hci0'].n_notifications == 5300
+
+    a._modules['accelerometer'] = FakeModule(n_notifications=30)
+    time.sleep(0.01)
+    stats = pool.stats()
+    assert 0 < stats['hci1'].rate <= 30 / 0.01
+    assert stats['hci1'].n_notifications == 30
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_aio`
+==================
+
+"""
+
+import asyncio
+import threading
+
+import pytest
+from mbientlab.metawear.cbindings import SensorFusionData
+
+from pymetawear.aio import AsyncMetaWearClient
+from pymetawear.modules import SensorFusionModule
+from .mock_backend import acc_data_point
+
+
+class FakeStreamingModule(object):
+    """Delivers samples from a thread, as libmetawear does."""
+
+    def __init__(self, n):
+        self.n = n
+        self.sink = None
+
+    def notifications(self, callback=None):
+        if callback is None:
+            self.sink.close()
+            return
+        self.sink = callback
+
+        def deliver():
+            for i in range(self.n):
+                self.sink.handle_data(acc_data_point(i))
+        threading.Thread(target=deliver).start()
+
+
+@pytest.fixture
+def loop(fake_mw):
+    fake_mw.delays = [0.05]
+    fake_mw.failing = ['00:00:00:00:00:01']
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def test_connect_many(loop):
+    clients = [AsyncMetaWearClient('{0:02d}:00:00:00:00:01'.format(i),
+                                   loop=loop) for i in range(20)]
+
+    async def connect_all():
+        return await asyncio.gather(
+            *[c.connect() for c in clients], return_exceptions=True)
+
+    results = loop.run_until_complete(connect_all())
+    assert isinstance(results[0], RuntimeError)
+    assert results[1:] == [None] * 19
+    assert all(c.client.mw.is_connected for c in clients[1:])
+    assert clients[1].client._modules_available
+
+
+@pytest.mark.parametrize('batches', [False, True])
+def test_stream(loop, batches):
+    c = AsyncMetaWearClient('01:00:00:00:00:01', loop=loop)
+    c.client._modules['accelerometer'] = FakeStreamingModule(1000)
+
+    async def consume():
+        received = []
+        async with c.stream('accelerometer', batches=batches) as samples:
+            async for data in samples:
+                received.extend(data if batches else [data])
+                if len(received) == 1000:
+                    break
+        return received
+
+    received = loop.run_until_complete(consume())
+    assert [d['epoch'] for d in received] == list(range(1000, 2000))
+    assert received[-1]['value'].z == 2 * 999
+
+
+def test_concurrent_sensorfusion_streams(loop, lib):
+    c = AsyncMetaWearClient('01:00:00:00:00:01', loop=loop)
+    c.client._modules['sensorfusion'] = SensorFusionModule(1, 0)
+    quaternion = 100 + SensorFusionData.QUATERNION
+    euler_angle = 100 + SensorFusionData.EULER_ANGLE
+
+    async def consume():
+        async with c.stream('sensorfusion', 'quaternion') as quaternions:
+            async with c.stream('sensorfusion', 'euler_angle') as angles:
+                lib.subscribed[quaternion](None, acc_data_point(0))
+                lib.subscribed[euler_angle](None, acc_data_point(1))
+                assert (await angles.__anext__())['epoch'] == 1001
+            # Stopping one stream keeps the other one subscribed.
+            assert sorted(lib.subscribed) == [quaternion]
+            lib.subscribed[quaternion](None, acc_data_point(2))
+            return [(await quaternions.__anext__())['epoch']
+                    for _ in range(2)]
+
+    assert loop.run_until_complete(consume()) == [1000, 1002]
+    assert lib.subscribed == {}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_cache`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import pytest
+
+import pymetawear.cache
+from pymetawear.cache import BoardStateCache
+from pymetawear.client import MetaWearClient
+from .mock_backend import FakeMetaWear
+
+
+def test_store_and_restore(lib, tmpdir):
+    cache = BoardStateCache(str(tmpdir))
+    mw = FakeMetaWear()
+    assert not cache.restore(mw)
+    assert not cache.is_valid(mw)
+    cache.store(mw)
+    assert cache.is_valid(mw)
+    assert tmpdir.join('D175740B591F.json').check()
+
+    mw = FakeMetaWear()
+    mw.info = {}
+    assert cache.restore(mw)
+    assert lib.deserialized == [b'\x01\x02\x00\xff']
+    assert mw.info == {'serial': '0123'}
+    assert cache.is_valid(mw)
+    assert mw.info['model'] == '5'
+
+
+def test_invalidated_by_firmware(lib, tmpdir):
+    cache = BoardStateCache(str(tmpdir))
+    cache.store(FakeMetaWear(firmware='1.4.5'))
+    assert not cache.is_valid(FakeMetaWear(firmware='1.5.0'))
+
+
+def test_invalidated_by_model(lib, tmpdir):
+    cache = BoardStateCache(str(tmpdir))
+    cache.store(FakeMetaWear(model='5'))
+    # Another board model at the same address, e.g. a replaced board.
+    mw = FakeMetaWear(model='6')
+    assert cache.restore(mw)
+    assert not cache.is_valid(mw)
+    assert mw.info['model'] == '6'
+
+
+def test_settings_kept_with_state(lib, tmpdir):
+    cache = BoardStateCache(str(tmpdir))
+    mw = FakeMetaWear()
+    cache.store_settings(mw.address, {'accelerometer': {'data_rate': 50.0}})
+    assert cache.load_settings(mw.address) == {}
+
+    cache.store(mw)
+    cache.store_settings(mw.address, {'accelerometer': {'data_rate': 50.0}})
+    assert cache.load_settings(mw.address) == {
+        'accelerometer': {'data_rate': 50.0}}
+    assert cache.is_valid(mw)
+
+    cache.store(FakeMetaWear(firmware='1.5.0'))
+    assert cache.load_settings(mw.address) == {}
+
+
+@pytest.mark.parametrize('use_future', [False, True])
+def test_connect_checks_state_on_bluetooth_thread(lib, fake_mw, tmpdir,
+                                                  monkeypatch, use_future):
+    # Blocking the Bluetooth thread would time out the reads and drop the
+    # cached settings.
+    monkeypatch.setattr(pymetawear.cache, '_READ_TIMEOUT', 0.2)
+    cache = BoardStateCache(str(tmpdir))
+    mw = FakeMetaWear()
+    cache.store(mw)
+    settings = {'accelerometer': {'data_rate': 50.0}}
+    cache.store_settings(mw.address, settings)
+
+    c = MetaWearClient(mw.address, connect=False, state_cache=cache,
+                       persist_settings=True)
+    if use_future:
+        c.connect_future(timeout=2.0).result()
+    else:
+        c.connect()
+    assert c.mw.info['firmware'] == '1.4.5'
+    assert c._restored_settings == settings
+    assert cache.load_settings(mw.address) == settings
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_config`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import pytest
+from mbientlab.metawear.cbindings import Const, SensorFusionMode, \
+    SensorFusionAccRange
+
+from pymetawear.config import BoardConfig
+from pymetawear.modules import AccelerometerModule, GyroscopeModule
+from .mock_backend import FakeClient
+
+
+def test_apply_writes_changes_once(lib):
+    client = FakeClient()
+    config = BoardConfig.from_json(
+        '{"sensorfusion": {"mode": "ndof", "acc_range": 8, '
+        '"gyro_range": 1000}, "accelerometer": {"data_rate": 50.0}}')
+
+    written = config.apply(client)
+    assert list(written) == ['accelerometer', 'sensorfusion']
+    assert lib.names.count('mbl_mw_acc_write_acceleration_config') == 1
+    assert lib.names.count('mbl_mw_sensor_fusion_write_config') == 1
+    assert client.sensorfusion.written_settings == {
+        'mode': SensorFusionMode.NDOF, 'acc_range': SensorFusionAccRange._8G,
+        'gyro_range': 1}
+
+    del lib.calls[:]
+    assert config.apply(client) == {}
+    assert lib.calls == []
+
+
+def test_invalid_config_writes_nothing(lib):
+    config = BoardConfig(accelerometer={'data_rate': 50.0, 'data_range': 3.0},
+                         gyroscope={'data_rate': 100.0},
+                         sensorfusion={'mode': 'bogus'})
+    with pytest.raises(ValueError) as e:
+        config.apply(FakeClient())
+    message = str(e.value)
+    assert 'FSR (3.0)' in message
+    assert 'gyroscope: not present' in message
+    assert 'mode (bogus)' in message
+    assert lib.calls == []
+
+    with pytest.raises(ValueError):
+        BoardConfig(led={'color': 'red'})
+
+
+def test_sample_period_of_written_rate(lib):
+    # The rates written are the closest supported ones.
+    acc = AccelerometerModule(1, Const.MODULE_ACC_TYPE_BMI160)
+    assert acc.sample_period is None
+    acc.set_settings(data_rate=12.2)
+    assert acc.written_settings == {'data_rate': 12.5}
+    assert acc.sample_period == 80.0
+
+    gyro = GyroscopeModule(1, 0)
+    gyro.set_settings(data_rate=99.6)
+    assert gyro.sample_period == 10.0
+
+
+def test_setters_skip_unchanged(lib):
+    acc = AccelerometerModule(1, Const.MODULE_ACC_TYPE_BMI160)
+    acc.set_settings(data_rate=50.0, data_range=4.0)
+    acc.set_settings(data_range=8.0)
+    assert (acc.current_odr, acc.current_fsr) == (50.0, 8.0)
+    assert acc.written_settings == {'data_rate': 50.0, 'data_range': 8.0}
+
+    del lib.calls[:]
+    acc.set_settings(data_rate=50.0, data_range=8.0)
+    assert lib.calls == []
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_connect`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+
+import pytest
+
+from pymetawear.client import MetaWearClient, MAX_RETRY_DELAY, \
+    _retry_delay
+from pymetawear.exceptions import PyMetaWearConnectionTimeout
+
+
+def test_hung_board_costs_bounded_time(fake_mw):
+    fake_mw.delays = [None]
+    c = MetaWearClient('D1:75:74:0B:59:1F', connect=False,
+                       connect_timeout=0.1, connect_retries=2,
+                       retry_delay=0.05)
+    t = time.time()
+    with pytest.raises(PyMetaWearConnectionTimeout):
+        c.connect()
+    assert c.mw.attempts == 3
+    assert time.time() - t < 0.3 + 0.05 + 0.1 + 0.2
+
+
+def test_retry_and_late_connection(fake_mw):
+    # The first attempt connects after it has timed out, while the retry
+    # succeeds, so the late connection must not disconnect the board.
+    fake_mw.delays = [0.15, 0.01]
+    c = MetaWearClient('D1:75:74:0B:59:1F', connect=False,
+                       retry_delay=0.01)
+    future = c.connect_future(timeout=0.05, retries=1)
+    assert future.result(timeout=1.0) is None
+    time.sleep(0.2)
+    assert c.mw.attempts == 2 and c.mw.is_connected
+
+    # Without a retry, a late connection is closed.
+    c.mw.attempts = 0
+    c.mw.is_connected = False
+    with pytest.raises(PyMetaWearConnectionTimeout):
+        c.connect(timeout=0.05)
+    time.sleep(0.2)
+    assert not c.mw.is_connected
+
+
+def test_late_connection_is_disconnected(fake_mw):
+    fake_mw.delays = [0.1]
+    c = MetaWearClient('D1:75:74:0B:59:1F', connect=False)
+    future = c.connect_future(timeout=0.02)
+    with pytest.raises(PyMetaWearConnectionTimeout):
+        future.result(timeout=1.0)
+    # The pending connection is aborted at the timeout, and closed again
+    # when it completes anyway.
+    assert c.mw.n_disconnects == 1
+    time.sleep(0.2)
+    assert c.mw.n_disconnects == 2 and not c.mw.is_connected
+
+
+def test_retries_failed_attempts(fake_mw):
+    fake_mw.failing = ['D1:75:74:0B:59:1F']
+    c = MetaWearClient('D1:75:74:0B:59:1F', connect=False,
+                       connect_retries=2, retry_delay=0.01)
+    with pytest.raises(RuntimeError):
+        c.connect()
+    assert c.mw.attempts == 3
+
+    fake_mw.failing = []
+    c.mw.failures = 1
+    c.connect()
+    assert c.mw.attempts == 5 and c.is_connected
+
+
+@pytest.mark.parametrize('attempt', [0, 2, 20])
+def test_retry_delay_jitter(attempt):
+    delay = min(2 ** attempt, MAX_RETRY_DELAY)
+    delays = [_retry_delay(1.0, attempt) for _ in range(100)]
+    assert all(delay / 2 <= d <= delay for d in delays)
+    # Boards retrying at once are spread out.
+    assert len(set(delays)) > 90
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_decoding`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from ctypes import c_float, c_int, c_longlong, create_string_buffer, \
+    addressof
+
+import pytest
+from mbientlab.metawear.cbindings import DataTypeId, CartesianFloat, \
+    Quaternion, CorrectedCartesianFloat
+
+from pymetawear.decoding import decode, decode_into, record_size
+from .mock_backend import data_point
+
+
+@pytest.mark.parametrize("value,type_id", [
+    (c_int(-42), DataTypeId.INT32),
+    (c_float(0.5), DataTypeId.FLOAT),
+    (CartesianFloat(x=0.5, y=-1.0, z=2.0), DataTypeId.CARTESIAN_FLOAT),
+    (Quaternion(w=1.0, x=0.0, y=0.5, z=-0.5), DataTypeId.QUATERNION),
+    (CorrectedCartesianFloat(x=1.0, y=2.0, z=3.0, accuracy=3),
+     DataTypeId.CORRECTED_CARTESIAN_FLOAT),
+])
+def test_decode(value, type_id):
+    sample = decode(data_point(value, type_id))
+    assert sample['epoch'] == 1573000000000
+    if hasattr(value, '_fields_'):
+        for name, _ in value._fields_:
+            assert getattr(sample['value'], name) == getattr(value, name)
+    else:
+        assert sample['value'] == value.value
+
+
+def test_decode_unknown_type():
+    with pytest.raises(RuntimeError):
+        decode(data_point(c_int(0), 255))
+
+
+def test_decode_into():
+    value = CartesianFloat(x=0.5, y=-1.0, z=2.0)
+    buffer = create_string_buffer(2 * record_size(DataTypeId.CARTESIAN_FLOAT))
+    decode_into(data_point(value, DataTypeId.CARTESIAN_FLOAT, epoch=7),
+                addressof(buffer) + record_size(DataTypeId.CARTESIAN_FLOAT))
+    assert record_size(DataTypeId.CARTESIAN_FLOAT) == 24
+    assert c_longlong.from_buffer(buffer, 24).value == 7
+    record = CartesianFloat.from_buffer(buffer, 32)
+    assert (record.x, record.y, record.z) == (0.5, -1.0, 2.0)
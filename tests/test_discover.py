@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_discover`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import threading
+from collections import namedtuple
+
+import pytest
+
+import pymetawear.discover
+from pymetawear.discover import iter_devices, find_devices, \
+    discover_devices_warble
+
+ScanResult = namedtuple('ScanResult', ['mac', 'name', 'rssi'])
+
+
+class FakeBleScanner(object):
+    """Reports ``(delay, mac, name)`` advertisements on a thread."""
+
+    def __init__(self, advertisements):
+        self.advertisements = advertisements
+        self.handler = None
+        self.stopped = None
+
+    def set_handler(self, handler):
+        self.handler = handler
+
+    @property
+    def running(self):
+        return self.stopped is not None and not self.stopped.is_set()
+
+    def start(self, **kwargs):
+        stopped = self.stopped = threading.Event()
+        handler = self.handler
+
+        def run():
+            for delay, mac, name in self.advertisements:
+                if stopped.wait(delay):
+                    return
+                handler(ScanResult(mac, name, -60))
+
+        threading.Thread(target=run).start()
+
+    def stop(self):
+        self.stopped.set()
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    scanner = FakeBleScanner([
+        (0.01, 'D1:75:74:0B:59:1F', ''),
+        (0.01, 'F1:D9:71:7E:34:7A', 'MetaWear'),
+        (0.01, 'D1:75:74:0B:59:1F', 'MetaWear'),
+        (0.01, 'C0:FF:EE:00:00:01', 'Speaker'),
+        (2.0, 'DD:3A:7D:4D:56:F0', 'MetaWear'),
+    ])
+    monkeypatch.setattr(pymetawear.discover, 'BleScanner', scanner)
+    return scanner
+
+
+def test_iter_devices_stops_early(scanner):
+    t = time.time()
+    found = find_devices(['d1:75:74:0b:59:1f', 'F1:D9:71:7E:34:7A'],
+                         timeout=5.0, method='warble')
+    assert found == {'D1:75:74:0B:59:1F': '(unknown)',
+                     'F1:D9:71:7E:34:7A': 'MetaWear'}
+    assert time.time() - t < 1.0
+    assert not scanner.running
+
+    devices = list(iter_devices(5.0, name='MetaWear', count=2,
+                                method='warble'))
+    assert devices == [('F1:D9:71:7E:34:7A', 'MetaWear'),
+                       ('D1:75:74:0B:59:1F', 'MetaWear')]
+
+
+def test_discover_devices_timeout(scanner):
+    devices = dict(discover_devices_warble(timeout=0.5))
+    assert devices == {'D1:75:74:0B:59:1F': 'MetaWear',
+                       'F1:D9:71:7E:34:7A': 'MetaWear',
+                       'C0:FF:EE:00:00:01': 'Speaker'}
+
+
+def test_iter_devices_yields_late_names(scanner):
+    devices = list(iter_devices(0.5, method='warble'))
+    # A device is yielded again when its name arrives after its address.
+    assert devices == [('D1:75:74:0B:59:1F', '(unknown)'),
+                       ('F1:D9:71:7E:34:7A', 'MetaWear'),
+                       ('D1:75:74:0B:59:1F', 'MetaWear'),
+                       ('C0:FF:EE:00:00:01', 'Speaker')]
+
+    devices = list(iter_devices(0.5, name=lambda n: n.startswith('Meta'),
+                                method='warble'))
+    assert devices == [('F1:D9:71:7E:34:7A', 'MetaWear'),
+                       ('D1:75:74:0B:59:1F', 'MetaWear')]
+
+
+def test_leaving_the_loop_stops_the_scan(scanner):
+    devices = iter_devices(5.0, method='warble')
+    assert next(devices) == ('D1:75:74:0B:59:1F', '(unknown)')
+    assert scanner.running
+    devices.close()
+    assert not scanner.running
+
+
+def test_iter_devices_arguments(scanner):
+    assert list(iter_devices(5.0, addresses=[], method='warble')) == []
+    assert scanner.stopped is None
+    with pytest.raises(ValueError):
+        list(iter_devices(5.0, method='bogus'))
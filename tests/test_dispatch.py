@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_dispatch`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import threading
+
+from pymetawear.dispatch import Dispatcher
+from .mock_backend import acc_data_point
+
+
+def test_ordered_dispatch():
+    received = {'a': [], 'b': []}
+    running = {'a': 0, 'b': 0}
+    overlaps = []
+
+    def slow_callback(name):
+        def callback(data):
+            running[name] += 1
+            overlaps.append(running[name] > 1)
+            time.sleep(0.001)
+            received[name].append(data['epoch'])
+            running[name] -= 1
+        return callback
+
+    with Dispatcher(max_workers=4) as dispatcher:
+        a = dispatcher.wrap(slow_callback('a'))
+        b = dispatcher.wrap(slow_callback('b'))
+        t = time.time()
+        for i in range(100):
+            a.handle_data(acc_data_point(i))
+            b.handle_data(acc_data_point(i))
+        # The callback thread is not held up by the callbacks.
+        assert time.time() - t < 0.1
+        assert dispatcher.join(timeout=5.0)
+
+    assert received['a'] == received['b'] == list(range(1000, 1100))
+    assert not any(overlaps)
+    assert dispatcher.n_delivered == 200
+    assert dispatcher.queue_depth == 0
+    assert dispatcher.max_queue_depth > 1
+    assert dispatcher.max_latency >= dispatcher.mean_latency > 0
+
+
+def test_unordered_dispatch_and_errors():
+    received = []
+    lock = threading.Lock()
+
+    def callback(data):
+        if data['epoch'] % 10 == 0:
+            raise ValueError("Bad sample")
+        with lock:
+            received.append(data['epoch'])
+
+    dispatcher = Dispatcher(max_workers=3, ordered=False)
+    target = dispatcher.wrap(callback)
+    for i in range(50):
+        target.handle_data(acc_data_point(i))
+    assert target.flush(timeout=5.0)
+    dispatcher.close()
+    target.handle_data(acc_data_point(50))
+
+    assert sorted(received) == [1000 + i for i in range(50) if i % 10]
+    assert dispatcher.n_errors == 5
+    assert target.n_dropped == 1
+
+
+def test_latency_and_queue_depth():
+    release = threading.Event()
+    received = []
+
+    def blocked_callback(data):
+        release.wait()
+        received.append(data['epoch'])
+
+    with Dispatcher(max_workers=1) as dispatcher:
+        target = dispatcher.wrap(blocked_callback)
+        for i in range(10):
+            target.handle_data(acc_data_point(i))
+        assert dispatcher.queue_depth == target.queue_depth == 10
+        assert dispatcher.max_queue_depth == 10
+        time.sleep(0.05)
+        release.set()
+        assert target.flush(timeout=5.0)
+
+        assert dispatcher.queue_depth == target.queue_depth == 0
+        assert dispatcher.n_delivered == 10
+        # The first sample is delivered at once, the others wait for it.
+        assert dispatcher.max_latency >= 0.05
+        assert dispatcher.mean_latency >= 0.9 * 0.05
+        dispatcher.reset_metrics()
+        assert (dispatcher.max_queue_depth, dispatcher.n_delivered,
+                dispatcher.mean_latency, dispatcher.max_latency) == \
+            (0, 0, 0.0, 0.0)
+    assert received == list(range(1000, 1010))
+
+
+def test_close_delivers_queued_samples():
+    release = threading.Event()
+    received = []
+
+    def blocked_callback(data):
+        release.wait()
+        received.append(data['epoch'])
+
+    dispatcher = Dispatcher(max_workers=2)
+    target = dispatcher.wrap(blocked_callback)
+    for i in range(10):
+        target.handle_data(acc_data_point(i))
+    dispatcher.close(wait=False)
+    # Samples arriving after close are dropped, the queued ones are not.
+    target.handle_data(acc_data_point(10))
+    assert target.n_dropped == 1 and dispatcher.queue_depth == 10
+    release.set()
+    dispatcher.close()
+
+    assert received == list(range(1000, 1010))
+    assert dispatcher.queue_depth == 0
+    assert not any(worker.is_alive() for worker in dispatcher._workers)
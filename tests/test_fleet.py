@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_fleet`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+
+import pytest
+
+from pymetawear.exceptions import PyMetaWearException
+from pymetawear.fleet import MetaWearFleet
+from pymetawear.sinks import SampleQueue
+from .mock_backend import acc_data_point
+
+ADDRESSES = ['D1:75:74:0B:59:1{0}'.format(i) for i in range(6)]
+
+
+@pytest.fixture
+def fleet(fake_mw):
+    fake_mw.delays = [0.2]
+    fake_mw.failing = [ADDRESSES[3]]
+    with MetaWearFleet(ADDRESSES, max_workers=len(ADDRESSES)) as fleet:
+        yield fleet
+
+
+def test_fleet_connect_in_parallel(fleet):
+    t = time.time()
+    results = fleet.connect()
+    assert time.time() - t < 0.2 * len(ADDRESSES) / 2
+    assert list(results) == ADDRESSES
+    assert results.failed == [ADDRESSES[3]]
+    assert isinstance(results[ADDRESSES[3]].error, RuntimeError)
+    assert [c.mw.is_connected for c in fleet] == [
+        True, True, True, False, True, True]
+    with pytest.raises(PyMetaWearException):
+        results.raise_on_error()
+
+
+def test_fleet_run_on_some_boards(fleet):
+    results = fleet.run(lambda c, n: c.mw.address * n, 2,
+                        addresses=ADDRESSES[:2])
+    assert results.succeeded == ADDRESSES[:2]
+    assert results[ADDRESSES[1]].value == ADDRESSES[1] * 2
+
+
+def test_fleet_rejects_shared_sink(fleet):
+    with pytest.raises(ValueError):
+        fleet.notifications('accelerometer', SampleQueue(10))
+
+
+def test_fleet_with_failed_board(fleet, lib):
+    fleet.connect()
+    received = []
+    results = fleet.notifications(
+        'accelerometer', lambda address, data: received.append(
+            (address, data['epoch'])))
+    # The board that could not be connected has no modules.
+    assert results.failed == [ADDRESSES[3]]
+    assert isinstance(results[ADDRESSES[3]].error, AttributeError)
+
+    expected = []
+    for i, address in enumerate(ADDRESSES):
+        if address != ADDRESSES[3]:
+            fleet[address].accelerometer.callback[1](None, acc_data_point(i))
+            expected.append((address, 1000 + i))
+    assert sorted(received) == expected
+
+    results = fleet.notifications('accelerometer', None)
+    assert results.failed == [ADDRESSES[3]]
+    assert all(fleet[a].accelerometer.callback is None
+               for a in results.succeeded)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_import`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+
+def _loaded_modules(statement):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.check_output([
+        sys.executable, '-c',
+        statement + '; import sys; print(" ".join(sorted(sys.modules)))'],
+        env=env)
+    return output.decode('ascii').split()
+
+
+def test_import_does_not_load_libmetawear():
+    loaded = _loaded_modules('import pymetawear, pymetawear.exceptions')
+    assert 'mbientlab.metawear' not in loaded
+    assert 'tqdm' not in loaded
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7),
+                    reason="Lazy module imports require Python 3.7")
+def test_import_modules_is_lazy():
+    loaded = _loaded_modules('import pymetawear.modules')
+    assert 'mbientlab.metawear' not in loaded
+    assert 'pymetawear.modules.accelerometer' not in loaded
+    loaded = _loaded_modules(
+        'from pymetawear.modules import AccelerometerModule')
+    assert 'pymetawear.modules.accelerometer' in loaded
+    assert 'pymetawear.modules.gyroscope' not in loaded
+    assert 'tqdm' not in loaded
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_logging`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import pytest
+
+from pymetawear.exceptions import PyMetaWearDownloadTimeout
+import pymetawear.client
+from pymetawear.modules.base import PyMetaWearLoggingModule
+from pymetawear.sinks import BinaryFile, CSVFile, load_binary
+
+
+@pytest.fixture
+def logging_module(lib):
+    def create(n_samples, total_entries=None, interrupt_after=None):
+        lib.n_samples = n_samples
+        lib.total_entries = total_entries
+        lib.interrupt_after = interrupt_after
+        lib.data_handlers.clear()
+        module = PyMetaWearLoggingModule(None)
+        module._logger_address = 1
+        return module
+    return create
+
+
+def test_download_log_list(logging_module):
+    data = logging_module(5).download_log()
+    assert [d['epoch'] for d in data] == [1000, 1001, 1002, 1003, 1004]
+    assert data[3]['value'].y == -3.0
+
+
+@pytest.mark.parametrize("total_entries", [10, 3])
+def test_download_log_numpy(logging_module, total_entries):
+    pytest.importorskip('numpy')
+    data = logging_module(5, total_entries).download_log(output='numpy')
+    assert len(data) == 5
+    assert data.dtype.names == ('epoch', 'x', 'y', 'z')
+    assert list(data['epoch']) == [1000, 1001, 1002, 1003, 1004]
+    assert list(data['z']) == [0.0, 0.5, 1.0, 1.5, 2.0]
+
+
+def test_download_log_binary_file(logging_module, tmpdir):
+    pytest.importorskip('numpy')
+    path = str(tmpdir.join('acc.bin'))
+    f = logging_module(5).download_log(output=BinaryFile(path, chunk_size=2))
+    assert len(f) == 5
+    # Appending to an existing file.
+    f = logging_module(3).download_log(output=BinaryFile(path))
+    assert len(f) == 8
+    data = load_binary(path)
+    assert list(data['epoch']) == [1000, 1001, 1002, 1003, 1004,
+                                   1000, 1001, 1002]
+    assert list(data['y'][:5]) == [0.0, -1.0, -2.0, -3.0, -4.0]
+
+
+def test_download_log_csv_file(logging_module, tmpdir):
+    path = str(tmpdir.join('acc.csv'))
+    f = logging_module(3).download_log(output=CSVFile(path, chunk_size=2))
+    assert f.path == path
+    with open(path) as csv_file:
+        lines = csv_file.read().splitlines()
+    assert lines == ['epoch,x,y,z', '1000,0.0,0.0,0.0',
+                     '1001,1.0,-1.0,0.5', '1002,2.0,-2.0,1.0']
+
+
+@pytest.mark.parametrize("output", ['list', 'numpy'])
+def test_download_log_checkpoint(logging_module, tmpdir, output):
+    if output == 'numpy':
+        pytest.importorskip('numpy')
+    directory = str(tmpdir.join('checkpoint'))
+    with pytest.raises(PyMetaWearDownloadTimeout):
+        logging_module(10, interrupt_after=6).download_log(
+            timeout=0.05, checkpoint=directory)
+    # The second attempt resends some of the already downloaded samples.
+    data = logging_module(10).download_log(
+        output=output, checkpoint=directory)
+    assert [int(d['epoch']) for d in data] == list(range(1000, 1010))
+    assert not tmpdir.join('checkpoint', 'logger_0.bin').exists()
+
+
+def test_download_log_progress_function(logging_module):
+    progress = []
+    data = logging_module(3).download_log(
+        progress_update_function=lambda *args: progress.append(args))
+    assert len(data) == 3
+    assert progress == [(6, 6), (0, 6)]
+
+
+def test_client_download_logs(lib, fake_mw):
+    pytest.importorskip('numpy')
+    lib.n_samples = 4
+    client = pymetawear.client.MetaWearClient(
+        'XX:XX:XX:XX:XX:XX', connect=False)
+    client.accelerometer = PyMetaWearLoggingModule(None)
+    client.accelerometer._logger_address = 1
+    client.gyroscope = PyMetaWearLoggingModule(None)
+    client.gyroscope._logger_address = 2
+    client.magnetometer = PyMetaWearLoggingModule(None)
+
+    data = client.download_logs(output={'gyroscope': 'numpy'})
+    assert sorted(data) == ['accelerometer', 'gyroscope']
+    assert [d['epoch'] for d in data['accelerometer']] == [
+        1000, 1001, 1002, 1003]
+    assert list(data['gyroscope']['epoch']) == [2000, 2001, 2002, 2003]
+    assert sorted(lib.removed) == [1, 2]
+    assert not client.accelerometer.has_logger
@@ -68,3 +68,16 @@ def test_client_init_delayed_connect(mw_board):
 def test_client_creation():
     c = pymetawear.client.MetaWearClient('XX:XX:XX:XX:XX:XX', connect=False)
     assert c is not None
+
+
+def test_client_lazy_modules(lib, fake_mw):
+    c = pymetawear.client.MetaWearClient('XX:XX:XX:XX:XX:XX', connect=False)
+    assert c.gyroscope is None
+    c.connect()
+    assert c._modules == {}
+    gyroscope = c.gyroscope
+    assert isinstance(gyroscope, pymetawear.modules.GyroscopeModule)
+    assert list(c._modules) == ['gyroscope']
+    # Modules are kept on reconnects.
+    c.connect()
+    assert c.gyroscope is gyroscope
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_processors`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import gc
+from ctypes import c_uint, c_void_p, cast, pointer
+
+import pytest
+
+import pymetawear.processors
+from pymetawear.exceptions import PyMetaWearException
+from pymetawear.processors import Pipeline, create_processor
+from .mock_backend import acc_data_point
+
+
+class FakeModule(object):
+    board = 1
+    data_signal = 10
+    module_name = "Accelerometer"
+
+    def __init__(self):
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def toggle_sampling(self, enabled=True):
+        raise NotImplementedError()
+
+
+def test_pipeline_chain_and_remove(lib):
+    module = FakeModule()
+    with Pipeline(module).rss().average(8).threshold(1.5, mode='binary') \
+            as pipeline:
+        assert pipeline.data_signal == 102
+        assert pipeline.module_name == \
+            "Accelerometer -> rss -> average -> threshold"
+        pipeline.notifications(lambda data: None)
+        assert module.running
+
+    creates = [c for c in lib.calls if '_create' in c[0]]
+    assert [c[1] for c in creates] == [10, 100, 101]
+    assert creates[1][2] == 8
+    assert creates[2][2:5] == (1, 1.5, 0.0)
+    assert not module.running
+    assert ('mbl_mw_datasignal_unsubscribe', 102) in lib.calls
+    assert lib.calls[-1] == ('mbl_mw_dataprocessor_remove', 100)
+    assert pipeline.data_signal == 10
+
+
+def test_pipeline_failed_processor(lib):
+    pipeline = Pipeline(FakeModule()).average(4)
+    with pytest.raises(PyMetaWearException):
+        pipeline.comparator('gt', 0.5)
+    assert pipeline.processors == [100]
+
+
+def test_pipeline_accounter_count(lib):
+    module = FakeModule()
+    module.sample_period = 10.0
+    pipeline = Pipeline(module).accounter('count')
+    assert lib.calls[-1][0] == 'mbl_mw_dataprocessor_accounter_create_count'
+
+    received = []
+    pipeline.notifications(received.append)
+    # Samples taken every 10 ms arrive in bursts; the last one arrives
+    # before its reconstructed time, which moves the time line back.
+    counts = [0, 1, 2, 3, 4, 5, 7]
+    epochs = [1000, 1030, 1031, 1032, 1060, 1061, 1065]
+    counters = []
+    for count, epoch in zip(counts, epochs):
+        data = acc_data_point(0)
+        counters.append(c_uint(count))
+        data.contents.extra = cast(pointer(counters[-1]), c_void_p).value
+        data.contents.epoch = epoch
+        pipeline.callback[0](None, data)
+    pipeline.remove()
+
+    assert [d['counter'] for d in received] == counts
+    assert [d['epoch'] for d in received] == \
+        [1000, 1010, 1020, 1030, 1040, 1050, 1065]
+
+
+def test_late_processor_after_timeout(lib):
+    lib.late = True
+    with pytest.raises(PyMetaWearException):
+        create_processor('average', 10, 4, timeout=0.01)
+    gc.collect()
+    # The board responds after the timeout; the handler must still exist.
+    lib.handlers.pop()()(None, 100)
+    assert len(pymetawear.processors._create_handlers) == 1
+
+    lib.late = False
+    assert create_processor('average', 10, 4) == 100
+    assert len(pymetawear.processors._create_handlers) == 1
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_reconnect`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+from threading import Event
+
+from pymetawear.reconnect import ReconnectSupervisor
+from .mock_backend import FakeClient
+
+
+def _recover(supervisor):
+    done = Event()
+    supervisor.on_recovered = supervisor.on_failed = lambda i: done.set()
+    supervisor.client.mw.on_disconnect(1)
+    assert done.wait(2.0)
+    return supervisor.incidents[-1]
+
+
+def test_replays_subscriptions_and_loggers(lib):
+    client = FakeClient()
+    client.mw.failures = 2
+    client.accelerometer.set_settings(data_rate=100.0)
+    client.accelerometer.notifications(lambda data: None)
+    client.sensorfusion.notifications(quaternion_callback=lambda data: None)
+    client.sensorfusion._logger_address = 8
+    lib.loggers[7] = 8
+    client.sensorfusion._logger_running = True
+    del lib.calls[:]
+
+    with ReconnectSupervisor(client, initial_delay=0.01) as supervisor:
+        incident = _recover(supervisor)
+        assert incident.recovered and incident.attempts == 3
+        assert incident.time_to_recover >= 0.03
+        assert list(incident.samples_lost) == ['accelerometer']
+        assert lib.names.count('mbl_mw_acc_write_acceleration_config') == 1
+        assert lib.names.count('mbl_mw_datasignal_subscribe') == 2
+        # The sensor fusion both logs and streams, and is resumed once.
+        assert lib.names.count('mbl_mw_logging_start') == 1
+        assert lib.names.count('mbl_mw_sensor_fusion_start') == 1
+        assert lib.names.index('mbl_mw_logging_start') < \
+            lib.names.index('mbl_mw_sensor_fusion_start')
+
+        # Intended disconnects and lost loggers.
+        client.disconnect()
+        assert not supervisor.recovering
+        client._disconnect_requested = False
+        del lib.loggers[7]
+        incident = _recover(supervisor)
+        assert incident.recovered and not client.sensorfusion.has_logger
+    assert client.mw.on_disconnect is None
+
+
+def test_gives_up_after_max_attempts(lib):
+    client = FakeClient()
+    client.mw.failures = 5
+    with ReconnectSupervisor(client, max_attempts=2,
+                             initial_delay=0.01) as supervisor:
+        incident = _recover(supervisor)
+    assert not incident.recovered and incident.attempts == 2
+    assert isinstance(incident.error, RuntimeError)
+    assert incident.time_to_recover is None
+
+
+class FakePool(object):
+    """Records the clients connected through it."""
+
+    def __init__(self):
+        self.connected = []
+
+    def connect(self, client):
+        self.connected.append(client)
+        client.connect()
+
+
+def test_reconnects_through_pool(lib):
+    client = FakeClient()
+    client.mw.failures = 1
+    pool = FakePool()
+    with ReconnectSupervisor(client, initial_delay=0.01,
+                             pool=pool) as supervisor:
+        incident = _recover(supervisor)
+    assert incident.recovered and incident.attempts == 2
+    assert pool.connected == [client, client]
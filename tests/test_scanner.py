@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_scanner`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+
+from pymetawear.exceptions import PyMetaWearException
+from pymetawear.fleet import MetaWearFleet
+from pymetawear.scanner import FakeScanner
+
+ADVERTISEMENTS = [
+    (0.0, 'dd:3a:7d:4d:56:f0', 'MetaWear', -60),
+    (0.05, 'FF:50:35:82:3B:5A', '(unknown)', -80),
+    (0.1, 'FF:50:35:82:3B:5A', 'MetaWear', -75),
+    (0.1, 'FF:50:35:82:3B:5A', '(unknown)', -70),
+]
+
+
+def test_table_and_wait_for():
+    with FakeScanner(ADVERTISEMENTS, ttl=10.0) as scanner:
+        found = scanner.wait_for(['DD:3A:7D:4D:56:F0'], timeout=1.0)
+        assert list(found) == ['DD:3A:7D:4D:56:F0']
+        time.sleep(0.3)
+        device = scanner.get('ff:50:35:82:3b:5a')
+        assert (device.name, device.rssi) == ('MetaWear', -70)
+        assert scanner.n_advertisements == 4
+        assert len(scanner) == 2
+        assert scanner.wait_for(['C0:FF:EE:00:00:01'], timeout=0.1) == {}
+    assert not scanner.running
+
+
+def test_ttl_eviction_and_replay():
+    with FakeScanner(ADVERTISEMENTS[:1], ttl=0.1, record=True) as scanner:
+        assert scanner.wait_for(['DD:3A:7D:4D:56:F0'], timeout=1.0)
+        time.sleep(0.2)
+        assert 'DD:3A:7D:4D:56:F0' not in scanner
+        assert scanner.devices == {}
+
+    replay = FakeScanner(scanner.recording, speed=10.0)
+    with replay:
+        assert replay.wait_for(['DD:3A:7D:4D:56:F0'], timeout=1.0)
+
+
+class FailingScanner(FakeScanner):
+    """Fails after the advertisements, as for a removed adapter."""
+
+    def _scan(self, stopped):
+        for _, address, name, rssi in self.advertisements:
+            yield address, name, rssi
+        raise RuntimeError("Adapter removed")
+
+
+def test_failed_scan():
+    with FailingScanner(ADVERTISEMENTS[:2]) as scanner:
+        t = time.time()
+        # Waiting ends with the scan, and the table is kept.
+        assert scanner.wait_for(['C0:FF:EE:00:00:01'], timeout=5.0) == {}
+        assert time.time() - t < 1.0
+        assert not scanner.running
+        assert isinstance(scanner.error, RuntimeError)
+        assert sorted(scanner.devices) == ['DD:3A:7D:4D:56:F0',
+                                           'FF:50:35:82:3B:5A']
+
+
+def test_loop_and_restart():
+    scanner = FakeScanner(ADVERTISEMENTS[:1], loop=True, speed=100.0)
+    with scanner:
+        time.sleep(0.1)
+    assert scanner.n_advertisements > 1
+    assert not scanner.running
+
+    n_advertisements = scanner.n_advertisements
+    with scanner:
+        time.sleep(0.1)
+        assert scanner.running
+    assert scanner.n_advertisements > n_advertisements
+
+
+def test_fleet_connects_scanned_boards(fake_mw):
+    addresses = ['DD:3A:7D:4D:56:F0', 'C0:FF:EE:00:00:01']
+    with FakeScanner(ADVERTISEMENTS[:1]) as scanner:
+        assert scanner.wait_for(addresses[:1], timeout=1.0)
+        with MetaWearFleet(addresses) as fleet:
+            results = fleet.connect(scanner=scanner)
+            assert list(results) == addresses
+            assert results.failed == addresses[1:]
+            assert isinstance(results[addresses[1]].error,
+                              PyMetaWearException)
+            # Boards not seen are not attempted.
+            assert [fleet[a].mw.attempts for a in addresses] == [1, 0]
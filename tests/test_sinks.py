@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+:mod:`test_sinks`
+==================
+
+"""
+
+from __future__ import division
+from __future__ import print_function
+from __future__ import absolute_import
+
+import time
+import threading
+from ctypes import c_float
+
+import pytest
+from mbientlab.metawear.cbindings import SensorFusionData, DataTypeId
+
+pytest.importorskip('numpy')
+
+from pymetawear.modules.base import data_handler, context_callback, \
+    packed_timestamps
+from pymetawear.modules.base import PyMetaWearModule
+from pymetawear.modules import SensorFusionModule
+from pymetawear.sinks import RingBuffer, Batcher, SampleQueue
+from .mock_backend import data_point, acc_data_point
+
+
+def test_ring_buffer_latest():
+    buffer = RingBuffer(4)
+    handler = context_callback(data_handler(buffer))
+    for i in range(10):
+        handler(None, acc_data_point(i))
+
+    latest = buffer.latest(3)
+    assert list(latest['epoch']) == [1007, 1008, 1009]
+    assert list(latest['z']) == [14.0, 16.0, 18.0]
+    assert len(buffer) == 4
+    assert buffer.n_written == 10
+    assert buffer.n_overwritten == 6
+
+
+def test_ring_buffer_read_and_overflow():
+    buffer = RingBuffer(4)
+    for i in range(3):
+        buffer.handle_data(acc_data_point(i))
+    assert list(buffer.read()['epoch']) == [1000, 1001, 1002]
+    for i in range(3, 10):
+        buffer.handle_data(acc_data_point(i))
+    assert buffer.n_overflowed == 3
+    assert list(buffer.read()['x']) == [6.0, 7.0, 8.0, 9.0]
+    assert buffer.n_unread == 0
+
+
+def test_ring_buffer_rejects_other_types():
+    buffer = RingBuffer(4)
+    buffer.handle_data(data_point(c_float(1.0), DataTypeId.FLOAT, 0))
+    assert buffer.n_rejected == 1
+    assert len(buffer) == 0
+
+
+def test_batcher_size_and_close():
+    batches = []
+    batcher = Batcher(batches.append, batch_size=4, batch_interval=10000)
+    for i in range(10):
+        batcher.handle_data(acc_data_point(i))
+    assert [len(b) for b in batches] == [4, 4]
+    batcher.close()
+    assert [d['epoch'] for d in batches[-1]] == [1008, 1009]
+
+    # Samples arriving after close are ignored.
+    batcher.handle_data(acc_data_point(10))
+    batcher.flush()
+    assert len(batches) == 3
+
+
+def test_batcher_interval():
+    batches = []
+    batcher = Batcher(batches.append, batch_interval=10)
+    batcher.handle_data(acc_data_point(0))
+    batcher.handle_data(acc_data_point(1))
+    deadline = time.time() + 2.0
+    while not batches and time.time() < deadline:
+        time.sleep(0.01)
+    batcher.close()
+    assert [d['value'].x for d in batches[0]] == [0.0, 1.0]
+
+
+@pytest.mark.parametrize('overflow, epochs', [
+    ('drop_oldest', [1007, 1008, 1009]),
+    ('drop_newest', [1000, 1001, 1002]),
+])
+def test_sample_queue_drop(overflow, epochs):
+    queue = SampleQueue(3, overflow)
+    for i in range(10):
+        queue.handle_data(acc_data_point(i))
+    queue.close()
+    assert [d['epoch'] for d in queue] == epochs
+    assert queue.n_received == 10
+    assert queue.n_dropped == 7
+    assert queue.high_water == 3
+
+
+def test_sample_queue_block():
+    queue = SampleQueue(2, 'block')
+
+    def produce():
+        for i in range(100):
+            queue.handle_data(acc_data_point(i))
+        queue.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.05)
+    assert len(queue) == 2
+    assert [d['epoch'] for d in queue] == list(range(1000, 1100))
+    producer.join()
+    assert queue.n_dropped == 0
+    assert queue.n_blocked > 0
+
+
+def test_module_stream():
+
+    class StreamingModule(PyMetaWearModule):
+        sink = None
+
+        def notifications(self, callback=None):
+            if callback is None:
+                self.sink.close()
+            self.sink = callback
+
+    module = StreamingModule(None)
+    with module.stream(maxsize=10) as samples:
+        module.sink.handle_data(acc_data_point(0))
+        assert samples.get(timeout=1.0)['epoch'] == 1000
+        assert samples.get(timeout=0.01) is None
+    assert module.sink is None
+    assert list(samples) == []
+
+
+def test_module_subscribers():
+
+    class StreamingModule(PyMetaWearModule):
+        sink = None
+        n_calls = 0
+
+        def notifications(self, callback=None):
+            self.n_calls += 1
+            if callback is None:
+                self.sink.close()
+            self.sink = callback
+
+    module = StreamingModule(None)
+    recorded, shown = [], []
+    buffer = SampleQueue(10, 'drop_oldest')
+    module.add_subscriber(recorded.append)
+    module.add_subscriber(buffer)
+    module.sink.handle_data(acc_data_point(0))
+    module.add_subscriber(shown.append)
+    module.sink.handle_data(acc_data_point(1))
+    assert module.remove_subscriber(buffer)
+    assert not module.remove_subscriber(buffer)
+    module.sink.handle_data(acc_data_point(2))
+    assert module.n_calls == 1
+
+    assert module.remove_subscriber(recorded.append)
+    assert module.remove_subscriber(shown.append)
+    assert module.n_calls == 2
+    assert module.sink is None
+    assert [d['epoch'] for d in recorded] == [1000, 1001, 1002]
+    assert [d['epoch'] for d in shown] == [1001, 1002]
+    assert recorded[1] is shown[0]
+    assert [d['epoch'] for d in buffer] == [1000, 1001]
+
+
+def test_sensorfusion_stream(lib):
+    module = SensorFusionModule(1, 0)
+    quaternion = 100 + SensorFusionData.QUATERNION
+    euler_angle = 100 + SensorFusionData.EULER_ANGLE
+    module.notifications(quaternion_callback=lambda data: None,
+                         calibration_state_callback=lambda data: None)
+    with module.stream('euler_angle', maxsize=10) as samples:
+        assert sorted(lib.subscribed) == [quaternion, euler_angle, 200]
+        lib.subscribed[euler_angle](None, acc_data_point(0))
+        assert samples.get(timeout=1.0)['epoch'] == 1000
+    assert sorted(lib.subscribed) == [quaternion, 200]
+    # The removed data source is taken out of the output.
+    assert lib.calls[-4:] == [
+        ('mbl_mw_sensor_fusion_stop', 1),
+        ('mbl_mw_sensor_fusion_clear_enabled_mask', 1),
+        ('mbl_mw_sensor_fusion_enable_data', 1, SensorFusionData.QUATERNION),
+        ('mbl_mw_sensor_fusion_start', 1)]
+    assert module._streams_to_enable == dict(
+        (source, source == SensorFusionData.QUATERNION)
+        for source in module._streams_to_enable)
+
+    with pytest.raises(ValueError):
+        with module.stream('bogus'):
+            pass
+
+
+def test_sensorfusion_subscribers(lib):
+    module = SensorFusionModule(1, 0)
+    quaternion = 100 + SensorFusionData.QUATERNION
+    euler_angle = 100 + SensorFusionData.EULER_ANGLE
+    module.notifications(calibration_state_callback=lambda data: None)
+    del lib.calls[:]
+    recorded, shown = [], []
+    module.add_subscriber(recorded.append)
+    module.add_subscriber(shown.append, data_source='euler_angle')
+    module.add_subscriber(shown.append)
+    assert sorted(lib.subscribed) == [quaternion, euler_angle, 200]
+    assert lib.names.count('mbl_mw_sensor_fusion_start') == 2
+    lib.subscribed[quaternion](None, acc_data_point(0))
+    lib.subscribed[euler_angle](None, acc_data_point(1))
+
+    assert module.remove_subscriber(shown.append, data_source='euler_angle')
+    assert sorted(lib.subscribed) == [quaternion, 200]
+    assert module.remove_subscriber(recorded.append)
+    assert module.remove_subscriber(shown.append)
+    assert sorted(lib.subscribed) == [200]
+    assert lib.names.count('mbl_mw_sensor_fusion_stop') == 2
+    assert lib.names.count('mbl_mw_sensor_fusion_start') == 3
+    assert [d['epoch'] for d in recorded] == [1000]
+    assert [d['epoch'] for d in shown] == [1000, 1001]
+
+
+def test_packed_timestamps():
+    epochs = []
+    handler = packed_timestamps(
+        data_handler(lambda data: epochs.append(data['epoch'])), 2.5)
+    # Two notifications of three samples, received at 1010 and 1012.
+    for i, epoch in enumerate([1010] * 3 + [1012] * 3):
+        data = acc_data_point(i)
+        data.contents.epoch = epoch
+        handler(data)
+    assert epochs == [1005, 1007, 1010, 1010, 1010, 1012]